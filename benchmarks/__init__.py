@@ -0,0 +1 @@
+"""Headless benchmarks for the data layer. Run from the repository root."""
@@ -0,0 +1,130 @@
+"""Compare the tuned connection setup with a default sqlite3 connection.
+
+"default" is the previous setup: one sqlite3.connect() with the rollback
+journal, synchronous=FULL and foreign keys off, shared by reads and writes.
+"managed" is db.connection: WAL, tuned PRAGMAs and a separate reader.
+
+Usage: python -m benchmarks.bench_connection [--checks 20000] [--ops 500]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+
+from benchmarks.synthetic import ITEM_NAMES, seed
+from db import repository
+from db.connection import ConnectionManager, connect
+from db.migrations import migrate
+
+
+def new_check_items():
+    return [(name, 4, 3, "2030-01-01", "") for name in ITEM_NAMES]
+
+
+def write_rate(conn, ops):
+    start = time.perf_counter()
+    for n in range(ops):
+        repository.save_check(conn, ("Box 000", "2024-02-01", f"bench {n}"), new_check_items())
+    return ops / (time.perf_counter() - start)
+
+
+def read_rate(conn, ops, max_id, rng):
+    ids = [rng.randint(1, max_id) for _ in range(ops)]
+    start = time.perf_counter()
+    for check_id in ids:
+        repository.get_check_with_items(conn, check_id)
+    return ops / (time.perf_counter() - start)
+
+
+def read_rate_during_writes(open_writer, reader, ops, max_id, rng, shared_lock=None):
+    """Reads/s on ``reader`` while another thread keeps saving checks.
+
+    ``open_writer`` runs on the writing thread and returns its connection.
+    Pass ``shared_lock`` when both sides use the same connection.
+    """
+    guard = shared_lock or nullcontext()
+    stop = threading.Event()
+
+    def keep_writing():
+        writer = open_writer()
+        while not stop.is_set():
+            with guard:
+                write_rate(writer, 1)
+
+    thread = threading.Thread(target=keep_writing)
+    thread.start()
+    try:
+        ids = [rng.randint(1, max_id) for _ in range(ops)]
+        start = time.perf_counter()
+        for check_id in ids:
+            with guard:
+                repository.get_check_with_items(reader, check_id)
+        return ops / (time.perf_counter() - start)
+    finally:
+        stop.set()
+        thread.join()
+
+
+def bench_default(path, ops, max_id):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    rng = random.Random(1)
+    results = {
+        "writes/s": write_rate(conn, ops),
+        "reads/s": read_rate(conn, ops, max_id, rng),
+        # One shared connection: reads queue behind writes
+        "reads/s during writes": read_rate_during_writes(
+            lambda: conn, conn, ops, max_id, rng, shared_lock=threading.Lock()
+        ),
+    }
+    conn.close()
+    return results
+
+
+def bench_managed(path, ops, max_id):
+    manager = ConnectionManager(path)
+    writer = manager.open_writer()
+    reader = manager.open_reader()
+    rng = random.Random(1)
+    results = {
+        "writes/s": write_rate(writer, ops),
+        "reads/s": read_rate(reader, ops, max_id, rng),
+        # The writing thread opens its own connection, as the writer worker does
+        "reads/s during writes": read_rate_during_writes(
+            lambda: connect(path), reader, ops, max_id, rng
+        ),
+    }
+    print(f"managed statement cache: {manager.statement_cache_stats()}")
+    writer.close()
+    reader.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--ops", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = {}
+        for label, bench in (("default", bench_default), ("managed", bench_managed)):
+            path = os.path.join(tmp, f"{label}.db")
+            conn = sqlite3.connect(path)
+            migrate(conn)
+            seed(conn, args.checks)
+            conn.close()
+            rows[label] = bench(path, args.ops, args.checks)
+
+        print(f"{args.checks} seeded checks, {args.ops} operations per measurement")
+        metrics = list(rows["default"])
+        print(f"{'':<10}" + "".join(f"{m:>24}" for m in metrics))
+        for label, values in rows.items():
+            print(f"{label:<10}" + "".join(f"{values.get(m, 0):>24.0f}" for m in metrics))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Time a bulk import of synthetic item rows through db.importer.
+
+Usage: python -m benchmarks.bench_import [--rows 1000000]
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from benchmarks.synthetic import ITEM_NAMES, START_DATE, box_names
+from db import importer
+from db.connection import ConnectionManager
+from db.export import EXPORT_COLUMNS
+
+
+def write_csv(path, rows, rng):
+    """Write ``rows`` item rows (one check per len(ITEM_NAMES) rows)."""
+    boxes = box_names(50)
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        writer.writerow(EXPORT_COLUMNS)
+        for n in range(rows // len(ITEM_NAMES)):
+            check_date = (START_DATE + timedelta(days=rng.randrange(5000))).isoformat()
+            box = rng.choice(boxes)
+            for item_name in ITEM_NAMES:
+                expiry = (START_DATE + timedelta(days=rng.randrange(6000))).isoformat()
+                writer.writerow((n, box, check_date, "", item_name, 4, rng.randrange(8), expiry, ""))
+        # A few rows the importer must reject
+        writer.writerow(("", box, "2020-13-01", "", ITEM_NAMES[0], 4, 1, "", ""))
+        writer.writerow(("", box, "2020-01-01", "", ITEM_NAMES[0], 4, "lots", "", ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk", type=int, default=importer.CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "import.csv")
+        write_csv(source, args.rows, random.Random(3))
+        conn = ConnectionManager(os.path.join(tmp, "bench.db")).open_writer()
+
+        start = time.perf_counter()
+        result = importer.import_file(conn, source, "csv", chunk_size=args.chunk)
+        elapsed = time.perf_counter() - start
+        conn.close()
+
+    print(f"Imported {result['checks']} checks / {result['items']} item rows "
+          f"in {elapsed:.1f} s ({result['items'] / elapsed:.0f} rows/s); "
+          f"rejected {len(result['rejected'])}: {result['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
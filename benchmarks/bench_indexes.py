@@ -0,0 +1,82 @@
+"""Compare hot query times before and after the index migration.
+
+Usage: python -m benchmarks.bench_indexes [--checks 100000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic import box_names, create_database
+from db.migrations import migrate
+
+# Last migration touching indexes; later ones change the check_items layout
+# these queries are written against
+INDEX_VERSION = 3
+
+QUERIES = {
+    "items for check": (
+        "SELECT item_name, standard_quantity, current_quantity, expiry_date, item_notes "
+        "FROM check_items WHERE check_id = ?"
+    ),
+    "history (first 50)": (
+        "SELECT id, box_name, check_date, general_notes "
+        "FROM first_aid_checks ORDER BY check_date DESC LIMIT 50"
+    ),
+    "latest check for box": (
+        "SELECT id, check_date FROM first_aid_checks "
+        "WHERE box_name = ? ORDER BY check_date DESC LIMIT 1"
+    ),
+}
+
+
+def time_query(conn, sql, param_sets):
+    start = time.perf_counter()
+    for params in param_sets:
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / len(param_sets) * 1000
+
+
+def run_queries(conn, checks, repeats):
+    rng = random.Random(42)
+    boxes = box_names(50)
+    params = {
+        "items for check": [(rng.randint(1, checks),) for _ in range(repeats)],
+        "history (first 50)": [() for _ in range(repeats)],
+        "latest check for box": [(rng.choice(boxes),) for _ in range(repeats)],
+    }
+    return {name: time_query(conn, sql, params[name]) for name, sql in QUERIES.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Seeding {args.checks} checks (schema v1, no indexes)...")
+        conn = create_database(path, args.checks, schema_version=1)
+        before = run_queries(conn, args.checks, args.repeats)
+
+        start = time.perf_counter()
+        migrate(conn, INDEX_VERSION)
+        migration_ms = (time.perf_counter() - start) * 1000
+        after = run_queries(conn, args.checks, args.repeats)
+
+        start = time.perf_counter()
+        migrate(conn, INDEX_VERSION)
+        noop_ms = (time.perf_counter() - start) * 1000
+        conn.close()
+
+    print(f"Migration to v{INDEX_VERSION}: {migration_ms:.1f} ms; re-run when current: {noop_ms:.3f} ms")
+    print(f"{'query':<24}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for name in QUERIES:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<24}{before[name]:>14.3f}{after[name]:>14.3f}{speedup:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Latency percentiles for the data layer hot paths.
+
+Seeds synthetic databases and times save, edit-load, history page
+(plain and filtered) and details-load through db.repository, without
+starting the GUI.
+
+Usage: python -m benchmarks.bench_repository [--sizes 1000 100000 1000000]
+       [--samples 200] [--db-dir DIR]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+
+from benchmarks.synthetic import ITEM_NAMES, box_names, create_database
+from benchmarks.timing import format_table, sample, summarize
+from db import repository, status
+from db.dates import EPOCH_JULIAN_DAY
+from db.migrations import migrate
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+
+def open_database(db_dir, checks):
+    """Open a seeded database, reusing one from ``db_dir`` when present."""
+    path = os.path.join(db_dir, f"bench_{checks}.db")
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        return conn
+    print(f"Seeding {checks} checks into {path}...")
+    return create_database(path, checks)
+
+
+def save_new(conn, box_name, check_date):
+    items = [(name, 4, 3, "2030-01-01", "") for name in ITEM_NAMES]
+    repository.save_check(conn, (box_name, check_date, ""), items)
+
+
+def save_edit(conn, check_id):
+    check = repository.get_check(conn, check_id)
+    stored = {row[0]: tuple(row[1:]) for row in repository.get_check_items(conn, check_id)}
+    items = [(name, *values) for name, values in stored.items()]
+    # Change a single quantity, as a typical correction would
+    name, standard_qty, current_qty, expiry_date, item_notes = items[0]
+    items[0] = (name, standard_qty, current_qty + 1, expiry_date, item_notes)
+    repository.save_check(conn, check, items, check_id=check_id, stored_check=check, stored_items=stored)
+
+
+def run(conn, samples, rng):
+    max_id = conn.execute("SELECT MAX(id) FROM first_aid_checks").fetchone()[0]
+    ids = [(rng.randint(1, max_id),) for _ in range(samples)]
+    cursors = [
+        conn.execute(f"SELECT date(check_day + {EPOCH_JULIAN_DAY}), id FROM first_aid_checks WHERE id = ?", args).fetchone()
+        for args in ids
+    ]
+    boxes = box_names(50)
+
+    results = []
+    results.append(("history page (first)", summarize(sample(
+        lambda: repository.get_history_page(conn), [()] * samples))))
+    results.append(("history page (deep)", summarize(sample(
+        lambda after: repository.get_history_page(conn, after=after),
+        [(tuple(c),) for c in cursors if c]))))
+    results.append(("history page (box, year)", summarize(sample(
+        lambda box, year: repository.get_history_page(
+            conn, box_name=box, date_from=f"{year}-01-01", date_to=f"{year}-12-31"),
+        [(rng.choice(boxes), rng.randint(2010, 2024)) for _ in range(samples)]))))
+    results.append(("history page (expired)", summarize(sample(
+        lambda after: repository.get_history_page(conn, after=after, status_mask=status.EXPIRED_FLAG),
+        [(tuple(c),) for c in cursors if c]))))
+    results.append(("edit-load", summarize(sample(
+        lambda check_id: repository.get_check_with_items(conn, check_id), ids))))
+    results.append(("details-load", summarize(sample(
+        lambda check_id: repository.get_check_with_items(conn, check_id), ids))))
+    results.append(("save (new check)", summarize(sample(
+        lambda box, day: save_new(conn, box, day),
+        [(rng.choice(boxes), f"2024-01-{rng.randint(1, 28):02d}") for _ in range(samples)]))))
+    results.append(("save (edit one item)", summarize(sample(
+        lambda check_id: save_edit(conn, check_id), ids))))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--db-dir", help="keep seeded databases here and reuse them")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_dir = args.db_dir or tmp
+        os.makedirs(db_dir, exist_ok=True)
+        for checks in args.sizes:
+            conn = open_database(db_dir, checks)
+            print(f"\n{checks} checks")
+            print(format_table(run(conn, args.samples, rng)))
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Latency of notes search: FTS5 index versus a LIKE scan.
+
+Usage: python -m benchmarks.bench_search [--checks 100000] [--samples 50]
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.synthetic import create_database
+from benchmarks.timing import format_table, sample, summarize
+from db.search import search_checks, search_checks_like
+
+# As typed, one keystroke at a time, by someone looking for damaged items
+QUERIES = ["w", "wa", "wat", "water", "water dam", "water damaged", "kitchen burn", "restock"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_database(os.path.join(tmp, "bench.db"), args.checks)
+        item_rows = conn.execute("SELECT COUNT(*) FROM check_items").fetchone()[0]
+        args_list = [(query,) for query in QUERIES] * (args.samples // len(QUERIES) + 1)
+
+        rows = [
+            ("FTS5 first page", summarize(sample(lambda q: search_checks(conn, q), args_list))),
+            ("FTS5 page 5", summarize(sample(lambda q: search_checks(conn, q, offset=120), args_list))),
+            ("LIKE scan first page", summarize(sample(lambda q: search_checks_like(conn, q), args_list[:len(QUERIES)]))),
+        ]
+        conn.close()
+
+    print(f"{args.checks} checks, {item_rows} item rows")
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Database size before and after normalizing check_items (migration 6).
+
+Usage: python -m benchmarks.bench_storage [--checks 100000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import create_database
+from db import maintenance, repository
+
+# Last schema with one text row per item name
+BEFORE_VERSION = 5
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Seeding {args.checks} checks (schema v{BEFORE_VERSION})...")
+        conn = create_database(path, args.checks, schema_version=BEFORE_VERSION)
+        conn.execute("VACUUM")
+        before_items = conn.execute(
+            "SELECT item_name, current_quantity, expiry_date FROM check_items "
+            "WHERE check_id = 1 ORDER BY item_name"
+        ).fetchall()
+
+        start = time.perf_counter()
+        report = maintenance.upgrade(conn)
+        seconds = time.perf_counter() - start
+        after_items = [
+            (name, current_qty, expiry_date)
+            for name, _, current_qty, expiry_date, _ in repository.get_check_items(conn, 1)
+        ]
+        file_size = os.path.getsize(path)
+        conn.close()
+
+    before, after = report["size_before"], report["size_after"]
+    print(f"Migration v{report['from_version']} -> v{report['to_version']} "
+          f"with VACUUM: {seconds:.1f} s")
+    print(f"{'':<10}{'size':>12}{'per check':>12}")
+    for label, size in (("before", before), ("after", after)):
+        print(f"{label:<10}{maintenance.format_size(size):>12}{size / args.checks:>10.0f} B")
+    print(f"change: {(after - before) / before:+.1%} (file on disk {maintenance.format_size(file_size)})")
+    print("check 1 unchanged:", before_items == after_items)
+
+
+if __name__ == "__main__":
+    main()
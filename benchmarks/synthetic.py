@@ -0,0 +1,123 @@
+"""Seed synthetic first aid check databases for benchmarking."""
+import random
+import sqlite3
+from datetime import date, timedelta
+
+from db.catalog import add_box_type, add_boxes
+from db.dates import to_day
+from db.migrations import migrate
+from db.repository import STATUS_FLAGS_SQL
+
+ITEM_NAMES = [f"Synthetic Item {n}" for n in range(9)]
+START_DATE = date(2010, 1, 1)
+ITEM_NOTES = [
+    "packaging damaged",
+    "water damaged, replaced",
+    "used on a burn in the kitchen",
+    "missing from box",
+    "box lid cracked",
+    "expiring soon, reorder",
+]
+
+
+def box_names(count):
+    return [f"Box {n:03d}" for n in range(count)]
+
+
+def has_item_ids(conn):
+    """Whether check_items has the normalized layout of migration 6."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(check_items)")]
+    return "item_id" in columns
+
+
+def has_check_days(conn):
+    """Whether first_aid_checks stores day numbers, as from migration 14."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(first_aid_checks)")]
+    return "check_day" in columns
+
+
+def seed_catalog(conn, names):
+    """Register the synthetic boxes under a box type holding ITEM_NAMES.
+
+    Returns {item_name: item_id}.
+    """
+    if conn.execute("SELECT 1 FROM box_types WHERE name = 'Synthetic'").fetchone() is None:
+        add_box_type(conn, "Synthetic", [(name, 4) for name in ITEM_NAMES])
+    add_boxes(conn, names, box_type="Synthetic")
+    conn.commit()
+    return dict(conn.execute(
+        f"SELECT name, id FROM items WHERE name IN ({', '.join('?' for _ in ITEM_NAMES)})",
+        ITEM_NAMES,
+    ).fetchall())
+
+
+def seed(conn, checks, boxes=50, seed_value=1234, batch_size=10000, item_notes_rate=0.05):
+    """Insert ``checks`` random checks with one row per item in ITEM_NAMES.
+
+    About ``item_notes_rate`` of item rows get a note from ITEM_NOTES.
+    Works with both the original and the normalized check_items layout,
+    and with text dates or day numbers.
+    """
+    rng = random.Random(seed_value)
+    names = box_names(boxes)
+    item_ids = seed_catalog(conn, names) if has_item_ids(conn) else None
+    check_days = has_check_days(conn)
+    span_days = 15 * 365
+
+    next_id = first_id = (conn.execute("SELECT COALESCE(MAX(id), 0) FROM first_aid_checks").fetchone()[0]) + 1
+    remaining = checks
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        check_rows = []
+        item_rows = []
+        for check_id in range(next_id, next_id + batch):
+            check_date = (START_DATE + timedelta(days=rng.randrange(span_days))).isoformat()
+            notes = "Restocked plasters" if rng.random() < 0.1 else ""
+            check_rows.append((check_id, rng.choice(names), check_date, notes))
+            for item_name in ITEM_NAMES:
+                expiry = START_DATE + timedelta(days=rng.randrange(span_days + 1000))
+                item_notes = rng.choice(ITEM_NOTES) if rng.random() < item_notes_rate else ""
+                item_rows.append((check_id, item_name, 4, rng.randrange(8), expiry.isoformat(), item_notes))
+        if check_days:
+            conn.executemany(
+                "INSERT INTO first_aid_checks (id, box_name, check_day, general_notes) VALUES (?, ?, ?, ?)",
+                [(check_id, box_name, to_day(day), notes) for check_id, box_name, day, notes in check_rows],
+            )
+        else:
+            conn.executemany(
+                "INSERT INTO first_aid_checks (id, box_name, check_date, general_notes) VALUES (?, ?, ?, ?)",
+                check_rows,
+            )
+        if item_ids is None:
+            conn.executemany(
+                """
+                INSERT INTO check_items (check_id, item_name, standard_quantity, current_quantity, expiry_date, item_notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                item_rows,
+            )
+        else:
+            conn.executemany(
+                """
+                INSERT INTO check_items (check_id, item_id, standard_quantity, current_quantity, expiry_day, item_notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (check_id, item_ids[item_name], standard_qty, current_qty, to_day(expiry), item_notes)
+                    for check_id, item_name, standard_qty, current_qty, expiry, item_notes in item_rows
+                ],
+            )
+        conn.commit()
+        next_id += batch
+        remaining -= batch
+    if check_days:
+        conn.execute(f"UPDATE first_aid_checks SET status_flags = {STATUS_FLAGS_SQL} WHERE id >= ?", (first_id,))
+        conn.commit()
+
+
+def create_database(path, checks, schema_version=None, **seed_kwargs):
+    """Create a seeded database at ``path`` (``":memory:"`` is fine)."""
+    conn = sqlite3.connect(path)
+    migrate(conn, schema_version)
+    seed(conn, checks, **seed_kwargs)
+    return conn
@@ -0,0 +1,39 @@
+"""Latency sampling and percentile reporting helpers."""
+import time
+
+PERCENTILES = (50, 90, 99)
+
+
+def sample(fn, args_list):
+    """Call ``fn(*args)`` for each args tuple and return latencies in ms."""
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies):
+    """Return {"p50": ..., "p90": ..., "p99": ..., "max": ...} in ms."""
+    ordered = sorted(latencies)
+    summary = {f"p{pct}": percentile(ordered, pct) for pct in PERCENTILES}
+    summary["max"] = ordered[-1] if ordered else 0.0
+    return summary
+
+
+def format_table(rows):
+    """Format (label, summary) pairs as a fixed-width table."""
+    columns = [f"p{pct}" for pct in PERCENTILES] + ["max"]
+    lines = [f"{'operation':<28}" + "".join(f"{c + ' (ms)':>12}" for c in columns)]
+    for label, summary in rows:
+        lines.append(f"{label:<28}" + "".join(f"{summary[c]:>12.3f}" for c in columns))
+    return "\n".join(lines)
@@ -5,6 +5,7 @@ package.name = bibletextconverter
 package.domain = org.example
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas
+source.exclude_dirs = benchmarks, tests
 version = 1.0
 requirements = python3,kivy
 orientation = portrait
@@ -0,0 +1,410 @@
+"""Headless command-line tools for the First Aid Stock database.
+
+Only sqlite3 and the db package are imported, never Kivy, so this starts
+in a few tens of milliseconds; "python main.py COMMAND ..." runs it too.
+
+Usage: python cli.py [--db PATH] [--csv] summary
+       python cli.py [--db PATH] [--csv] overdue [--days N]
+       python cli.py [--db PATH] [--csv] low-stock
+       python cli.py [--db PATH] [--csv] expiring [--days N]
+       python cli.py [--db PATH] [--csv] fleet [--days N] [--rebuild]
+       python cli.py [--db PATH] [--csv] restock [--days N]
+       python cli.py [--db PATH] [--csv] forecast [--rebuild]
+       python cli.py [--db PATH] integrity
+       python cli.py [--db PATH] export {csv,jsonl} OUTPUT
+       python cli.py [--db PATH] import {csv,jsonl,json} INPUT [--rejects FILE]
+       python cli.py [--db PATH] migrate [--no-vacuum]
+       python cli.py [--db PATH] archive [--months N]
+       python cli.py [--db PATH] sync-status
+       python cli.py [--db PATH] sync-export OUTPUT [--peer DEVICE]
+       python cli.py [--db PATH] sync-import INPUT
+       python cli.py [--db PATH] sync-serve --token TOKEN [--host HOST] [--port PORT]
+       python cli.py [--db PATH] sync-pull URL --token TOKEN
+
+Any command takes --trace FILE to write its SQL timings as a Chrome trace.
+"""
+import argparse
+import csv
+import sqlite3
+import sys
+
+from db import analytics, changes, dates, export, fleet, importer, maintenance, reports, retention, status, sync
+from db.connection import DATABASE_PATH, connect
+from db.migrations import SCHEMA_VERSION, get_schema_version
+from db.tracing import tracer
+
+COMMANDS = {
+    "summary", "overdue", "low-stock", "expiring", "fleet", "restock", "forecast", "integrity",
+    "export", "import", "migrate", "archive",
+    "sync-status", "sync-export", "sync-import", "sync-serve", "sync-pull",
+}
+# Commands that write to the database; the rest use a read-only connection
+WRITE_COMMANDS = {"expiring", "fleet", "forecast", "import", "archive", "sync-import", "sync-serve", "sync-pull"}
+# Commands given a plain writable connection, before any migration
+UNMIGRATED_COMMANDS = {"migrate"}
+# Read-only commands that run on any schema version; the rest need migrate first
+ANY_SCHEMA_COMMANDS = {"integrity"}
+
+
+def print_progress(rows_written, rows_per_second):
+    print(f"\r{rows_written} rows ({rows_per_second:.0f} rows/s)", end="", file=sys.stderr)
+
+
+def print_rows(args, header, rows):
+    """Print report rows as an aligned table, or as CSV with --csv."""
+    if args.csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(header)
+        writer.writerows(rows)
+        return
+    if not rows:
+        print("Nothing to report")
+        return
+    text_rows = [["" if value is None else str(value) for value in row] for row in rows]
+    widths = [max(len(str(name)), *(len(row[i]) for row in text_rows)) for i, name in enumerate(header)]
+    print("  ".join(f"{name:<{width}}" for name, width in zip(header, widths)).rstrip())
+    for row in text_rows:
+        print("  ".join(f"{value:<{width}}" for value, width in zip(row, widths)).rstrip())
+
+
+def cmd_summary(conn, args):
+    counts = reports.summary(conn)
+    rows = [
+        ("checks", counts["checks"]),
+        ("archived checks", counts["archived_checks"]),
+        ("boxes", counts["boxes"]),
+        ("boxes checked", counts["boxes_checked"]),
+        ("last check", counts["last_check_date"]),
+    ]
+    rows += [
+        (f"{name.lower()} items", counts[name])
+        for name in (status.LOW_STOCK, status.OVERSTOCK, status.EXPIRED, status.EXPIRING_SOON)
+    ]
+    print_rows(args, ("metric", "value"), rows)
+
+
+def cmd_overdue(conn, args):
+    rows = [
+        (box_name, check_date or "never", "" if days is None else days)
+        for box_name, check_date, days in reports.overdue_boxes(conn, args.days)
+    ]
+    print_rows(args, ("box", "last check", "days since"), rows)
+
+
+def cmd_low_stock(conn, args):
+    rows = [
+        (box_name, check_date, item_name, standard_qty, current_qty, standard_qty - current_qty)
+        for box_name, check_date, item_name, standard_qty, current_qty in reports.low_stock(conn)
+    ]
+    print_rows(args, ("box", "checked", "item", "standard", "current", "short"), rows)
+
+
+def cmd_expiring(conn, args):
+    print_rows(
+        args, ("box", "item", "expiry", "status", "days left"),
+        [
+            (box_name, item_name, dates.from_day(expiry_day), expiry or status.OK, days_left)
+            for expiry_day, box_name, item_name, _, expiry, days_left
+            in fleet.update_and_expiring(conn, args.days)
+        ],
+    )
+
+
+def cmd_fleet(conn, args):
+    if args.rebuild:
+        print(f"Rebuilt status of {fleet.rebuild(conn)} boxes", file=sys.stderr)
+    rows = [
+        (box["box_name"], box["check_date"] or "never",
+         "" if box["days_since"] is None else box["days_since"],
+         box["low_stock"], box["expired"], dates.from_day(box["earliest_expiry"]),
+         ", ".join(flag for flag, on in (
+             ("overdue", box["overdue"]),
+             ("low", box["low_stock"]),
+             ("expired", box["expired_since"]),
+         ) if on))
+        for box in fleet.update_and_status(conn, args.days)
+    ]
+    print_rows(args, ("box", "last check", "days ago", "low", "expired", "earliest expiry", "attention"), rows)
+
+
+def cmd_restock(conn, args):
+    print_rows(
+        args, ("item", "to order", "short", "expiring", "boxes"),
+        reports.restock_list(conn, args.days),
+    )
+
+
+def cmd_forecast(conn, args):
+    if args.rebuild:
+        print(f"Rebuilt consumption totals for {analytics.rebuild_all(conn)} boxes", file=sys.stderr)
+    else:
+        analytics.update(conn)
+    rows = [
+        (box_name, item_name, standard_qty, last_qty, dates.from_day(last_day),
+         "" if rate is None else f"{rate:.1f}",
+         dates.from_day(below_day))
+        for box_name, item_name, standard_qty, last_qty, last_day, rate, below_day
+        in analytics.forecast(conn)
+    ]
+    print_rows(
+        args, ("box", "item", "standard", "last count", "counted",
+               f"used per {analytics.RATE_PERIOD_DAYS} days", "below standard by"),
+        rows,
+    )
+
+
+def cmd_integrity(conn, args):
+    problems = reports.integrity_problems(conn)
+    for problem in problems:
+        print(problem)
+    if problems:
+        return 1
+    print("ok")
+
+
+def cmd_export(conn, args):
+    output = sys.stdout if args.output == "-" else None
+    if output:
+        rows = export.write_history(conn, output, args.format)
+    else:
+        rows = export.export_history(conn, args.output, args.format, progress=print_progress)
+        print(file=sys.stderr)
+    print(f"Exported {rows} rows", file=sys.stderr)
+
+
+def cmd_import(conn, args):
+    result = importer.import_file(
+        conn, args.input, args.format,
+        progress=lambda rows: print(f"\r{rows} rows read", end="", file=sys.stderr),
+    )
+    print(file=sys.stderr)
+    rejected = result["rejected"]
+    print(f"Imported {result['checks']} checks with {result['items']} items; "
+          f"rejected {len(rejected)} rows")
+    for row_number, reason in rejected[:20]:
+        print(f"  row {row_number}: {reason}")
+    if len(rejected) > 20:
+        print(f"  ... and {len(rejected) - 20} more")
+    if args.rejects:
+        with open(args.rejects, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(("row", "reason"))
+            writer.writerows(rejected)
+
+
+def cmd_migrate(conn, args):
+    report = maintenance.upgrade(conn, vacuum=not args.no_vacuum)
+    if not report["applied"]:
+        print(f"Schema is current (version {report['to_version']})")
+        return
+    print(f"Schema version {report['from_version']} -> {report['to_version']}")
+    before, after = report["size_before"], report["size_after"]
+    print(f"Size before: {maintenance.format_size(before)}")
+    print(f"Size after:  {maintenance.format_size(after)} "
+          f"({maintenance.format_size(report['free_after'])} free pages)")
+    if before:
+        print(f"Change:      {(after - before) / before:+.1%}")
+
+
+def cmd_archive(conn, args):
+    cutoff = retention.cutoff_date(args.months)
+    size_before, _ = maintenance.database_size(conn)
+    archived = 0
+    while True:
+        count = retention.archive_step(conn, cutoff)
+        if not count:
+            break
+        archived += count
+        print(f"\r{archived} checks archived", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    while retention.vacuum_step(conn):
+        pass
+    size_after, _ = maintenance.database_size(conn)
+    print(f"Archived {archived} checks dated before {cutoff}")
+    print(f"Size: {maintenance.format_size(size_before)} -> {maintenance.format_size(size_after)}")
+
+
+def print_sync_result(result):
+    print(f"Applied {result['applied']} checks, deleted {result['deleted']}, "
+          f"skipped {result['skipped']} older or archived")
+
+
+def cmd_sync_status(conn, args):
+    print(f"Device {sync.device_id(conn)}, change log at seq {changes.current_version(conn)}")
+    print_rows(args, ("peer", "acked seq", "received seq", "last sync"), sync.list_peers(conn))
+
+
+def cmd_sync_export(conn, args):
+    bundle = sync.build_bundle(conn, args.peer)
+    size = sync.write_bundle(bundle, args.output)
+    print(f"Wrote {len(bundle['checks'])} changed checks since seq {bundle['since']} "
+          f"({maintenance.format_size(size)}) to {args.output}")
+
+
+def cmd_sync_import(conn, args):
+    bundle = sync.read_bundle(args.input)
+    print_sync_result(sync.apply_bundle(conn, bundle))
+    print(f"Send 'sync-export OUTPUT --peer {bundle['device']}' back to acknowledge it")
+
+
+def cmd_sync_serve(conn, args):
+    server = sync.make_server(conn, args.token, args.host, args.port)
+    print(f"Device {sync.device_id(conn)} serving sync on {args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def cmd_sync_pull(conn, args):
+    result = sync.sync_with_server(conn, args.url, args.token)
+    print_sync_result(result)
+    print(f"Sent {result['sent']} changed checks; {maintenance.format_size(result['bytes_sent'])} up, "
+          f"{maintenance.format_size(result['bytes_received'])} down")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="First Aid Stock database tools")
+    parser.add_argument("--db", default=DATABASE_PATH, help=f"database file (default {DATABASE_PATH})")
+    parser.add_argument("--trace", help="write a Chrome trace of the SQL statements to this file")
+    parser.add_argument("--csv", action="store_true", help="print reports as CSV")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = commands.add_parser("summary", help="counts over the database and latest checks")
+    summary_parser.set_defaults(handler=cmd_summary)
+
+    overdue_parser = commands.add_parser("overdue", help="boxes not checked recently")
+    overdue_parser.add_argument("--days", type=int, default=reports.OVERDUE_DAYS,
+                                help=f"overdue after this many days (default {reports.OVERDUE_DAYS})")
+    overdue_parser.set_defaults(handler=cmd_overdue)
+
+    low_stock_parser = commands.add_parser("low-stock", help="LOW STOCK items in each box's latest check")
+    low_stock_parser.set_defaults(handler=cmd_low_stock)
+
+    expiring_parser = commands.add_parser("expiring", help="expired and expiring items in latest checks")
+    expiring_parser.add_argument("--days", type=int, default=status.EXPIRING_SOON_DAYS,
+                                 help=f"horizon in days (default {status.EXPIRING_SOON_DAYS})")
+    expiring_parser.set_defaults(handler=cmd_expiring)
+
+    fleet_parser = commands.add_parser("fleet", help="latest check status of every box")
+    fleet_parser.add_argument("--days", type=int, default=reports.OVERDUE_DAYS,
+                              help=f"overdue after this many days (default {reports.OVERDUE_DAYS})")
+    fleet_parser.add_argument("--rebuild", action="store_true",
+                              help="regenerate the status table from the full history first")
+    fleet_parser.set_defaults(handler=cmd_fleet)
+
+    restock_parser = commands.add_parser("restock", help="what to order to bring every box to standard")
+    restock_parser.add_argument("--days", type=int, default=status.EXPIRING_SOON_DAYS,
+                                help="also replace items expiring within this many days "
+                                     f"(default {status.EXPIRING_SOON_DAYS})")
+    restock_parser.set_defaults(handler=cmd_restock)
+
+    forecast_parser = commands.add_parser("forecast", help="consumption rates and restock forecasts")
+    forecast_parser.add_argument("--rebuild", action="store_true",
+                                 help="recompute the totals from the full history first")
+    forecast_parser.set_defaults(handler=cmd_forecast)
+
+    integrity_parser = commands.add_parser("integrity", help="check the file, foreign keys and schema")
+    integrity_parser.set_defaults(handler=cmd_integrity)
+
+    export_parser = commands.add_parser("export", help="stream the full check history")
+    export_parser.add_argument("format", choices=sorted(export.FORMATS))
+    export_parser.add_argument("output", help="output file, or - for stdout")
+    export_parser.set_defaults(handler=cmd_export)
+
+    import_parser = commands.add_parser("import", help="bulk import historical checks")
+    import_parser.add_argument("format", choices=["csv", "json", "jsonl"])
+    import_parser.add_argument("input", help="file using the export columns")
+    import_parser.add_argument("--rejects", help="write rejected rows and reasons to this CSV")
+    import_parser.set_defaults(handler=cmd_import)
+
+    migrate_parser = commands.add_parser("migrate", help="upgrade the schema and report the size change")
+    migrate_parser.add_argument("--no-vacuum", action="store_true",
+                                help="keep freed pages in the file instead of running VACUUM")
+    migrate_parser.set_defaults(handler=cmd_migrate)
+
+    archive_parser = commands.add_parser("archive", help="archive checks past the retention period")
+    archive_parser.add_argument("--months", type=int, default=24,
+                                help="archive checks older than this many months (default 24)")
+    archive_parser.set_defaults(handler=cmd_archive)
+
+    status_parser = commands.add_parser("sync-status", help="show this device's id and its sync peers")
+    status_parser.set_defaults(handler=cmd_sync_status)
+
+    sync_export_parser = commands.add_parser("sync-export", help="write a bundle of changes for a peer")
+    sync_export_parser.add_argument("output", help="bundle file to write")
+    sync_export_parser.add_argument("--peer", help="device id of the receiver; omit to include every change")
+    sync_export_parser.set_defaults(handler=cmd_sync_export)
+
+    sync_import_parser = commands.add_parser("sync-import", help="apply a bundle from another device")
+    sync_import_parser.add_argument("input", help="bundle file to read")
+    sync_import_parser.set_defaults(handler=cmd_sync_import)
+
+    serve_parser = commands.add_parser("sync-serve", help="serve sync requests over HTTP")
+    serve_parser.add_argument("--token", required=True, help="secret shared with the devices syncing here")
+    serve_parser.add_argument("--host", default="127.0.0.1",
+                              help="address to listen on; 0.0.0.0 for every interface (default 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=sync.SYNC_PORT)
+    serve_parser.set_defaults(handler=cmd_sync_serve)
+
+    pull_parser = commands.add_parser("sync-pull", help="exchange changes with a sync server")
+    pull_parser.add_argument("url", help=f"server address, e.g. http://192.168.1.10:{sync.SYNC_PORT}")
+    pull_parser.add_argument("--token", required=True, help="the server's shared secret")
+    pull_parser.set_defaults(handler=cmd_sync_pull)
+    return parser
+
+
+def open_readonly(args):
+    """Open the database for a read-only command, or return an error message."""
+    try:
+        conn = connect(args.db, readonly=True)
+        version = get_schema_version(conn)
+    except sqlite3.Error as e:
+        return None, f"Cannot open database {args.db}: {e}"
+    if version != SCHEMA_VERSION and args.command not in ANY_SCHEMA_COMMANDS:
+        conn.close()
+        if version > SCHEMA_VERSION:
+            return None, (f"Database {args.db} has schema version {version}, "
+                          f"newer than this tool ({SCHEMA_VERSION})")
+        return None, (f"Database {args.db} has schema version {version}, expected {SCHEMA_VERSION}; "
+                      f"run: python cli.py --db {args.db} migrate")
+    return conn, None
+
+
+def open_database(args):
+    """Open the database for ``args.command``, or return an error message.
+
+    Only migrate may create or upgrade a database. Every other command
+    first checks, read-only, that the file exists at the current schema
+    version; writing commands then get a writable connection.
+    """
+    if args.command in UNMIGRATED_COMMANDS:
+        return connect(args.db), None
+    conn, error = open_readonly(args)
+    if error or args.command not in WRITE_COMMANDS:
+        return conn, error
+    conn.close()
+    return connect(args.db), None
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    tracer.enabled = bool(args.trace)
+    conn, error = open_database(args)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    try:
+        result = args.handler(conn, args)
+    finally:
+        conn.close()
+        if args.trace:
+            events = tracer.export_chrome_trace(args.trace)
+            print(f"Wrote {events} trace events to {args.trace}", file=sys.stderr)
+    return result or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
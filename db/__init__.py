@@ -0,0 +1 @@
+"""Kivy-free data layer for the First Aid Stock Control app."""
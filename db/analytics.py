@@ -0,0 +1,210 @@
+"""Per-box, per-item consumption rates and restock forecasts.
+
+Consumption is read from successive checks of a box: when an item's
+count drops between two checks, the drop is taken as used over the days
+between them. Intervals where the count rose (the box was restocked) say
+nothing reliable about use and are skipped. item_consumption keeps the
+running totals (units used, days observed) and the last count of every
+item, so a forecast is a single read of that table.
+
+``update`` keeps the totals current from the change log (see
+db.changes). A check newer than everything seen for its box is folded in
+with one query; edits, deletes and back-dated checks recompute only that
+box. Archive moves leave the totals alone, and rebuilds read archived
+checks back out of check_archive.
+"""
+import math
+
+from db import dates, retention
+from db.catalog import catalog_cache
+from db.changes import current_version
+from db.repository import transaction
+
+# Forecasts and rates are shown per this many days
+RATE_PERIOD_DAYS = 30
+
+
+def watermark(conn):
+    return conn.execute("SELECT seq FROM consumption_state WHERE id = 1").fetchone()[0]
+
+
+def last_day(conn, box_name):
+    """Day number of the newest check folded in for a box, or None."""
+    return conn.execute(
+        "SELECT MAX(day) FROM consumption_checks WHERE box_name = ?", (box_name,)
+    ).fetchone()[0]
+
+
+def fold_check(conn, box_name, check_id, day, counts):
+    """Fold one check's (item_id, count) pairs into the running totals."""
+    previous = {
+        item_id: (prev_day, prev_qty)
+        for item_id, prev_day, prev_qty in conn.execute(
+            "SELECT item_id, last_day, last_qty FROM item_consumption WHERE box_name = ?",
+            (box_name,),
+        )
+    }
+    rows = []
+    for item_id, qty in counts:
+        used = days = 0
+        if item_id in previous:
+            prev_day, prev_qty = previous[item_id]
+            if day > prev_day and qty <= prev_qty:
+                used, days = prev_qty - qty, day - prev_day
+        rows.append((box_name, item_id, day, qty, used, days))
+    conn.executemany("""
+        INSERT INTO item_consumption (box_name, item_id, last_day, last_qty, used, days)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (box_name, item_id) DO UPDATE SET
+            last_day = excluded.last_day,
+            last_qty = excluded.last_qty,
+            used = used + excluded.used,
+            days = days + excluded.days
+    """, rows)
+    if check_id is not None:
+        conn.execute(
+            "INSERT OR REPLACE INTO consumption_checks (check_id, box_name, day) VALUES (?, ?, ?)",
+            (check_id, box_name, day),
+        )
+
+
+def live_check_counts(conn, check_id):
+    return conn.execute(
+        "SELECT item_id, current_quantity FROM check_items WHERE check_id = ?", (check_id,)
+    ).fetchall()
+
+
+def rebuild_box(conn, box_name):
+    """Recompute a box's totals from all of its checks, archived ones included."""
+    conn.execute("DELETE FROM item_consumption WHERE box_name = ?", (box_name,))
+    conn.execute("DELETE FROM consumption_checks WHERE box_name = ?", (box_name,))
+
+    checks = {} # (day, check_id, archived) -> [(item_id, count)]
+    item_ids = dict(conn.execute("SELECT name, id FROM items").fetchall())
+    for (blob,) in conn.execute("SELECT rows FROM check_archive WHERE box_name = ?", (box_name,)):
+        for check_id, check_date, _, items in retention.unpack_rows(blob):
+            day = dates.to_day(check_date)
+            if day is not None:
+                checks[(day, check_id, True)] = [
+                    (item_ids[item[0]], item[2]) for item in items if item[0] in item_ids
+                ]
+    for check_id, day, item_id, qty in conn.execute("""
+        SELECT c.id, c.check_day, ci.item_id, ci.current_quantity
+        FROM first_aid_checks c JOIN check_items ci ON ci.check_id = c.id
+        WHERE c.box_name = ?
+    """, (box_name,)):
+        checks.setdefault((day, check_id, False), []).append((item_id, qty))
+
+    for (day, check_id, archived), counts in sorted(checks.items()):
+        fold_check(conn, box_name, None if archived else check_id, day, counts)
+
+
+def rebuild_all(conn):
+    """Recompute every box from scratch; returns the number of boxes."""
+    with transaction(conn):
+        version = current_version(conn)
+        conn.execute("DELETE FROM item_consumption")
+        conn.execute("DELETE FROM consumption_checks")
+        boxes = [row[0] for row in conn.execute("""
+            SELECT DISTINCT box_name FROM first_aid_checks
+            UNION SELECT DISTINCT box_name FROM check_archive
+        """)]
+        for box_name in boxes:
+            rebuild_box(conn, box_name)
+        conn.execute("UPDATE consumption_state SET seq = ? WHERE id = 1", (version,))
+    return len(boxes)
+
+
+def update(conn):
+    """Bring the totals up to date with the change log.
+
+    Returns the number of checks looked at (boxes on the first, full
+    build); 0 when nothing changed, which costs two indexed lookups.
+    """
+    since = watermark(conn)
+    if since is None:
+        return rebuild_all(conn)
+    with transaction(conn):
+        version = current_version(conn)
+        if version == since:
+            return 0
+        changed = conn.execute("""
+            SELECT check_id, op FROM change_log
+            WHERE seq IN (SELECT MAX(seq) FROM change_log WHERE seq > ? GROUP BY check_id)
+        """, (since,)).fetchall()
+
+        rebuild = set()
+        new_checks = {} # box_name -> [(day, check_id)]
+        for check_id, op in changed:
+            if op == "A":
+                continue # Archived checks still count as history
+            known = conn.execute(
+                "SELECT box_name FROM consumption_checks WHERE check_id = ?", (check_id,)
+            ).fetchone()
+            if known:
+                rebuild.add(known[0])
+            if op == "D":
+                continue
+            row = conn.execute(
+                "SELECT box_name, check_day FROM first_aid_checks WHERE id = ?", (check_id,)
+            ).fetchone()
+            if row is None:
+                continue
+            if known:
+                rebuild.add(row[0])
+            else:
+                new_checks.setdefault(row[0], []).append((row[1], check_id))
+
+        for box_name, checks in new_checks.items():
+            if box_name in rebuild:
+                continue
+            checks.sort()
+            newest = last_day(conn, box_name)
+            if newest is not None and checks[0][0] < newest:
+                rebuild.add(box_name) # Back-dated: totals depend on order
+                continue
+            for day, check_id in checks:
+                fold_check(conn, box_name, check_id, day, live_check_counts(conn, check_id))
+        for box_name in rebuild:
+            rebuild_box(conn, box_name)
+        conn.execute("UPDATE consumption_state SET seq = ? WHERE id = 1", (version,))
+    return len(changed)
+
+
+def forecast(conn):
+    """Return forecast rows, soonest shortfall first.
+
+    Each row is (box_name, item_name, standard_qty, last_qty, last_day,
+    rate, below_day): ``rate`` is units used per RATE_PERIOD_DAYS (None
+    without usage data) and ``below_day`` the day number the count is
+    expected to fall below standard (None if it is not being used up).
+    Counts already below standard give ``last_day``.
+    """
+    catalog = catalog_cache.get(conn)
+    rows = []
+    for box_name, item_name, last_day_, last_qty, used, days in conn.execute("""
+        SELECT ic.box_name, i.name, ic.last_day, ic.last_qty, ic.used, ic.days
+        FROM item_consumption ic JOIN items i ON i.id = ic.item_id
+    """):
+        standard_qty = catalog.standard_quantities(box_name).get(item_name)
+        if standard_qty is None:
+            continue # No longer part of the box's standard contents
+        rate = used / days if days and used else None
+        if last_qty < standard_qty:
+            below_day = last_day_
+        elif rate:
+            below_day = last_day_ + math.ceil((last_qty - standard_qty + 1) / rate)
+        else:
+            below_day = None
+        rows.append((
+            box_name, item_name, standard_qty, last_qty, last_day_,
+            rate * RATE_PERIOD_DAYS if rate else None, below_day,
+        ))
+    rows.sort(key=lambda row: (row[6] is None, row[6] or 0, row[0], row[1]))
+    return rows
+
+
+def update_and_forecast(conn):
+    """Catch up with the change log, then return forecast(conn)."""
+    update(conn)
+    return forecast(conn)
@@ -0,0 +1,211 @@
+"""Box and item catalog: box types, their standard contents, and boxes.
+
+The catalog lives in the database (see migration 5). Reads go through
+``catalog_cache``, which keeps an immutable snapshot in memory and only
+reloads it when triggers have bumped ``catalog_state.version``, so a
+catalog change made from any connection or process invalidates it.
+"""
+import threading
+
+# Seed data for migration 5: the contents and boxes the app started with
+STANDARD_BOX_CONTENTS = {
+    "General First Aid Guidance Card": 1,
+    "Assorted Sterile Plasters": 20,
+    "Safety Pins": 6,
+    "Medium Sterile Dressing (12cm x 12cm)": 6,
+    "Large Sterile Dressing (18cm x 18cm)": 2,
+    "Sterile Eye Pad Dressing": 2,
+    "Sterile Saline Alcohol Free Cleansing Wipe": 6,
+    "Nitrile Examination Gloves - Large (Pair)": 4,
+    "Non Sterile Non Woven Triangular Bandage": 4,
+}
+DEFAULT_BOX_TYPE = "Standard"
+DEFAULT_BOXES = ["Back Kitchen", "Cafe", "Upstairs"]
+
+CATALOG_TABLES = ("box_types", "items", "box_type_items", "boxes")
+
+
+def create_catalog(conn):
+    """Create and seed the catalog tables, plus the triggers that bump
+    catalog_state.version on every change."""
+    statements = [
+        """
+        CREATE TABLE box_types (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE items (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE box_type_items (
+            box_type_id INTEGER NOT NULL REFERENCES box_types (id) ON DELETE CASCADE,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            standard_quantity INTEGER NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (box_type_id, item_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE boxes (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            site TEXT NOT NULL DEFAULT '',
+            box_type_id INTEGER NOT NULL REFERENCES box_types (id)
+        )
+        """,
+        "CREATE TABLE catalog_state (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+        "INSERT INTO catalog_state (id, version) VALUES (1, 0)",
+    ]
+    for table in CATALOG_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            statements.append(f"""
+                CREATE TRIGGER {table}_{event.lower()}_catalog_version AFTER {event} ON {table} BEGIN
+                    UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+                END
+            """)
+    for statement in statements:
+        conn.execute(statement)
+
+    box_type_id = conn.execute(
+        "INSERT INTO box_types (name) VALUES (?)", (DEFAULT_BOX_TYPE,)
+    ).lastrowid
+    set_box_type_contents(conn, box_type_id, list(STANDARD_BOX_CONTENTS.items()))
+    # Every box already named in the history joins the catalog too
+    conn.executemany(
+        "INSERT OR IGNORE INTO boxes (name, box_type_id) VALUES (?, ?)",
+        [(name, box_type_id) for name in DEFAULT_BOXES],
+    )
+    conn.execute("""
+        INSERT OR IGNORE INTO boxes (name, box_type_id)
+        SELECT DISTINCT box_name, ? FROM first_aid_checks
+    """, (box_type_id,))
+
+
+def item_id_for(conn, item_name):
+    """Return the id for ``item_name``, adding it to items if needed."""
+    conn.execute("INSERT OR IGNORE INTO items (name) VALUES (?)", (item_name,))
+    return conn.execute("SELECT id FROM items WHERE name = ?", (item_name,)).fetchone()[0]
+
+
+def set_box_type_contents(conn, box_type_id, contents):
+    """Replace a box type's standard contents with (item_name, qty) pairs."""
+    conn.execute("DELETE FROM box_type_items WHERE box_type_id = ?", (box_type_id,))
+    conn.executemany("""
+        INSERT INTO box_type_items (box_type_id, item_id, standard_quantity, position)
+        VALUES (?, ?, ?, ?)
+    """, [
+        (box_type_id, item_id_for(conn, item_name), quantity, position)
+        for position, (item_name, quantity) in enumerate(contents)
+    ])
+
+
+def add_box_type(conn, name, contents):
+    """Add a box type with (item_name, qty) standard contents; returns its id."""
+    box_type_id = conn.execute("INSERT INTO box_types (name) VALUES (?)", (name,)).lastrowid
+    set_box_type_contents(conn, box_type_id, contents)
+    return box_type_id
+
+
+def add_boxes(conn, names, box_type=DEFAULT_BOX_TYPE, site=""):
+    """Add boxes of ``box_type``; names already in the catalog are skipped."""
+    row = conn.execute("SELECT id FROM box_types WHERE name = ?", (box_type,)).fetchone()
+    if row is None:
+        raise ValueError(f"Unknown box type {box_type}!")
+    conn.executemany(
+        "INSERT OR IGNORE INTO boxes (name, site, box_type_id) VALUES (?, ?, ?)",
+        [(name, site, row[0]) for name in names],
+    )
+
+
+class Catalog:
+    """Immutable in-memory snapshot of the catalog."""
+
+    def __init__(self, version, boxes, contents_by_type, default_type_id):
+        self.version = version
+        # (name, site, box_type_id), sorted by name
+        self.boxes = boxes
+        self.box_names = [name for name, _, _ in boxes]
+        self.box_type_by_name = {name: box_type_id for name, _, box_type_id in boxes}
+        self.contents_by_type = contents_by_type
+        self.quantities_by_type = {
+            box_type_id: dict(contents) for box_type_id, contents in contents_by_type.items()
+        }
+        self.default_type_id = default_type_id
+        # Lower-cased "name site" strings for substring search
+        self.search_keys = [f"{name} {site}".lower() for name, site, _ in boxes]
+
+    def standard_contents(self, box_name):
+        """Return [(item_name, standard_qty), ...] for a box, in form order.
+
+        Boxes missing from the catalog get the default box type's contents.
+        """
+        box_type_id = self.box_type_by_name.get(box_name, self.default_type_id)
+        return self.contents_by_type.get(box_type_id, [])
+
+    def standard_quantities(self, box_name):
+        """Return {item_name: standard_qty} for a box."""
+        box_type_id = self.box_type_by_name.get(box_name, self.default_type_id)
+        return self.quantities_by_type.get(box_type_id, {})
+
+    def search(self, text, within=None):
+        """Return indexes into ``boxes`` whose name or site contains ``text``.
+
+        Pass the previous result as ``within`` when the text only grew, so
+        each keystroke filters a shrinking list.
+        """
+        text = text.strip().lower()
+        candidates = range(len(self.boxes)) if within is None else within
+        if not text:
+            return list(candidates)
+        keys = self.search_keys
+        return [index for index in candidates if text in keys[index]]
+
+
+def load_catalog(conn):
+    """Read the whole catalog into a Catalog snapshot."""
+    version = conn.execute("SELECT version FROM catalog_state WHERE id = 1").fetchone()[0]
+    boxes = conn.execute(
+        "SELECT name, site, box_type_id FROM boxes ORDER BY name COLLATE NOCASE"
+    ).fetchall()
+    contents_by_type = {}
+    for box_type_id, item_name, quantity in conn.execute("""
+        SELECT bti.box_type_id, i.name, bti.standard_quantity
+        FROM box_type_items bti JOIN items i ON i.id = bti.item_id
+        ORDER BY bti.box_type_id, bti.position
+    """):
+        contents_by_type.setdefault(box_type_id, []).append((item_name, quantity))
+    default = conn.execute(
+        "SELECT id FROM box_types WHERE name = ?", (DEFAULT_BOX_TYPE,)
+    ).fetchone()
+    return Catalog(version, boxes, contents_by_type, default[0] if default else None)
+
+
+class CatalogCache:
+    """Thread-safe read-through cache of the catalog snapshot."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.catalog = None
+
+    def get(self, conn):
+        """Return the current snapshot, reloading it if the catalog changed."""
+        version = conn.execute("SELECT version FROM catalog_state WHERE id = 1").fetchone()[0]
+        with self.lock:
+            if self.catalog is not None and self.catalog.version == version:
+                return self.catalog
+        catalog = load_catalog(conn)
+        with self.lock:
+            self.catalog = catalog
+        return catalog
+
+    def invalidate(self):
+        with self.lock:
+            self.catalog = None
+
+
+catalog_cache = CatalogCache()
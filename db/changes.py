@@ -0,0 +1,80 @@
+"""Change tracking for screens that cache query results.
+
+Every mutation of a check or its items appends to change_log (see
+migration 9), so ``MAX(seq)`` is a change counter that only grows and
+works across connections and processes. A screen remembers the seq its
+data was read at and later asks for the checks changed since. Sync (see
+db.sync) ships the same log to other devices.
+"""
+from contextlib import contextmanager
+
+from db.repository import get_history_rows
+
+# Past this many changed checks a screen reloads rather than patching
+MAX_PATCHED_CHECKS = 200
+
+
+def current_version(conn):
+    """The latest change seq; 0 before any change."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def changed_checks(conn, since, limit=MAX_PATCHED_CHECKS):
+    """Return the ids of checks changed after seq ``since``, or None when
+    there are more than ``limit`` of them."""
+    check_ids = [row[0] for row in conn.execute(
+        "SELECT DISTINCT check_id FROM change_log WHERE seq > ? LIMIT ?",
+        (since, limit + 1),
+    )]
+    return None if len(check_ids) > limit else check_ids
+
+
+def check_changed(conn, check_id, since):
+    """Whether ``check_id`` changed after seq ``since``."""
+    return conn.execute(
+        "SELECT 1 FROM change_log WHERE check_id = ? AND seq > ? LIMIT 1",
+        (check_id, since),
+    ).fetchone() is not None
+
+
+def versioned(conn, fn, *args, **kwargs):
+    """Return (version, fn(conn, ...)), the version read first.
+
+    A change committed in between shows up again at the next refresh, and
+    applying it twice is harmless.
+    """
+    version = current_version(conn)
+    return version, fn(conn, *args, **kwargs)
+
+
+def history_changes(conn, since):
+    """Return (version, rows, removed_ids) for the history list since seq ``since``.
+
+    ``rows`` are history rows (see repository.get_history_page) of checks
+    inserted or updated, archived ones included; ``removed_ids`` are checks
+    that no longer exist. Returns None when so much changed that reloading
+    the list is cheaper.
+    """
+    version = current_version(conn)
+    if version == since:
+        return version, [], []
+    check_ids = changed_checks(conn, since)
+    if check_ids is None:
+        return None
+    rows = get_history_rows(conn, check_ids)
+    found = {row[0] for row in rows}
+    return version, rows, [check_id for check_id in check_ids if check_id not in found]
+
+
+@contextmanager
+def archiving(conn):
+    """Log deletes in the enclosed block as archived ('A'), not deleted.
+
+    Archiving only moves checks into check_archive, so sync must not pass
+    these deletes on to other devices. Use inside a transaction.
+    """
+    conn.execute("UPDATE sync_state SET archiving = 1 WHERE id = 1")
+    try:
+        yield
+    finally:
+        conn.execute("UPDATE sync_state SET archiving = 0 WHERE id = 1")
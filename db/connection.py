@@ -0,0 +1,178 @@
+"""Open tuned SQLite connections for the app.
+
+The app uses one writer connection and one read-only reader connection,
+each owned by its own DatabaseWorker thread. WAL lets reads on the reader
+proceed while the writer is committing.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from db.migrations import VACUUM_AFTER, migrate
+from db.tracing import SQL, statement_name, tracer
+
+DATABASE_PATH = os.path.join("database", "first_aid_stock.db")
+
+# Number of prepared statements sqlite3 keeps per connection
+STATEMENT_CACHE_SIZE = 64
+
+# Applied to every connection, in order
+PRAGMAS = [
+    # In WAL mode NORMAL cannot corrupt the database; a power cut may only
+    # lose the last commits, and it skips an fsync per transaction
+    ("synchronous", "NORMAL"),
+    # Negative values are KiB: 8 MB page cache
+    ("cache_size", -8192),
+    ("mmap_size", 32 * 1024 * 1024),
+    ("foreign_keys", "ON"),
+]
+
+
+class StatementCacheStats:
+    """Mirrors sqlite3's per-connection LRU statement cache to count hits.
+
+    sqlite3 does not expose its cache, so this keeps an LRU of the same size
+    keyed on the SQL text, which is exactly how sqlite3 looks statements up.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.recent = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, sql):
+        if sql in self.recent:
+            self.recent.move_to_end(sql)
+            self.hits += 1
+            return
+        self.misses += 1
+        self.recent[sql] = None
+        if len(self.recent) > self.size:
+            self.recent.popitem(last=False)
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached": len(self.recent),
+        }
+
+
+class TrackedConnection(sqlite3.Connection):
+    """Connection that records statement cache hits for execute calls and
+    times each statement into the tracer.
+
+    For a SELECT the time covers preparing it and stepping to the first
+    row; fetching the rest shows up in the enclosing db-task event.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_stats = StatementCacheStats(kwargs.get("cached_statements", 128))
+        self.statement_names = {}
+
+    def trace(self, sql, start):
+        name = self.statement_names.get(sql)
+        if name is None:
+            if len(self.statement_names) >= STATEMENT_CACHE_SIZE * 4:
+                self.statement_names.clear()
+            name = self.statement_names[sql] = statement_name(sql)
+        tracer.add(name, SQL, start, time.perf_counter() - start)
+
+    def execute(self, sql, parameters=()):
+        self.statement_stats.record(sql)
+        if not tracer.enabled:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.trace(sql, start)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.statement_stats.record(sql)
+        if not tracer.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.trace(sql, start)
+
+
+def connect(path=DATABASE_PATH, readonly=False):
+    """Open a connection with the app PRAGMAs applied.
+
+    Only writable connections switch the file to WAL; the journal mode is
+    persistent, so readers (and tools run against copied databases) leave
+    the file as they found it. A read-only connection opens the file with
+    mode=ro, so a missing file raises sqlite3.OperationalError instead of
+    being created empty.
+    """
+    if readonly:
+        path, uri = Path(path).resolve().as_uri() + "?mode=ro", True
+    else:
+        uri = False
+    conn = sqlite3.connect(
+        path,
+        factory=TrackedConnection,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        uri=uri,
+    )
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        # Applies to new files at once and to existing ones at the next
+        # VACUUM; lets the retention policy shrink the file in small steps
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class ConnectionManager:
+    """Creates the writer and reader connections for one database file.
+
+    ``open_writer`` and ``open_reader`` are meant to be passed as the
+    ``connect`` callable of a DatabaseWorker. The reader waits until the
+    writer has brought the schema up to date.
+    """
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        self.schema_ready = threading.Event()
+        self.connections = {}
+
+    def open_writer(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = connect(self.path)
+            if VACUUM_AFTER.intersection(migrate(conn)):
+                conn.execute("VACUUM")
+        finally:
+            # Readers get their own error if the writer could not open
+            self.schema_ready.set()
+        self.connections["writer"] = conn
+        return conn
+
+    def open_reader(self):
+        self.schema_ready.wait()
+        conn = connect(self.path, readonly=True)
+        self.connections["reader"] = conn
+        return conn
+
+    def statement_cache_stats(self):
+        """Return {"writer": {...}, "reader": {...}} cache counters."""
+        return {
+            role: conn.statement_stats.as_dict()
+            for role, conn in self.connections.items()
+        }
@@ -0,0 +1,42 @@
+"""Dates stored as integer day numbers (days since 1970-01-01).
+
+A day number takes at most 3 bytes in a record against 10 for the
+YYYY-MM-DD text, and compares and subtracts as a plain integer. In SQL,
+``date(day + 2440587.5)`` turns one back into text.
+"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from db.validation import DATE_FORMAT
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+# Julian day number of EPOCH, for converting in SQL
+EPOCH_JULIAN_DAY = 2440587.5
+
+
+@lru_cache(maxsize=65536)
+def to_day(text):
+    """Day number for YYYY-MM-DD text; None for blank or invalid text."""
+    if not text:
+        return None
+    try:
+        return date.fromisoformat(text).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(text, DATE_FORMAT).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return None
+
+
+def from_day(day):
+    """YYYY-MM-DD text for a day number; "" for None."""
+    if day is None:
+        return ""
+    return (EPOCH + timedelta(days=day)).isoformat()
+
+
+def today():
+    """Today's day number."""
+    return date.today().toordinal() - EPOCH_ORDINAL
@@ -0,0 +1,174 @@
+"""LRU cache of check details view models.
+
+A view model holds a check with every item's stock and expiry status
+already worked out, which is all the details screen needs to draw it.
+The app drops entries when it saves or deletes a check. Each entry also
+remembers the change seq (see db.changes) it was read at, so changes made
+by another connection or process are caught too: while the change counter
+has not moved a hit costs one indexed lookup, and only a counter change
+costs a second one for that check.
+"""
+import threading
+from collections import OrderedDict
+
+from db import changes, dates, retention, status
+
+# Checks kept; auditors flip between a handful, and prefetch adds a few more
+DETAILS_CACHE_SIZE = 32
+
+
+class CheckDetails:
+    """Details of one check as shown on the details screen."""
+
+    def __init__(self, check_id, check, items, today):
+        self.check_id = check_id
+        self.check = tuple(check)
+        self.box_name, self.check_date, self.general_notes = check
+        self.raw_items = items
+        self.today = today
+        stock = status.stock_statuses([item[2] for item in items], [item[1] for item in items])
+        expiry = status.expiry_statuses([dates.to_day(item[3]) for item in items], today)
+        # (item_name, standard_qty, current_qty, expiry_date, item_notes,
+        #  stock_status, expiry_status)
+        self.items = [tuple(item) + statuses for item, statuses in zip(items, zip(stock, expiry))]
+
+    def for_day(self, today):
+        """This view model, re-derived if the expiry statuses are out of date."""
+        if today == self.today:
+            return self
+        return CheckDetails(self.check_id, self.check, self.raw_items, today)
+
+
+def load_details(conn, check_ids, today):
+    """Return {check_id: CheckDetails} for the checks that exist, live or archived.
+
+    Live checks are read with two queries in all, however many there are.
+    """
+    found = {}
+    if not check_ids:
+        return found
+    placeholders = ", ".join("?" for _ in check_ids)
+    items_by_check = {}
+    for check_id, *item in conn.execute(f"""
+        SELECT check_id, item_name, standard_quantity, current_quantity, expiry_date, item_notes
+        FROM check_item_details WHERE check_id IN ({placeholders})
+        ORDER BY check_id, item_name
+    """, check_ids):
+        items_by_check.setdefault(check_id, []).append(tuple(item))
+    for check_id, *check in conn.execute(f"""
+        SELECT id, box_name, date(check_day + {dates.EPOCH_JULIAN_DAY}), general_notes
+        FROM first_aid_checks WHERE id IN ({placeholders})
+    """, check_ids):
+        found[check_id] = CheckDetails(check_id, check, items_by_check.get(check_id, []), today)
+    for check_id in check_ids:
+        if check_id not in found:
+            check, items = retention.get_archived_check(conn, check_id)
+            if check is not None:
+                found[check_id] = CheckDetails(check_id, check, items, today)
+    return found
+
+
+class DetailsCache:
+    """Thread-safe LRU of CheckDetails keyed by check id."""
+
+    def __init__(self, size=DETAILS_CACHE_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict() # check_id -> [CheckDetails, change seq]
+        # Bumped by invalidate; a load that started before an invalidation
+        # may have read the old rows, so it is not stored
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+    def lookup(self, conn, check_id, version):
+        """Return the cached view model if it is still current, else None."""
+        with self.lock:
+            entry = self.entries.get(check_id)
+        if entry is None:
+            return None
+        details, seen = entry
+        if seen != version:
+            if changes.check_changed(conn, check_id, seen):
+                return None
+            entry[1] = version
+        with self.lock:
+            if check_id in self.entries:
+                self.entries.move_to_end(check_id)
+        return details
+
+    def store(self, found, version, epoch):
+        with self.lock:
+            if epoch != self.epoch:
+                return
+            for check_id, details in found.items():
+                self.entries[check_id] = [details, version]
+                self.entries.move_to_end(check_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def get(self, conn, check_id):
+        """Return the CheckDetails for a check, or None if it does not exist."""
+        today = dates.today()
+        version = changes.current_version(conn)
+        details = self.lookup(conn, check_id, version)
+        if details is not None:
+            with self.lock:
+                self.hits += 1
+            fresh = details.for_day(today)
+            if fresh is not details:
+                with self.lock:
+                    if check_id in self.entries:
+                        self.entries[check_id][0] = fresh
+            return fresh
+        with self.lock:
+            self.misses += 1
+            epoch = self.epoch
+        found = load_details(conn, [check_id], today)
+        self.store(found, version, epoch)
+        return found.get(check_id)
+
+    def prefetch(self, conn, check_ids):
+        """Load the given checks that are not cached yet, in one batch.
+
+        Returns how many were loaded. Prefetches count as neither hits nor
+        misses.
+        """
+        version = changes.current_version(conn)
+        missing = [
+            check_id for check_id in check_ids
+            if self.lookup(conn, check_id, version) is None
+        ][:self.size]
+        if not missing:
+            return 0
+        with self.lock:
+            epoch = self.epoch
+        found = load_details(conn, missing, dates.today())
+        self.store(found, version, epoch)
+        with self.lock:
+            self.prefetched += len(found)
+        return len(found)
+
+    def invalidate(self, check_id=None):
+        """Drop one check's entry, or every entry when check_id is None."""
+        with self.lock:
+            self.epoch += 1
+            if check_id is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(check_id, None)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "prefetched": self.prefetched,
+                "cached": len(self.entries),
+            }
+
+
+details_cache = DetailsCache()
@@ -0,0 +1,69 @@
+"""Draft of the check being filled in, saved while the user types.
+
+There is one draft per device (the check form holds one check at a time).
+Field text is stored exactly as typed, before any validation, so a
+half-typed date or quantity comes back as it was left. Each write only
+touches the header row and the items edited since the last write; drafts
+have no indexes or triggers beyond their primary keys.
+"""
+from db.repository import transaction
+
+
+def save_draft(conn, header, items, reset=False):
+    """Write the draft header and changed items in one small transaction.
+
+    ``header`` is (check_id, box_name, check_date, general_notes), check_id
+    being None for a new check. ``items`` is a list of (item_name,
+    qty_text, expiry_text, notes_text). With ``reset`` the previous draft's
+    items are dropped first, as when a different box was chosen.
+    """
+    with transaction(conn):
+        conn.execute("""
+            INSERT INTO check_draft (id, check_id, box_name, check_date, general_notes, updated_at)
+            VALUES (1, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (id) DO UPDATE SET
+                check_id = excluded.check_id,
+                box_name = excluded.box_name,
+                check_date = excluded.check_date,
+                general_notes = excluded.general_notes,
+                updated_at = excluded.updated_at
+        """, tuple(header))
+        if reset:
+            conn.execute("DELETE FROM check_draft_items")
+        if items:
+            conn.executemany("""
+                INSERT INTO check_draft_items (item_name, qty_text, expiry_text, notes_text)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (item_name) DO UPDATE SET
+                    qty_text = excluded.qty_text,
+                    expiry_text = excluded.expiry_text,
+                    notes_text = excluded.notes_text
+            """, items)
+
+
+def get_draft(conn):
+    """Return (header, items, updated_at) or None when there is no draft.
+
+    ``header`` is as given to save_draft and ``items`` maps item_name to
+    (qty_text, expiry_text, notes_text).
+    """
+    row = conn.execute("""
+        SELECT check_id, box_name, check_date, general_notes, updated_at
+        FROM check_draft WHERE id = 1
+    """).fetchone()
+    if row is None:
+        return None
+    items = {
+        item_name: (qty_text, expiry_text, notes_text)
+        for item_name, qty_text, expiry_text, notes_text in conn.execute(
+            "SELECT item_name, qty_text, expiry_text, notes_text FROM check_draft_items"
+        )
+    }
+    return tuple(row[:4]), items, row[4]
+
+
+def clear_draft(conn):
+    """Drop the draft, once its check is saved or the user discards it."""
+    with transaction(conn):
+        conn.execute("DELETE FROM check_draft_items")
+        conn.execute("DELETE FROM check_draft")
@@ -0,0 +1,50 @@
+"""Expiry calendar: the dated items of every box's latest check, by day.
+
+expiry_calendar is keyed (expiry_day, box_name, item_id), so "everything
+expiring in the next N days" is one range scan of its primary key that
+comes back already in date order. It only covers latest checks, the ones
+box_status points at, and db.fleet refreshes it for the same boxes
+whenever it refreshes box_status.
+"""
+from db import dates, status
+
+# Calendar rows for the latest checks in box_status; {where} narrows the boxes
+CALENDAR_SQL = """
+    INSERT INTO expiry_calendar (expiry_day, box_name, item_id, check_id, current_quantity)
+    SELECT ci.expiry_day, s.box_name, ci.item_id, s.check_id, ci.current_quantity
+    FROM box_status s JOIN check_items ci ON ci.check_id = s.check_id
+    WHERE ci.expiry_day IS NOT NULL {where}
+"""
+
+
+def rebuild(conn):
+    """Regenerate the calendar from box_status; use inside a transaction."""
+    conn.execute("DELETE FROM expiry_calendar")
+    conn.execute(CALENDAR_SQL.format(where=""))
+
+
+def refresh(conn, boxes):
+    """Regenerate the calendar rows of ``boxes``; use inside a transaction."""
+    placeholders = ", ".join("?" for _ in boxes)
+    conn.execute(f"DELETE FROM expiry_calendar WHERE box_name IN ({placeholders})", boxes)
+    conn.execute(CALENDAR_SQL.format(where=f"AND s.box_name IN ({placeholders})"), boxes)
+
+
+def expiring(conn, days=status.EXPIRING_SOON_DAYS, today=None, include_expired=True):
+    """Return (expiry_day, box_name, item_name, quantity, status, days_left)
+    for latest-check items expiring within ``days``, soonest first.
+
+    Items already expired are included unless ``include_expired`` is false.
+    """
+    today = dates.today() if today is None else today
+    rows = conn.execute("""
+        SELECT e.expiry_day, e.box_name, i.name, e.current_quantity
+        FROM expiry_calendar e JOIN items i ON i.id = e.item_id
+        WHERE e.expiry_day BETWEEN ? AND ?
+        ORDER BY e.expiry_day, e.box_name, e.item_id
+    """, (-2**63 if include_expired else today + 1, today + days)).fetchall()
+    statuses = status.expiry_statuses([row[0] for row in rows], today, ordered=True)
+    return [
+        row + (expiry, row[0] - today)
+        for row, expiry in zip(rows, statuses)
+    ]
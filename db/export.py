@@ -0,0 +1,121 @@
+"""Stream the full check history to CSV or JSON Lines.
+
+Rows are pulled from the cursor in chunks and written as they arrive, so
+memory use does not depend on the size of the history.
+"""
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from db import retention
+from db.dates import EPOCH_JULIAN_DAY
+
+EXPORT_COLUMNS = (
+    "check_id",
+    "box_name",
+    "check_date",
+    "general_notes",
+    "item_name",
+    "standard_quantity",
+    "current_quantity",
+    "expiry_date",
+    "item_notes",
+)
+
+# File extension for each supported format
+FORMATS = {"csv": "csv", "jsonl": "jsonl"}
+
+CHUNK_ROWS = 2000
+
+
+def iter_history_chunks(conn, chunk_size=CHUNK_ROWS):
+    """Yield lists of export rows, oldest check first.
+
+    Archived checks come first, unpacked from the archive; they are older
+    than the retention cutoff and so older than the live ones.
+    """
+    archived = retention.iter_archived_rows(conn)
+    while True:
+        rows = list(islice(archived, chunk_size))
+        if not rows:
+            break
+        yield rows
+
+    # Joined by hand rather than through check_item_details: SQLite cannot
+    # flatten that view on the right of a LEFT JOIN
+    cursor = conn.execute(f"""
+        SELECT c.id, c.box_name, date(c.check_day + {EPOCH_JULIAN_DAY}), c.general_notes,
+               i.name, ci.standard_quantity, ci.current_quantity,
+               COALESCE(date(ci.expiry_day + {EPOCH_JULIAN_DAY}), ''), ci.item_notes
+        FROM first_aid_checks c
+        LEFT JOIN check_items ci ON ci.check_id = c.id
+        LEFT JOIN items i ON i.id = ci.item_id
+        ORDER BY c.check_day, c.id
+    """)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+def format_csv(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def format_jsonl(rows):
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+FORMATTERS = {"csv": format_csv, "jsonl": format_jsonl}
+
+
+def write_history(conn, out, fmt="csv", progress=None, chunk_size=CHUNK_ROWS):
+    """Write the history to the text stream ``out``; returns rows written.
+
+    ``progress(rows_written, rows_per_second)`` is called after each chunk.
+    """
+    formatter = FORMATTERS[fmt]
+    rows_written = 0
+    start = time.perf_counter()
+    if fmt == "csv":
+        out.write(format_csv([], header=True))
+
+    for rows in iter_history_chunks(conn, chunk_size):
+        out.write(formatter(rows))
+        rows_written += len(rows)
+        if progress:
+            elapsed = time.perf_counter() - start
+            progress(rows_written, rows_written / elapsed if elapsed else 0.0)
+    return rows_written
+
+
+def export_history(conn, path, fmt="csv", progress=None, chunk_size=CHUNK_ROWS):
+    """Export to ``path``; the file only appears once the export is complete."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial_path = path + ".part"
+    try:
+        with open(partial_path, "w", newline="", encoding="utf-8") as out:
+            rows_written = write_history(conn, out, fmt, progress, chunk_size)
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return rows_written
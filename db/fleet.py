@@ -0,0 +1,138 @@
+"""Latest-check status of every box, kept in the box_status table.
+
+One row per box holds its latest check's day, how many items were LOW
+STOCK, how many had already expired on the check date, and the earliest
+expiry day, so the home screen dashboard reads O(boxes) rows however long
+the history grows. Whether an item has expired *since* the check is
+whether the earliest expiry is EXPIRED today.
+
+``update`` follows the change log (see db.changes) like db.analytics: only
+boxes whose latest check may have changed are recomputed, each with one
+index probe. ``rebuild`` regenerates it from scratch with a single
+INSERT ... SELECT.
+The expiry calendar (see db.expiry) follows box_status box for box.
+"""
+from db import dates, expiry, status
+from db.changes import current_version
+from db.reports import OVERDUE_DAYS
+from db.repository import transaction
+
+# Past this many changed boxes, one bulk rebuild beats probing each
+MAX_REFRESHED_BOXES = 500
+
+# box_status rows for the boxes named in {boxes}, a query with a box_name
+# column; boxes without checks produce no row
+STATUS_SQL = f"""
+    SELECT c.box_name, c.id, c.check_day,
+           COALESCE(SUM({status.low_stock_sql("ci.current_quantity", "ci.standard_quantity")}), 0),
+           COALESCE(SUM({status.expired_sql("ci.expiry_day", "c.check_day")}), 0),
+           MIN(ci.expiry_day)
+    FROM ({{boxes}}) b
+    JOIN first_aid_checks c ON c.id = (
+        SELECT id FROM first_aid_checks
+        WHERE box_name = b.box_name
+        ORDER BY check_day DESC, id DESC LIMIT 1
+    )
+    LEFT JOIN check_items ci ON ci.check_id = c.id
+    GROUP BY c.id
+"""
+
+
+def rebuild(conn):
+    """Regenerate box_status from scratch; returns the number of boxes."""
+    with transaction(conn):
+        version = current_version(conn)
+        conn.execute("DELETE FROM box_status")
+        conn.execute(
+            "INSERT INTO box_status " + STATUS_SQL.format(
+                boxes="SELECT DISTINCT box_name FROM first_aid_checks"
+            )
+        )
+        expiry.rebuild(conn)
+        conn.execute("UPDATE box_status_state SET seq = ? WHERE id = 1", (version,))
+    return conn.execute("SELECT COUNT(*) FROM box_status").fetchone()[0]
+
+
+def update(conn):
+    """Bring box_status up to date with the change log.
+
+    Returns the number of boxes recomputed (all of them after a rebuild);
+    0 when nothing changed, which costs two single-row reads.
+    """
+    seq = conn.execute("SELECT seq FROM box_status_state WHERE id = 1").fetchone()[0]
+    if seq is None:
+        return rebuild(conn)
+    with transaction(conn):
+        version = current_version(conn)
+        if version == seq:
+            return 0
+        # Boxes a changed check belongs to now, or was the latest check of
+        boxes = [row[0] for row in conn.execute("""
+            WITH changed AS (
+                SELECT DISTINCT check_id FROM change_log WHERE seq > ? AND op != 'A'
+            )
+            SELECT box_name FROM first_aid_checks WHERE id IN changed
+            UNION SELECT box_name FROM box_status WHERE check_id IN changed
+        """, (seq,))]
+        if len(boxes) <= MAX_REFRESHED_BOXES:
+            if boxes:
+                placeholders = ", ".join("?" for _ in boxes)
+                conn.execute(f"DELETE FROM box_status WHERE box_name IN ({placeholders})", boxes)
+                conn.execute("INSERT INTO box_status " + STATUS_SQL.format(
+                    boxes=f"SELECT DISTINCT box_name FROM first_aid_checks WHERE box_name IN ({placeholders})"
+                ), boxes)
+                expiry.refresh(conn, boxes)
+            conn.execute("UPDATE box_status_state SET seq = ? WHERE id = 1", (version,))
+            return len(boxes)
+    return rebuild(conn)
+
+
+def fleet_status(conn, days=OVERDUE_DAYS, today=None):
+    """Return one dict per box, catalog boxes never checked included,
+    those needing attention first.
+
+    Keys: box_name, site, check_id, check_date, days_since, low_stock,
+    expired (on the check date), earliest_expiry, overdue and
+    expired_since (an item has expired since the check).
+    """
+    today = dates.today() if today is None else today
+    rows = conn.execute("""
+        SELECT s.box_name, COALESCE(b.site, ''), s.check_id, s.check_day,
+               s.low_stock, s.expired, s.earliest_expiry
+        FROM box_status s LEFT JOIN boxes b ON b.name = s.box_name
+        UNION ALL
+        SELECT b.name, b.site, NULL, NULL, 0, 0, NULL
+        FROM boxes b WHERE b.name NOT IN (SELECT box_name FROM box_status)
+    """).fetchall()
+    boxes = []
+    for box_name, site, check_id, day, low_stock, expired, earliest_expiry in rows:
+        days_since = None if day is None else today - day
+        boxes.append({
+            "box_name": box_name,
+            "site": site,
+            "check_id": check_id,
+            "check_date": dates.from_day(day),
+            "days_since": days_since,
+            "low_stock": low_stock,
+            "expired": expired,
+            "earliest_expiry": earliest_expiry,
+            "overdue": days_since is None or days_since > days,
+            "expired_since": status.expiry_statuses([earliest_expiry], today)[0] == status.EXPIRED,
+        })
+    boxes.sort(key=lambda box: (
+        -(box["overdue"] + bool(box["low_stock"]) + box["expired_since"]),
+        box["box_name"].lower(),
+    ))
+    return boxes
+
+
+def update_and_status(conn, days=OVERDUE_DAYS):
+    """Catch up with the change log, then return fleet_status(conn, days)."""
+    update(conn)
+    return fleet_status(conn, days)
+
+
+def update_and_expiring(conn, days):
+    """Catch up with the change log, then return expiry.expiring(conn, days)."""
+    update(conn)
+    return expiry.expiring(conn, days)
@@ -0,0 +1,248 @@
+"""Bulk import of historical checks from CSV, JSON Lines or JSON.
+
+The input uses the export columns (see db.export.EXPORT_COLUMNS), one row
+per item. Rows sharing a check_id, or when it is blank a (box_name,
+check_date) pair, become one check with a newly assigned id. Rows are
+validated with the same rules as the check form; a blank standard
+quantity is taken from the box's catalog contents.
+Rows are inserted with executemany in chunked transactions. Secondary
+indexes are dropped for the duration and rebuilt once at the end.
+"""
+import csv
+import json
+from operator import itemgetter
+
+from db import validation
+from db.export import EXPORT_COLUMNS
+from db.catalog import add_boxes, catalog_cache, item_id_for
+from db.dates import to_day
+from db.repository import STATUS_FLAGS_SQL
+
+CHUNK_ROWS = 50000
+
+# Tables whose non-unique indexes are rebuilt after the import instead of
+# being maintained row by row
+IMPORT_TABLES = ("first_aid_checks", "check_items")
+
+
+def csv_row_adapter(header):
+    """Return a function mapping a CSV row to a tuple in EXPORT_COLUMNS order.
+
+    It raises ValueError for a row with more or fewer cells than the header.
+    """
+    positions = {name.strip(): index for index, name in enumerate(header)}
+    indexes = [positions.get(name) for name in EXPORT_COLUMNS]
+    width = len(header)
+    pick = None if None in indexes else itemgetter(*indexes)
+
+    def adapt(row):
+        if len(row) != width:
+            raise ValueError(f"Expected {width} columns, found {len(row)}!")
+        if pick:
+            return pick(row)
+        return tuple("" if index is None else row[index] for index in indexes)
+    return adapt
+
+
+def dict_to_values(row):
+    return tuple(
+        "" if row.get(name) is None else str(row.get(name))
+        for name in EXPORT_COLUMNS
+    )
+
+
+def read_rows(path, fmt):
+    """Yield (row_number, values) from ``path``, values in EXPORT_COLUMNS order.
+
+    For a row that cannot be read ``values`` is the ValueError saying why,
+    which parse_row raises so the row is rejected like any invalid one.
+    """
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as source:
+            reader = csv.reader(source)
+            adapt = csv_row_adapter(next(reader, []))
+            # Numbered by the file line a row starts on, as notes may hold
+            # line breaks; line 1 is the header
+            number = reader.line_num + 1
+            for row in reader:
+                if row:
+                    try:
+                        values = adapt(row)
+                    except ValueError as e:
+                        values = e
+                    yield number, values
+                number = reader.line_num + 1
+    elif fmt == "jsonl":
+        with open(path, encoding="utf-8") as source:
+            for number, line in enumerate(source, start=1):
+                if line.strip():
+                    yield number, dict_to_values(json.loads(line))
+    elif fmt == "json":
+        with open(path, encoding="utf-8") as source:
+            for number, row in enumerate(json.load(source), start=1):
+                yield number, dict_to_values(row)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def parse_row(values, catalog):
+    """Validate one input row given in EXPORT_COLUMNS order.
+
+    Returns (check_key, check, item) where ``check`` is (box_name,
+    check_date, general_notes) and ``item`` is (item_name, standard_qty,
+    current_qty, expiry_date, item_notes). Raises ValueError otherwise.
+    """
+    if isinstance(values, ValueError):
+        raise values
+    if len(values) != len(EXPORT_COLUMNS):
+        raise ValueError(f"Expected {len(EXPORT_COLUMNS)} columns, found {len(values)}!")
+    (source_id, box_name, check_date, general_notes, item_name,
+     standard_text, current_text, expiry_date, item_notes) = [value.strip() for value in values]
+
+    if not box_name:
+        raise ValueError("Box name is required!")
+    validation.check_check_date(check_date)
+    if not item_name:
+        raise ValueError("Item name is required!")
+
+    if standard_text:
+        try:
+            standard_qty = int(standard_text)
+        except ValueError:
+            raise ValueError(f"Standard quantity for {item_name} must be a number!")
+    else:
+        standard_qty = catalog.standard_quantities(box_name).get(item_name)
+        if standard_qty is None:
+            raise ValueError(f"Standard quantity for {item_name} is required!")
+
+    current_qty = validation.parse_quantity(item_name, current_text)
+    validation.check_expiry_date(item_name, expiry_date)
+
+    check_key = ("id", source_id) if source_id else ("box", box_name, check_date)
+    check = (box_name, check_date, general_notes)
+    item = (item_name, standard_qty, current_qty, expiry_date, item_notes)
+    return check_key, check, item
+
+
+def drop_secondary_indexes(conn):
+    """Drop non-unique indexes on the import tables; returns their SQL."""
+    placeholders = ", ".join("?" for _ in IMPORT_TABLES)
+    indexes = conn.execute(f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL
+          AND tbl_name IN ({placeholders})
+          AND sql NOT LIKE 'CREATE UNIQUE%'
+    """, IMPORT_TABLES).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+
+def import_checks(conn, rows, chunk_size=CHUNK_ROWS, progress=None):
+    """Import (row_number, values) pairs as yielded by read_rows.
+
+    Returns {"checks": n, "items": n, "rejected": [(row_number, reason), ...]}.
+    ``progress(rows_read)`` is called after each committed chunk.
+    """
+    catalog = catalog_cache.get(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    # Ids are never reused (sync and the archive rely on it): start past the
+    # AUTOINCREMENT high-water mark, which SQLite raises to the explicit ids
+    next_id = first_id = conn.execute("""
+        SELECT MAX(
+            (SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'first_aid_checks'),
+            (SELECT COALESCE(MAX(id), 0) FROM first_aid_checks),
+            (SELECT COALESCE(MAX(check_id), 0) FROM archived_checks)
+        ) + 1
+    """).fetchone()[0]
+    index_sql = drop_secondary_indexes(conn)
+    conn.commit()
+
+    check_ids = {} # check_key -> (new id, item names seen)
+    box_names = set()
+    rejected = []
+    check_rows = []
+    item_rows = []
+    rows_read = 0
+    imported_items = 0
+
+    item_ids = {} # item_name -> items.id
+
+    def flush():
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO first_aid_checks (id, box_name, check_day, general_notes) VALUES (?, ?, ?, ?)",
+                [
+                    (check_id, box_name, to_day(check_date), general_notes)
+                    for check_id, box_name, check_date, general_notes in check_rows
+                ],
+            )
+            for _, item_name, _, _, _, _ in item_rows:
+                if item_name not in item_ids:
+                    item_ids[item_name] = item_id_for(conn, item_name)
+            conn.executemany("""
+                INSERT INTO check_items (check_id, item_id, standard_quantity, current_quantity, expiry_day, item_notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [
+                (check_id, item_ids[item_name], standard_qty, current_qty, to_day(expiry_date), item_notes)
+                for check_id, item_name, standard_qty, current_qty, expiry_date, item_notes in item_rows
+            ])
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        check_rows.clear()
+        item_rows.clear()
+        if progress:
+            progress(rows_read)
+
+    try:
+        for number, values in rows:
+            rows_read += 1
+            try:
+                check_key, check, item = parse_row(values, catalog)
+            except ValueError as e:
+                rejected.append((number, str(e)))
+                continue
+
+            entry = check_ids.get(check_key)
+            if entry is None:
+                entry = check_ids[check_key] = (next_id, set())
+                check_rows.append((next_id, *check))
+                box_names.add(check[0])
+                next_id += 1
+            check_id, item_names = entry
+            if item[0] in item_names:
+                rejected.append((number, f"Duplicate item {item[0]} for this check!"))
+                continue
+            item_names.add(item[0])
+            item_rows.append((check_id, *item))
+            imported_items += 1
+
+            if len(item_rows) >= chunk_size:
+                flush()
+        if check_rows or item_rows:
+            flush()
+    finally:
+        # Flag the imported checks, then rebuild the dropped indexes in one
+        # pass each, even after an error
+        conn.execute("BEGIN")
+        conn.execute(f"UPDATE first_aid_checks SET status_flags = {STATUS_FLAGS_SQL} WHERE id >= ?", (first_id,))
+        for sql in index_sql:
+            conn.execute(sql)
+        conn.commit()
+
+    # Boxes first seen in the import join the catalog with the default type
+    new_boxes = sorted(box_names - set(catalog.box_names))
+    if new_boxes:
+        conn.execute("BEGIN")
+        add_boxes(conn, new_boxes)
+        conn.commit()
+
+    return {"checks": len(check_ids), "items": imported_items, "rejected": rejected}
+
+
+def import_file(conn, path, fmt="csv", chunk_size=CHUNK_ROWS, progress=None):
+    """Import a CSV, JSON Lines or JSON (array of objects) file."""
+    return import_checks(conn, read_rows(path, fmt), chunk_size, progress)
@@ -0,0 +1,43 @@
+"""Schema upgrades and housekeeping run outside the app."""
+from db.migrations import get_schema_version, migrate
+
+
+def database_size(conn):
+    """Return (total bytes, free bytes) of the database file's pages."""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return page_count * page_size, free_pages * page_size
+
+
+def upgrade(conn, vacuum=True):
+    """Migrate to the latest schema and report the size before and after.
+
+    VACUUM afterwards returns the pages the migration freed to the file
+    system; without it the file keeps its size and reuses them later.
+    Returns {"from_version", "to_version", "applied", "size_before",
+    "size_after", "free_after"}.
+    """
+    from_version = get_schema_version(conn)
+    size_before, _ = database_size(conn)
+    applied = migrate(conn)
+    if vacuum and applied:
+        conn.execute("VACUUM")
+    size_after, free_after = database_size(conn)
+    return {
+        "from_version": from_version,
+        "to_version": get_schema_version(conn),
+        "applied": applied,
+        "size_before": size_before,
+        "size_after": size_after,
+        "free_after": free_after,
+    }
+
+
+def format_size(size):
+    """Human readable byte count."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,644 @@
+"""Versioned schema migrations keyed on ``PRAGMA user_version``."""
+from db import dates, status
+from db.catalog import create_catalog
+from db.repository import STATUS_FLAGS_SQL
+from db.retention import unpack_rows
+
+
+def fts5_available(conn):
+    """Whether this SQLite build has the FTS5 extension compiled in."""
+    return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def create_notes_fts(conn):
+    """Full-text indexes over general and item notes, kept in sync by triggers.
+
+    Both are external-content tables, so note text is not stored twice. Rows
+    with empty notes are never indexed. Skipped when FTS5 is missing; search
+    then falls back to LIKE.
+    """
+    if not fts5_available(conn):
+        return
+    statements = [
+        """
+        CREATE VIRTUAL TABLE check_notes_fts USING fts5(
+            general_notes, content='first_aid_checks', content_rowid='id'
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE item_notes_fts USING fts5(
+            item_notes, item_name, content='check_items', content_rowid='id'
+        )
+        """,
+        """
+        INSERT INTO check_notes_fts (rowid, general_notes)
+        SELECT id, general_notes FROM first_aid_checks WHERE general_notes <> ''
+        """,
+        """
+        INSERT INTO item_notes_fts (rowid, item_notes, item_name)
+        SELECT id, item_notes, item_name FROM check_items WHERE item_notes <> ''
+        """,
+        """
+        CREATE TRIGGER check_notes_fts_insert AFTER INSERT ON first_aid_checks
+        WHEN new.general_notes <> '' BEGIN
+            INSERT INTO check_notes_fts (rowid, general_notes) VALUES (new.id, new.general_notes);
+        END
+        """,
+        """
+        CREATE TRIGGER check_notes_fts_delete AFTER DELETE ON first_aid_checks
+        WHEN old.general_notes <> '' BEGIN
+            INSERT INTO check_notes_fts (check_notes_fts, rowid, general_notes)
+            VALUES ('delete', old.id, old.general_notes);
+        END
+        """,
+        """
+        CREATE TRIGGER check_notes_fts_update AFTER UPDATE OF general_notes ON first_aid_checks BEGIN
+            INSERT INTO check_notes_fts (check_notes_fts, rowid, general_notes)
+            SELECT 'delete', old.id, old.general_notes WHERE old.general_notes <> '';
+            INSERT INTO check_notes_fts (rowid, general_notes)
+            SELECT new.id, new.general_notes WHERE new.general_notes <> '';
+        END
+        """,
+        """
+        CREATE TRIGGER item_notes_fts_insert AFTER INSERT ON check_items
+        WHEN new.item_notes <> '' BEGIN
+            INSERT INTO item_notes_fts (rowid, item_notes, item_name)
+            VALUES (new.id, new.item_notes, new.item_name);
+        END
+        """,
+        """
+        CREATE TRIGGER item_notes_fts_delete AFTER DELETE ON check_items
+        WHEN old.item_notes <> '' BEGIN
+            INSERT INTO item_notes_fts (item_notes_fts, rowid, item_notes, item_name)
+            VALUES ('delete', old.id, old.item_notes, old.item_name);
+        END
+        """,
+        """
+        CREATE TRIGGER item_notes_fts_update AFTER UPDATE OF item_notes, item_name ON check_items BEGIN
+            INSERT INTO item_notes_fts (item_notes_fts, rowid, item_notes, item_name)
+            SELECT 'delete', old.id, old.item_notes, old.item_name WHERE old.item_notes <> '';
+            INSERT INTO item_notes_fts (rowid, item_notes, item_name)
+            SELECT new.id, new.item_notes, new.item_name WHERE new.item_notes <> '';
+        END
+        """,
+    ]
+    for statement in statements:
+        conn.execute(statement)
+
+
+# item_notes_fts rowids are check_id << ITEM_NOTES_KEY_BITS | item_id
+ITEM_NOTES_KEY_BITS = 32
+
+
+def create_item_notes_fts(conn):
+    """Full-text index over item notes for the WITHOUT ROWID check_items.
+
+    External content needs a rowid to point at, so this index keeps its own
+    copy of the (rare) non-empty notes. Each row's rowid packs the key as
+    ``check_id << 32 | item_id``, which is what the triggers delete by; a
+    noted item whose ids do not fit (item ids from 2**32, check ids from
+    2**31) is refused rather than allowed to collide with another key.
+    """
+    if not fts5_available(conn):
+        return
+    key = "{row}.check_id << %d | {row}.item_id" % ITEM_NOTES_KEY_BITS
+    statements = [
+        "CREATE VIRTUAL TABLE item_notes_fts USING fts5(item_notes, item_name)",
+        f"""
+        INSERT INTO item_notes_fts (rowid, item_notes, item_name)
+        SELECT {key.format(row="ci")}, ci.item_notes, i.name
+        FROM check_items ci JOIN items i ON i.id = ci.item_id
+        WHERE ci.item_notes <> ''
+        """,
+        f"""
+        CREATE TRIGGER item_notes_fts_key_check BEFORE INSERT ON check_items
+        WHEN new.item_notes <> ''
+             AND (new.item_id >= {1 << ITEM_NOTES_KEY_BITS} OR new.check_id >= {1 << (63 - ITEM_NOTES_KEY_BITS)})
+        BEGIN
+            SELECT RAISE(ABORT, 'check or item id too large for the item notes index');
+        END
+        """,
+        f"""
+        CREATE TRIGGER item_notes_fts_insert AFTER INSERT ON check_items
+        WHEN new.item_notes <> '' BEGIN
+            INSERT INTO item_notes_fts (rowid, item_notes, item_name)
+            SELECT {key.format(row="new")}, new.item_notes, name
+            FROM items WHERE id = new.item_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER item_notes_fts_delete AFTER DELETE ON check_items
+        WHEN old.item_notes <> '' BEGIN
+            DELETE FROM item_notes_fts WHERE rowid = {key.format(row="old")};
+        END
+        """,
+        f"""
+        CREATE TRIGGER item_notes_fts_update AFTER UPDATE OF item_notes ON check_items BEGIN
+            DELETE FROM item_notes_fts WHERE rowid = {key.format(row="old")};
+            INSERT INTO item_notes_fts (rowid, item_notes, item_name)
+            SELECT {key.format(row="new")}, new.item_notes, name
+            FROM items WHERE id = new.item_id AND new.item_notes <> '';
+        END
+        """,
+    ]
+    for statement in statements:
+        conn.execute(statement)
+
+
+def normalize_check_items(conn):
+    """Rebuild check_items keyed on (check_id, item_id), WITHOUT ROWID.
+
+    Item names move to the items table and expiry dates become day
+    numbers. Each row keeps the standard quantity it was checked against,
+    so a later catalog change does not rewrite past checks. Rows whose
+    check no longer exists are dropped. The check_item_details view gives
+    back the old column shape for reads.
+    """
+    # Python's parser also accepts the unpadded dates strptime let through
+    conn.create_function("to_day", 1, dates.to_day, deterministic=True)
+    statements = [
+        "DROP TRIGGER IF EXISTS item_notes_fts_insert",
+        "DROP TRIGGER IF EXISTS item_notes_fts_delete",
+        "DROP TRIGGER IF EXISTS item_notes_fts_update",
+        "DROP TABLE IF EXISTS item_notes_fts",
+        "INSERT OR IGNORE INTO items (name) SELECT DISTINCT item_name FROM check_items",
+        """
+        CREATE TABLE check_items_new (
+            check_id INTEGER NOT NULL REFERENCES first_aid_checks (id) ON DELETE CASCADE,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            standard_quantity INTEGER NOT NULL,
+            current_quantity INTEGER NOT NULL,
+            expiry_day INTEGER,
+            item_notes TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (check_id, item_id)
+        ) WITHOUT ROWID
+        """,
+        # Version 1 did not enforce its foreign key; items whose check is
+        # gone could never be read, and the connection now enforces it
+        """
+        INSERT INTO check_items_new (check_id, item_id, standard_quantity, current_quantity, expiry_day, item_notes)
+        SELECT ci.check_id, i.id, ci.standard_quantity, ci.current_quantity, to_day(ci.expiry_date),
+               COALESCE(ci.item_notes, '')
+        FROM check_items ci JOIN items i ON i.name = ci.item_name
+        JOIN first_aid_checks c ON c.id = ci.check_id
+        ORDER BY ci.check_id, i.id
+        """,
+        "DROP TABLE check_items",
+        "ALTER TABLE check_items_new RENAME TO check_items",
+        f"""
+        CREATE VIEW check_item_details AS
+        SELECT ci.check_id, i.name AS item_name, ci.standard_quantity, ci.current_quantity,
+               COALESCE(date(ci.expiry_day + {dates.EPOCH_JULIAN_DAY}), '') AS expiry_date,
+               ci.item_notes
+        FROM check_items ci
+        JOIN items i ON i.id = ci.item_id
+        """,
+    ]
+    for statement in statements:
+        conn.execute(statement)
+    create_item_notes_fts(conn)
+
+
+def create_change_log(conn):
+    """Append-only log of check mutations, one row per changed check.
+
+    first_aid_checks rows log their own insert, update or delete. A
+    check_items change logs an update of its check, replacing the newest
+    log row when that is already an update of the same check; saving a
+    check with all its items so adds one row rather than one per item,
+    and every change still moves the check past readers' last seq.
+    """
+    statements = [
+        """
+        CREATE TABLE change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            check_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D'))
+        )
+        """,
+        "CREATE INDEX idx_change_log_check ON change_log (check_id, seq)",
+    ]
+    for event, row, op in (("INSERT", "new", "I"), ("UPDATE", "new", "U"), ("DELETE", "old", "D")):
+        statements.append(f"""
+            CREATE TRIGGER first_aid_checks_{event.lower()}_change_log AFTER {event} ON first_aid_checks BEGIN
+                INSERT INTO change_log (check_id, op) VALUES ({row}.id, '{op}');
+            END
+        """)
+    for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+        statements.append(f"""
+            CREATE TRIGGER check_items_{event.lower()}_change_log AFTER {event} ON check_items BEGIN
+                DELETE FROM change_log
+                WHERE seq = (SELECT MAX(seq) FROM change_log)
+                  AND check_id = {row}.check_id AND op = 'U';
+                INSERT INTO change_log (check_id, op) VALUES ({row}.check_id, 'U');
+            END
+        """)
+    for statement in statements:
+        conn.execute(statement)
+
+
+# Milliseconds since 1970-01-01 UTC, in SQL
+NOW_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+
+def create_sync_log(conn):
+    """Give change_log the stamps and origins that sync resolves conflicts by.
+
+    Each row now records when (ms) and on which device the change was
+    made. Local changes are stamped with the later of the clock and the
+    previous row's stamp plus one, so they always sort after changes
+    already received. While sync applies a remote change, sync_state holds
+    that change's stamp and device and the triggers log those instead.
+    While retention archives checks their deletes are logged as 'A', so
+    they are not synced as real deletes. Checks not yet in the log get an
+    'I' row stamped with their created_at time, so a first sync sends them.
+    """
+    statements = [
+        """
+        CREATE TABLE sync_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            device_id TEXT NOT NULL,
+            apply_stamp INTEGER,
+            apply_device TEXT,
+            archiving INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT INTO sync_state (id, device_id) VALUES (1, lower(hex(randomblob(8))))",
+        """
+        CREATE TABLE sync_peers (
+            device_id TEXT PRIMARY KEY,
+            acked_seq INTEGER NOT NULL DEFAULT 0,
+            received_seq INTEGER NOT NULL DEFAULT 0,
+            last_sync TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE sync_ids (
+            check_id INTEGER PRIMARY KEY,
+            uid TEXT NOT NULL UNIQUE
+        )
+        """,
+    ]
+    for table in ("first_aid_checks", "check_items"):
+        for event in ("insert", "update", "delete"):
+            statements.append(f"DROP TRIGGER {table}_{event}_change_log")
+    statements += [
+        """
+        CREATE TABLE change_log_new (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            check_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D', 'A')),
+            stamp INTEGER NOT NULL,
+            device TEXT NOT NULL
+        )
+        """,
+        f"""
+        INSERT INTO change_log_new (seq, check_id, op, stamp, device)
+        SELECT seq, check_id, op, {NOW_MS}, (SELECT device_id FROM sync_state)
+        FROM change_log ORDER BY seq
+        """,
+        """
+        INSERT INTO change_log_new (check_id, op, stamp, device)
+        SELECT id, 'I',
+               COALESCE(CAST((julianday(created_at) - 2440587.5) * 86400000 AS INTEGER), 0),
+               (SELECT device_id FROM sync_state)
+        FROM first_aid_checks
+        WHERE id NOT IN (SELECT check_id FROM change_log)
+        ORDER BY id
+        """,
+        "DROP TABLE change_log",
+        "ALTER TABLE change_log_new RENAME TO change_log",
+        "CREATE INDEX idx_change_log_check ON change_log (check_id, seq)",
+    ]
+    stamp = f"""COALESCE(
+        (SELECT apply_stamp FROM sync_state WHERE id = 1),
+        MAX({NOW_MS}, COALESCE((SELECT stamp FROM change_log ORDER BY seq DESC LIMIT 1), 0) + 1)
+    )"""
+    device = """COALESCE(
+        (SELECT apply_device FROM sync_state WHERE id = 1),
+        (SELECT device_id FROM sync_state WHERE id = 1)
+    )"""
+    delete_op = "CASE WHEN (SELECT archiving FROM sync_state WHERE id = 1) THEN 'A' ELSE 'D' END"
+    for event, row, op in (("INSERT", "new", "'I'"), ("UPDATE", "new", "'U'"), ("DELETE", "old", delete_op)):
+        statements.append(f"""
+            CREATE TRIGGER first_aid_checks_{event.lower()}_change_log AFTER {event} ON first_aid_checks BEGIN
+                INSERT INTO change_log (check_id, op, stamp, device)
+                VALUES ({row}.id, {op}, {stamp}, {device});
+            END
+        """)
+    for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+        statements.append(f"""
+            CREATE TRIGGER check_items_{event.lower()}_change_log AFTER {event} ON check_items BEGIN
+                DELETE FROM change_log
+                WHERE seq = (SELECT MAX(seq) FROM change_log)
+                  AND check_id = {row}.check_id AND op = 'U';
+                INSERT INTO change_log (check_id, op, stamp, device)
+                VALUES ({row}.check_id, 'U', {stamp}, {device});
+            END
+        """)
+    for statement in statements:
+        conn.execute(statement)
+
+
+def convert_check_dates(conn):
+    """Store check dates as day numbers and flag checks with problem items.
+
+    first_aid_checks.check_date (TEXT) becomes check_day, and status_flags
+    records whether any item was LOW STOCK or already EXPIRED on the check
+    date (see db.status), so history filters are index range scans.
+    Unreadable dates become day 0 (1970-01-01). The columns are changed in
+    place, which keeps check_items' cascade and the triggers; the change
+    log's update trigger is set aside meanwhile so the conversion is not
+    logged, and comes back watching only the columns sync carries.
+    archived_checks is rebuilt the same way with its box name, and
+    box_status is rebuilt on next use. DROP COLUMN needs SQLite 3.35.
+    """
+    conn.create_function("to_day", 1, dates.to_day, deterministic=True)
+    update_trigger = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'first_aid_checks_update_change_log'"
+    ).fetchone()[0]
+    statements = [
+        "DROP TRIGGER first_aid_checks_update_change_log",
+        "ALTER TABLE first_aid_checks ADD COLUMN check_day INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE first_aid_checks ADD COLUMN status_flags INTEGER NOT NULL DEFAULT 0",
+        "UPDATE first_aid_checks SET check_day = COALESCE(to_day(check_date), 0)",
+        f"UPDATE first_aid_checks SET status_flags = {STATUS_FLAGS_SQL}",
+        "DROP INDEX IF EXISTS idx_checks_date",
+        "DROP INDEX IF EXISTS idx_checks_box_date",
+        "ALTER TABLE first_aid_checks DROP COLUMN check_date",
+        # Every history page is a range scan in (check_day, id) order; the
+        # explicit id keeps that order ahead of the filter columns
+        "CREATE INDEX idx_checks_day ON first_aid_checks (check_day, id, box_name, status_flags)",
+        "CREATE INDEX idx_checks_box_day ON first_aid_checks (box_name, check_day, id, status_flags)",
+        """
+        CREATE INDEX idx_checks_flagged ON first_aid_checks (check_day, id, box_name, status_flags)
+        WHERE status_flags <> 0
+        """,
+        update_trigger.replace(
+            "AFTER UPDATE ON first_aid_checks",
+            "AFTER UPDATE OF box_name, check_day, general_notes ON first_aid_checks",
+        ),
+        """
+        CREATE TABLE archived_checks_new (
+            check_id INTEGER PRIMARY KEY,
+            archive_id INTEGER NOT NULL REFERENCES check_archive (id) ON DELETE CASCADE,
+            box_name TEXT NOT NULL,
+            check_day INTEGER NOT NULL,
+            status_flags INTEGER NOT NULL
+        )
+        """,
+    ]
+    for statement in statements:
+        conn.execute(statement)
+
+    # Archived items only exist in the compressed rows
+    archived = []
+    for archive_id, box_name, blob in conn.execute("SELECT id, box_name, rows FROM check_archive").fetchall():
+        for check_id, check_date, _, items in unpack_rows(blob):
+            check_day = dates.to_day(check_date) or 0
+            flags = status.check_flags(
+                [(item[1], item[2], dates.to_day(item[3])) for item in items], check_day
+            )
+            archived.append((check_id, archive_id, box_name, check_day, flags))
+    conn.executemany("INSERT INTO archived_checks_new VALUES (?, ?, ?, ?, ?)", archived)
+    for statement in [
+        "DROP TABLE archived_checks",
+        "ALTER TABLE archived_checks_new RENAME TO archived_checks",
+        "CREATE INDEX idx_archived_checks_day ON archived_checks (check_day, check_id, box_name, status_flags)",
+        "CREATE INDEX idx_archived_checks_box_day ON archived_checks (box_name, check_day, check_id, status_flags)",
+        "DROP TABLE box_status",
+        """
+        CREATE TABLE box_status (
+            box_name TEXT PRIMARY KEY,
+            check_id INTEGER NOT NULL,
+            check_day INTEGER NOT NULL,
+            low_stock INTEGER NOT NULL,
+            expired INTEGER NOT NULL,
+            earliest_expiry INTEGER
+        ) WITHOUT ROWID
+        """,
+        "UPDATE box_status_state SET seq = NULL WHERE id = 1",
+    ]:
+        conn.execute(statement)
+
+
+# Each entry is (version, description, steps). A step is an SQL string or a
+# callable taking the connection. Versions must be consecutive and are
+# applied in order, each one in its own transaction.
+MIGRATIONS = [
+    (1, "Base tables", [
+        """
+        CREATE TABLE IF NOT EXISTS first_aid_checks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            box_name TEXT NOT NULL,
+            check_date TEXT NOT NULL,
+            general_notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS check_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            check_id INTEGER INTEGER NOT NULL,
+            item_name TEXT NOT NULL,
+            standard_quantity INTEGER NOT NULL,
+            current_quantity INTEGER NOT NULL,
+            expiry_date TEXT,
+            item_notes TEXT,
+            FOREIGN KEY (check_id) REFERENCES first_aid_checks (id) ON DELETE CASCADE
+        )
+        """,
+    ]),
+    (2, "Indexes for item lookups and history ordering", [
+        "CREATE INDEX IF NOT EXISTS idx_check_items_check_id ON check_items (check_id)",
+        "CREATE INDEX IF NOT EXISTS idx_checks_date ON first_aid_checks (check_date)",
+        "CREATE INDEX IF NOT EXISTS idx_checks_box_date ON first_aid_checks (box_name, check_date)",
+    ]),
+    (3, "Unique (check_id, item_name) key for item upserts", [
+        # Keep the newest row if earlier versions left duplicates behind
+        """
+        DELETE FROM check_items WHERE id NOT IN (
+            SELECT MAX(id) FROM check_items GROUP BY check_id, item_name
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_check_items_check_item ON check_items (check_id, item_name)",
+        # The unique index has check_id as its prefix, so this one is redundant
+        "DROP INDEX IF EXISTS idx_check_items_check_id",
+    ]),
+    (4, "Full-text search over general and item notes", [
+        create_notes_fts,
+    ]),
+    (5, "Box, box type and standard contents catalog", [
+        create_catalog,
+    ]),
+    (6, "Normalized WITHOUT ROWID check_items with item ids and day numbers", [
+        normalize_check_items,
+    ]),
+    (7, "Compressed archive of checks past the retention period", [
+        """
+        CREATE TABLE check_archive (
+            id INTEGER PRIMARY KEY,
+            box_name TEXT NOT NULL,
+            month TEXT NOT NULL,
+            check_count INTEGER NOT NULL,
+            item_count INTEGER NOT NULL,
+            short_items INTEGER NOT NULL,
+            expired_items INTEGER NOT NULL,
+            first_check_date TEXT NOT NULL,
+            last_check_date TEXT NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            rows BLOB NOT NULL,
+            UNIQUE (month, box_name)
+        )
+        """,
+        """
+        CREATE TABLE archived_checks (
+            check_id INTEGER PRIMARY KEY,
+            archive_id INTEGER NOT NULL REFERENCES check_archive (id) ON DELETE CASCADE,
+            check_date TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_archived_checks_date ON archived_checks (check_date)",
+    ]),
+    (8, "Draft of the check being filled in", [
+        """
+        CREATE TABLE check_draft (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            check_id INTEGER,
+            box_name TEXT NOT NULL,
+            check_date TEXT NOT NULL,
+            general_notes TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE check_draft_items (
+            item_name TEXT PRIMARY KEY,
+            qty_text TEXT NOT NULL,
+            expiry_text TEXT NOT NULL,
+            notes_text TEXT NOT NULL
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (9, "Change log of check mutations", [
+        create_change_log,
+    ]),
+    (10, "Device id, sync peers and stamped change log for delta sync", [
+        create_sync_log,
+    ]),
+    (11, "Per-item consumption totals for restock forecasts", [
+        # seq is the change log position the totals are current to; NULL
+        # until the first full build (see db.analytics)
+        """
+        CREATE TABLE consumption_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER
+        )
+        """,
+        "INSERT INTO consumption_state (id, seq) VALUES (1, NULL)",
+        """
+        CREATE TABLE item_consumption (
+            box_name TEXT NOT NULL,
+            item_id INTEGER NOT NULL REFERENCES items (id),
+            last_day INTEGER NOT NULL,
+            last_qty INTEGER NOT NULL,
+            used INTEGER NOT NULL,
+            days INTEGER NOT NULL,
+            PRIMARY KEY (box_name, item_id)
+        ) WITHOUT ROWID
+        """,
+        # Box and day of every live check folded in, so deletes and edits
+        # can be traced back to the box they affect
+        """
+        CREATE TABLE consumption_checks (
+            check_id INTEGER PRIMARY KEY,
+            box_name TEXT NOT NULL,
+            day INTEGER NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_consumption_checks_box_day ON consumption_checks (box_name, day)",
+    ]),
+    (12, "Latest-check status of every box", [
+        # seq is the change log position box_status is current to; NULL
+        # until the first full build (see db.fleet)
+        """
+        CREATE TABLE box_status_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER
+        )
+        """,
+        "INSERT INTO box_status_state (id, seq) VALUES (1, NULL)",
+        """
+        CREATE TABLE box_status (
+            box_name TEXT PRIMARY KEY,
+            check_id INTEGER NOT NULL,
+            check_date TEXT NOT NULL,
+            low_stock INTEGER NOT NULL,
+            expired INTEGER NOT NULL,
+            earliest_expiry INTEGER
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (13, "Expiry calendar of latest-check items", [
+        """
+        CREATE TABLE expiry_calendar (
+            expiry_day INTEGER NOT NULL,
+            box_name TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            check_id INTEGER NOT NULL,
+            current_quantity INTEGER NOT NULL,
+            PRIMARY KEY (expiry_day, box_name, item_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX idx_expiry_calendar_box ON expiry_calendar (box_name)",
+        # Filled in by the next box_status rebuild (see db.fleet)
+        "UPDATE box_status_state SET seq = NULL WHERE id = 1",
+    ]),
+    (14, "Check dates as day numbers with status flags for history filters", [
+        convert_check_dates,
+    ]),
+]
+
+# Versions that free enough space to be worth a VACUUM once applied. The
+# VACUUM after 7 also converts older files to auto_vacuum=INCREMENTAL.
+VACUUM_AFTER = {6, 7, 14}
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Return the schema version recorded in the database header."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target_version=None):
+    """Bring the schema up to ``target_version`` (latest by default).
+
+    Returns the list of versions applied. When the schema is already current
+    this only reads ``user_version`` and issues no DDL at all.
+    """
+    if target_version is None:
+        target_version = SCHEMA_VERSION
+    current = get_schema_version(conn)
+    if current >= target_version:
+        return []
+
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if version <= current or version > target_version:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            # PRAGMA does not accept bound parameters; version is an int we own
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    return applied
@@ -0,0 +1,150 @@
+"""Fleet reports over each box's latest check, for the command line.
+
+Items are read through the same check_item_details view the details
+screen uses and classified with db.status, so a report lists exactly the
+items the app would show as LOW STOCK, EXPIRED or EXPIRING SOON. The
+expiring report is served by the expiry calendar in db.expiry.
+"""
+from db import dates, status
+from db.catalog import DEFAULT_BOX_TYPE
+from db.dates import EPOCH_JULIAN_DAY
+from db.migrations import SCHEMA_VERSION, get_schema_version
+
+# A box is overdue when its latest check is older than this
+OVERDUE_DAYS = 30
+
+# (id, box_name, check_date) of the newest check of every box, one index
+# probe per box on idx_checks_box_day
+LATEST_CHECKS_SQL = f"""
+    SELECT c.id, c.box_name, date(c.check_day + {EPOCH_JULIAN_DAY}) AS check_date
+    FROM (SELECT DISTINCT box_name FROM first_aid_checks) b
+    JOIN first_aid_checks c ON c.id = (
+        SELECT id FROM first_aid_checks
+        WHERE box_name = b.box_name
+        ORDER BY check_day DESC, id DESC LIMIT 1
+    )
+"""
+
+
+def latest_checks(conn):
+    """Return (check_id, box_name, check_date) for each box, by box name."""
+    return conn.execute(LATEST_CHECKS_SQL + " ORDER BY c.box_name").fetchall()
+
+
+def latest_items(conn):
+    """Return (box_name, check_date, item_name, standard_qty, current_qty,
+    expiry_date, item_notes) rows of every box's latest check."""
+    return conn.execute(f"""
+        SELECT l.box_name, l.check_date, d.item_name, d.standard_quantity,
+               d.current_quantity, d.expiry_date, d.item_notes
+        FROM ({LATEST_CHECKS_SQL}) l
+        JOIN check_item_details d ON d.check_id = l.id
+        ORDER BY l.box_name, d.item_name
+    """).fetchall()
+
+
+def summary(conn, today=None):
+    """Return counts describing the database and the fleet's latest checks."""
+    today = dates.today() if today is None else today
+    counts = {
+        "checks": conn.execute("SELECT COUNT(*) FROM first_aid_checks").fetchone()[0],
+        "archived_checks": conn.execute("SELECT COUNT(*) FROM archived_checks").fetchone()[0],
+        "boxes": conn.execute("SELECT COUNT(*) FROM boxes").fetchone()[0],
+        "boxes_checked": 0,
+        "last_check_date": conn.execute(
+            f"SELECT date(MAX(check_day) + {EPOCH_JULIAN_DAY}) FROM first_aid_checks"
+        ).fetchone()[0] or "",
+        status.LOW_STOCK: 0,
+        status.OVERSTOCK: 0,
+        status.EXPIRED: 0,
+        status.EXPIRING_SOON: 0,
+    }
+    items = latest_items(conn)
+    stock = status.stock_statuses([item[4] for item in items], [item[3] for item in items])
+    expiry = status.expiry_statuses([dates.to_day(item[5]) for item in items], today)
+    for name in stock + expiry:
+        if name in counts:
+            counts[name] += 1
+    counts["boxes_checked"] = len({item[0] for item in items})
+    return counts
+
+
+def overdue_boxes(conn, days=OVERDUE_DAYS, today=None):
+    """Return (box_name, last_check_date, days_since) for boxes not checked
+    in the last ``days`` days, never-checked boxes first (date "", days None)."""
+    today = dates.today() if today is None else today
+    last_checked = {box_name: check_date for _, box_name, check_date in latest_checks(conn)}
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM boxes UNION SELECT DISTINCT box_name FROM first_aid_checks"
+    )]
+    overdue = []
+    for box_name in names:
+        check_date = last_checked.get(box_name, "")
+        day = dates.to_day(check_date)
+        if day is None:
+            overdue.append((box_name, check_date, None))
+        elif today - day > days:
+            overdue.append((box_name, check_date, today - day))
+    overdue.sort(key=lambda row: (row[2] is not None, -(row[2] or 0), row[0]))
+    return overdue
+
+
+def low_stock(conn):
+    """Return (box_name, check_date, item_name, standard_qty, current_qty)
+    for LOW STOCK items in each box's latest check."""
+    items = latest_items(conn)
+    stock = status.stock_statuses([item[4] for item in items], [item[3] for item in items])
+    return [item[:5] for item, name in zip(items, stock) if name == status.LOW_STOCK]
+
+
+def restock_list(conn, days=status.EXPIRING_SOON_DAYS, today=None):
+    """Return what to order to bring every box back to standard.
+
+    Rows are (item_name, to_order, short, replace, boxes), most needed
+    first: ``short`` units are missing against each box's standard
+    contents (items not recorded in the latest check count as missing),
+    ``replace`` units will be EXPIRED ``days`` from today (only up to the
+    standard quantity) and ``to_order`` is their sum. ``boxes`` names the
+    boxes that need the item, comma separated.
+
+    One query over the latest checks: a probe per box on
+    idx_checks_box_day, then the items of those checks only.
+    """
+    today = dates.today() if today is None else today
+    return conn.execute(f"""
+        WITH needs AS (
+            SELECT l.box_name, bti.item_id,
+                   {status.shortfall_sql("COALESCE(ci.current_quantity, 0)", "bti.standard_quantity")} AS short,
+                   CASE WHEN {status.expired_sql("ci.expiry_day", ":until")}
+                        THEN MIN(ci.current_quantity, bti.standard_quantity) ELSE 0 END AS replace
+            FROM ({LATEST_CHECKS_SQL}) l
+            LEFT JOIN boxes b ON b.name = l.box_name
+            JOIN box_type_items bti ON bti.box_type_id = COALESCE(
+                b.box_type_id, (SELECT id FROM box_types WHERE name = '{DEFAULT_BOX_TYPE}')
+            )
+            LEFT JOIN check_items ci ON ci.check_id = l.id AND ci.item_id = bti.item_id
+        )
+        SELECT i.name, SUM(n.short + n.replace) AS to_order, SUM(n.short), SUM(n.replace),
+               GROUP_CONCAT(n.box_name, ', ')
+        FROM needs n JOIN items i ON i.id = n.item_id
+        WHERE n.short + n.replace > 0
+        GROUP BY n.item_id
+        ORDER BY to_order DESC, i.name
+    """, {"until": today + days}).fetchall()
+
+
+def integrity_problems(conn):
+    """Return a list of problems found; empty when the database is sound."""
+    problems = [
+        f"integrity_check: {row[0]}"
+        for row in conn.execute("PRAGMA integrity_check")
+        if row[0] != "ok"
+    ]
+    problems += [
+        f"foreign key: {table} rowid {rowid} -> {parent}"
+        for table, rowid, parent, _ in conn.execute("PRAGMA foreign_key_check")
+    ]
+    version = get_schema_version(conn)
+    if version != SCHEMA_VERSION:
+        problems.append(f"schema version {version}, expected {SCHEMA_VERSION}")
+    return problems
@@ -0,0 +1,238 @@
+"""Queries for first aid checks and their items.
+
+Every function takes an open ``sqlite3`` connection as its first argument
+and nothing here imports Kivy, so the same code paths can be exercised and
+benchmarked headless.
+"""
+from contextlib import contextmanager
+
+from db.catalog import catalog_cache
+from db.dates import EPOCH_JULIAN_DAY, to_day
+from db.status import check_flags_sql
+
+# status_flags of the first_aid_checks row being updated, from its items
+STATUS_FLAGS_SQL = f"""(
+    SELECT {check_flags_sql(
+        "ci.current_quantity", "ci.standard_quantity", "ci.expiry_day", "first_aid_checks.check_day"
+    )}
+    FROM check_items ci
+    WHERE ci.check_id = first_aid_checks.id
+)"""
+
+# Keyset start: after every (check_day, id)
+HISTORY_START = (2**62, 0)
+
+
+@contextmanager
+def transaction(conn):
+    """Run the enclosed statements in one transaction."""
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def get_check(conn, check_id):
+    """Return (box_name, check_date, general_notes) or None."""
+    return conn.execute(f"""
+        SELECT box_name, date(check_day + {EPOCH_JULIAN_DAY}), general_notes
+        FROM first_aid_checks WHERE id = ?
+    """, (check_id,)).fetchone()
+
+
+def get_check_items(conn, check_id):
+    """Return (item_name, standard_qty, current_qty, expiry_date, item_notes) rows."""
+    return conn.execute("""
+        SELECT item_name, standard_quantity, current_quantity, expiry_date, item_notes
+        FROM check_item_details WHERE check_id = ?
+        ORDER BY item_name
+    """, (check_id,)).fetchall()
+
+
+def get_check_with_items(conn, check_id):
+    """Return (check, items) as from get_check and get_check_items.
+
+    ``check`` is None (and ``items`` empty) when the check does not exist.
+    """
+    check = get_check(conn, check_id)
+    if check is None:
+        return None, []
+    return check, get_check_items(conn, check_id)
+
+
+def get_check_for_edit(conn, check_id):
+    """Return (check, items, contents) for filling the check form.
+
+    ``contents`` is the standard (item_name, quantity) list for the check's
+    box, taken from the catalog snapshot.
+    """
+    check, items = get_check_with_items(conn, check_id)
+    if check is None:
+        return None, [], []
+    return check, items, catalog_cache.get(conn).standard_contents(check[0])
+
+
+def history_filter(id_column, prefix, box_name, date_from, date_to, status_mask):
+    """WHERE conditions for get_history_page, on columns named ``prefix``.col."""
+    conditions = [f"({prefix}check_day, {prefix}{id_column}) < (:after_day, :after_id)"]
+    if box_name is not None:
+        conditions.append(f"{prefix}box_name = :box_name")
+    if date_from is not None:
+        conditions.append(f"{prefix}check_day >= :day_from")
+    if date_to is not None:
+        conditions.append(f"{prefix}check_day <= :day_to")
+    if status_mask:
+        # The literal "<> 0" lets the planner use the partial flagged index
+        conditions.append(f"{prefix}status_flags <> 0 AND {prefix}status_flags & :status_mask")
+    return " AND ".join(conditions)
+
+
+def get_history_page(conn, after=None, limit=50, box_name=None, date_from=None, date_to=None,
+                     status_mask=0):
+    """Return up to ``limit`` (id, box_name, check_date, general_notes, archived) rows.
+
+    Rows are ordered newest first and include archived checks, whose
+    general_notes are NULL (they stay in the compressed archive) and
+    archived is 1. ``after`` is the (check_date, id) of the last row of the
+    previous page; None starts from the top.
+
+    Optional filters: one box, checks dated ``date_from`` to ``date_to``
+    (YYYY-MM-DD, inclusive) and ``status_mask`` of status.LOW_STOCK_FLAG
+    and/or EXPIRED_FLAG for checks with any such item. Each combination is
+    a range scan of one index on (check_day, id), most led by box_name.
+    """
+    after_day, after_id = HISTORY_START if after is None else (to_day(after[0]), after[1])
+    params = {
+        "after_day": after_day,
+        "after_id": after_id,
+        "box_name": box_name,
+        "day_from": to_day(date_from),
+        "day_to": to_day(date_to),
+        "status_mask": status_mask,
+        "limit": limit,
+    }
+    filters = [
+        history_filter(id_column, prefix, box_name, date_from, date_to, status_mask)
+        for id_column, prefix in (("id", ""), ("check_id", "ac."))
+    ]
+    return conn.execute(f"""
+        SELECT id, box_name, date(check_day + {EPOCH_JULIAN_DAY}), general_notes, archived
+        FROM (
+            SELECT id, box_name, check_day, general_notes, 0 AS archived
+            FROM first_aid_checks
+            WHERE {filters[0]}
+            UNION ALL
+            SELECT ac.check_id, ac.box_name, ac.check_day, NULL, 1
+            FROM archived_checks ac
+            WHERE {filters[1]}
+            ORDER BY 3 DESC, 1 DESC
+            LIMIT :limit
+        )
+        ORDER BY check_day DESC, id DESC
+    """, params).fetchall()
+
+
+def get_history_rows(conn, check_ids):
+    """Return history rows, shaped as from get_history_page, for ``check_ids``.
+
+    Ids that are neither live nor archived are left out.
+    """
+    if not check_ids:
+        return []
+    placeholders = ", ".join("?" for _ in check_ids)
+    return conn.execute(f"""
+        SELECT id, box_name, date(check_day + {EPOCH_JULIAN_DAY}), general_notes, 0
+        FROM first_aid_checks WHERE id IN ({placeholders})
+        UNION ALL
+        SELECT check_id, box_name, date(check_day + {EPOCH_JULIAN_DAY}), NULL, 1
+        FROM archived_checks WHERE check_id IN ({placeholders})
+    """, [*check_ids, *check_ids]).fetchall()
+
+
+def refresh_status_flags(conn, check_ids):
+    """Recompute status_flags of the given checks from their items.
+
+    Only the flags change, which the change log does not record.
+    """
+    placeholders = ", ".join("?" for _ in check_ids)
+    conn.execute(f"""
+        UPDATE first_aid_checks SET status_flags = {STATUS_FLAGS_SQL}
+        WHERE id IN ({placeholders})
+    """, list(check_ids))
+
+
+def save_check(conn, check, items, check_id=None, stored_check=None, stored_items=None):
+    """Insert a new check, or write the differences for an existing one.
+
+    ``check`` is (box_name, check_date, general_notes) and ``items`` is a list
+    of (item_name, standard_qty, current_qty, expiry_date, item_notes);
+    dates are YYYY-MM-DD and stored as day numbers.
+    ``stored_check`` and ``stored_items`` (item_name -> remaining fields)
+    describe what was loaded for editing; unchanged rows are not rewritten.
+    Each item is stored with the standard quantity it was checked against.
+    Returns the check id.
+    """
+    stored_items = stored_items or {}
+    box_name, check_date, general_notes = check
+    with transaction(conn):
+        if check_id:
+            if tuple(check) != stored_check:
+                conn.execute("""
+                    UPDATE first_aid_checks
+                    SET box_name = ?, check_day = ?, general_notes = ?
+                    WHERE id = ?
+                """, (box_name, to_day(check_date), general_notes, check_id))
+
+            changed_items = [
+                row for row in items
+                if stored_items.get(row[0]) != tuple(row[1:])
+            ]
+            item_names = {row[0] for row in items}
+            removed_items = [
+                (check_id, item_name) for item_name in stored_items
+                if item_name not in item_names
+            ]
+            if removed_items:
+                conn.executemany("""
+                    DELETE FROM check_items
+                    WHERE check_id = ? AND item_id = (SELECT id FROM items WHERE name = ?)
+                """, removed_items)
+        else:
+            check_id = conn.execute("""
+                INSERT INTO first_aid_checks (box_name, check_day, general_notes)
+                VALUES (?, ?, ?)
+            """, (box_name, to_day(check_date), general_notes)).lastrowid
+            changed_items = items
+            removed_items = []
+
+        if changed_items:
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (name) VALUES (?)",
+                [(row[0],) for row in changed_items]
+            )
+            conn.executemany("""
+                INSERT INTO check_items (check_id, item_id, standard_quantity, current_quantity, expiry_day, item_notes)
+                SELECT ?, id, ?, ?, ?, ? FROM items WHERE name = ?
+                ON CONFLICT (check_id, item_id) DO UPDATE SET
+                    standard_quantity = excluded.standard_quantity,
+                    current_quantity = excluded.current_quantity,
+                    expiry_day = excluded.expiry_day,
+                    item_notes = excluded.item_notes
+            """, [
+                (check_id, standard_qty, current_qty, to_day(expiry_date), item_notes or "", item_name)
+                for item_name, standard_qty, current_qty, expiry_date, item_notes in changed_items
+            ])
+        if changed_items or removed_items or tuple(check) != stored_check:
+            refresh_status_flags(conn, [check_id])
+    return check_id
+
+
+def delete_check(conn, check_id):
+    """Delete a check and all of its item rows."""
+    with transaction(conn):
+        conn.execute("DELETE FROM check_items WHERE check_id = ?", (check_id,))
+        conn.execute("DELETE FROM first_aid_checks WHERE id = ?", (check_id,))
@@ -0,0 +1,217 @@
+"""Retention policy: roll old checks into a compressed archive.
+
+Checks older than the retention period are packed per box and month into
+one check_archive row: summary counts plus a zlib-compressed JSON blob of
+the raw check and item rows. archived_checks maps each archived check id
+to its blob, with the box, day and status flags the history filters on,
+so single checks can still be opened and listed in the history. The latest check of every box is always kept live.
+
+All work is done in small steps (``archive_step``, ``vacuum_step``) so the
+app can run them on the writer thread while it is otherwise idle.
+"""
+import json
+import zlib
+from datetime import date
+
+from db import changes, dates, status
+from db.repository import get_check_with_items, transaction
+
+# Checks archived per transaction
+ARCHIVE_BATCH = 200
+# Free pages handed back to the file system per incremental_vacuum step
+VACUUM_PAGES = 128
+
+
+def cutoff_date(months, today=None):
+    """YYYY-MM-DD date ``months`` calendar months before ``today``."""
+    today = today or date.today()
+    month_index = today.year * 12 + today.month - 1 - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    # Clamp to the last day of a shorter month
+    for day in range(today.day, 0, -1):
+        try:
+            return date(year, month, day).isoformat()
+        except ValueError:
+            continue
+
+
+def month_of(check_date):
+    """YYYY-MM archive key for a check date."""
+    day = dates.to_day(check_date)
+    return dates.from_day(day)[:7] if day is not None else check_date[:7]
+
+
+def pack_rows(checks):
+    """Compress [check_id, check_date, general_notes, items] entries."""
+    return zlib.compress(json.dumps(checks, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def unpack_rows(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def summarize(checks):
+    """Summary columns of one archive row, in check_archive column order.
+
+    Items are classified with db.status, as the status flags are: short
+    when LOW STOCK, expired when EXPIRED on the check date.
+    """
+    item_count = short_items = expired_items = 0
+    for _, check_date, _, items in checks:
+        item_count += len(items)
+        short_items += status.stock_statuses(
+            [item[2] for item in items], [item[1] for item in items]
+        ).count(status.LOW_STOCK)
+        expired_items += status.expiry_statuses(
+            [dates.to_day(item[3]) for item in items], dates.to_day(check_date)
+        ).count(status.EXPIRED)
+    check_dates = [check[1] for check in checks]
+    return (len(checks), item_count, short_items, expired_items, min(check_dates), max(check_dates))
+
+
+def archivable_checks(conn, cutoff, limit=ARCHIVE_BATCH):
+    """Return up to ``limit`` (id, box_name, check_date, general_notes,
+    status_flags) rows, oldest first, dated before ``cutoff`` and not their
+    box's latest check."""
+    return conn.execute(f"""
+        SELECT c.id, c.box_name, date(c.check_day + {dates.EPOCH_JULIAN_DAY}), c.general_notes,
+               c.status_flags
+        FROM first_aid_checks c
+        WHERE c.check_day < ?
+          AND EXISTS (
+              SELECT 1 FROM first_aid_checks n
+              WHERE n.box_name = c.box_name AND (n.check_day, n.id) > (c.check_day, c.id)
+          )
+        ORDER BY c.check_day, c.id
+        LIMIT ?
+    """, (dates.to_day(cutoff), limit)).fetchall()
+
+
+def archive_step(conn, cutoff, limit=ARCHIVE_BATCH):
+    """Archive one batch of checks dated before ``cutoff``.
+
+    Returns the number of checks archived; 0 once nothing is left.
+    """
+    with transaction(conn):
+        checks = archivable_checks(conn, cutoff, limit)
+        if not checks:
+            return 0
+        check_ids = [row[0] for row in checks]
+        placeholders = ", ".join("?" for _ in check_ids)
+        items_by_check = {}
+        for check_id, *item in conn.execute(f"""
+            SELECT check_id, item_name, standard_quantity, current_quantity, expiry_date, item_notes
+            FROM check_item_details WHERE check_id IN ({placeholders})
+            ORDER BY check_id, item_name
+        """, check_ids):
+            items_by_check.setdefault(check_id, []).append(item)
+
+        groups = {}
+        flags = {}
+        for check_id, box_name, check_date, general_notes, status_flags in checks:
+            flags[check_id] = status_flags
+            groups.setdefault((box_name, month_of(check_date)), []).append(
+                [check_id, check_date, general_notes or "", items_by_check.get(check_id, [])]
+            )
+
+        for (box_name, month), new_entries in groups.items():
+            existing = conn.execute(
+                "SELECT id, rows FROM check_archive WHERE month = ? AND box_name = ?",
+                (month, box_name),
+            ).fetchone()
+            entries = new_entries
+            if existing:
+                archive_id = existing[0]
+                entries = unpack_rows(existing[1]) + new_entries
+                conn.execute("""
+                    UPDATE check_archive
+                    SET check_count = ?, item_count = ?, short_items = ?, expired_items = ?,
+                        first_check_date = ?, last_check_date = ?, rows = ?
+                    WHERE id = ?
+                """, (*summarize(entries), pack_rows(entries), archive_id))
+            else:
+                archive_id = conn.execute("""
+                    INSERT INTO check_archive (
+                        box_name, month, check_count, item_count, short_items, expired_items,
+                        first_check_date, last_check_date, rows
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (box_name, month, *summarize(entries), pack_rows(entries))).lastrowid
+            conn.executemany("""
+                INSERT INTO archived_checks (check_id, archive_id, box_name, check_day, status_flags)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (entry[0], archive_id, box_name, dates.to_day(entry[1]), flags[entry[0]])
+                for entry in new_entries
+            ])
+
+        with changes.archiving(conn):
+            conn.execute(f"DELETE FROM check_items WHERE check_id IN ({placeholders})", check_ids)
+            conn.execute(f"DELETE FROM first_aid_checks WHERE id IN ({placeholders})", check_ids)
+    return len(checks)
+
+
+def vacuum_step(conn, pages=VACUUM_PAGES):
+    """Return up to ``pages`` free pages to the file system.
+
+    Returns the number of free pages a further step could release: 0 once
+    the free list is empty, or when auto_vacuum is not INCREMENTAL (as set
+    up after migration 7) and free pages are only reused.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return 0
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def maintenance_step(conn, cutoff):
+    """One idle-time step: archive a batch, or else vacuum a little.
+
+    Returns True while there is more work to do.
+    """
+    return archive_step(conn, cutoff) > 0 or vacuum_step(conn) > 0
+
+
+def get_archived_check(conn, check_id):
+    """Return (check, items) for an archived check, shaped like
+    get_check_with_items; (None, []) if it is not in the archive."""
+    row = conn.execute("""
+        SELECT a.box_name, a.rows
+        FROM archived_checks ac JOIN check_archive a ON a.id = ac.archive_id
+        WHERE ac.check_id = ?
+    """, (check_id,)).fetchone()
+    if row is None:
+        return None, []
+    box_name, blob = row
+    for entry_id, check_date, general_notes, items in unpack_rows(blob):
+        if entry_id == check_id:
+            return (box_name, check_date, general_notes), [tuple(item) for item in items]
+    return None, []
+
+
+def get_check_details(conn, check_id):
+    """Return (check, items) for a live or archived check."""
+    check, items = get_check_with_items(conn, check_id)
+    if check is None:
+        return get_archived_check(conn, check_id)
+    return check, items
+
+
+def iter_archived_rows(conn):
+    """Yield archived checks as export rows, month by month, oldest first."""
+    months = [row[0] for row in conn.execute(
+        "SELECT DISTINCT month FROM check_archive ORDER BY month"
+    )]
+    for month in months:
+        checks = []
+        for box_name, blob in conn.execute(
+            "SELECT box_name, rows FROM check_archive WHERE month = ?", (month,)
+        ).fetchall():
+            for check_id, check_date, general_notes, items in unpack_rows(blob):
+                checks.append((check_date, check_id, box_name, general_notes, items))
+        checks.sort()
+        for check_date, check_id, box_name, general_notes, items in checks:
+            if not items:
+                yield (check_id, box_name, check_date, general_notes, None, None, None, None, None)
+            for item in items:
+                yield (check_id, box_name, check_date, general_notes, *item)
@@ -0,0 +1,95 @@
+"""Ranked full-text search over general and item notes."""
+import re
+
+from db.dates import EPOCH_JULIAN_DAY
+from db.migrations import ITEM_NOTES_KEY_BITS
+
+SEARCH_PAGE_SIZE = 30
+
+# Each source only yields its best-ranked rows for the requested window.
+# A check can match through several items, so over-fetch enough item rows
+# that deduplicating by check still fills the page.
+CANDIDATES_PER_RESULT = 10
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def build_match_query(text):
+    """Turn typed text into an FTS5 query.
+
+    Every word must match and the last one is treated as a prefix, so
+    results narrow as the user types. Returns None when there are no words.
+    """
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def has_notes_index(conn):
+    """Whether migration 4 could create the FTS5 tables on this device."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'check_notes_fts'"
+    ).fetchone() is not None
+
+
+def search_checks(conn, text, limit=SEARCH_PAGE_SIZE, offset=0):
+    """Return (id, box_name, check_date, snippet) rows for checks whose
+    general notes or item notes match ``text``, best match first.
+    """
+    match_query = build_match_query(text)
+    if match_query is None:
+        return []
+    if not has_notes_index(conn):
+        return search_checks_like(conn, text, limit, offset)
+
+    # A check is ranked by its best matching note; FTS5's rank is bm25,
+    # lower is better, and ORDER BY rank LIMIT lets FTS5 keep only the top rows
+    candidates = (offset + limit) * CANDIDATES_PER_RESULT
+    return conn.execute(f"""
+        SELECT c.id, c.box_name, date(c.check_day + {EPOCH_JULIAN_DAY}), m.snippet
+        FROM (
+            SELECT * FROM (
+                SELECT rowid AS check_id, rank,
+                       snippet(check_notes_fts, 0, '', '', '...', 10) AS snippet
+                FROM check_notes_fts
+                WHERE check_notes_fts MATCH :query
+                ORDER BY rank LIMIT :candidates
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT rowid >> {ITEM_NOTES_KEY_BITS}, rank,
+                       item_name || ': ' || snippet(item_notes_fts, 0, '', '', '...', 10)
+                FROM item_notes_fts
+                WHERE item_notes_fts MATCH :query
+                ORDER BY rank LIMIT :candidates
+            )
+        ) AS m
+        JOIN first_aid_checks c ON c.id = m.check_id
+        GROUP BY c.id
+        ORDER BY MIN(m.rank), c.check_day DESC
+        LIMIT :limit OFFSET :offset
+    """, {
+        "query": match_query,
+        "candidates": candidates,
+        "limit": limit,
+        "offset": offset,
+    }).fetchall()
+
+
+def search_checks_like(conn, text, limit=SEARCH_PAGE_SIZE, offset=0):
+    """Unranked LIKE scan, used only where SQLite was built without FTS5."""
+    pattern = f"%{text.strip()}%"
+    return conn.execute(f"""
+        SELECT c.id, c.box_name, date(c.check_day + {EPOCH_JULIAN_DAY}),
+               COALESCE(NULLIF(c.general_notes, ''), MIN(i.name || ': ' || ci.item_notes))
+        FROM first_aid_checks c
+        LEFT JOIN check_items ci ON ci.check_id = c.id AND ci.item_notes LIKE :pattern
+        LEFT JOIN items i ON i.id = ci.item_id
+        WHERE c.general_notes LIKE :pattern OR ci.check_id IS NOT NULL
+        GROUP BY c.id
+        ORDER BY c.check_day DESC, c.id DESC
+        LIMIT :limit OFFSET :offset
+    """, {"pattern": pattern, "limit": limit, "offset": offset}).fetchall()
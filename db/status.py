@@ -0,0 +1,108 @@
+"""Stock and expiry status rules for check items.
+
+These are the rules the check details screen shows, kept free of Kivy so
+the command-line reports classify items exactly as the app does. The
+plural forms classify a whole column at once; every screen and report
+goes through them. Queries that classify items in SQL (status_flags,
+box_status, the restock list) build their expressions with the ``*_sql``
+functions below, the same rules over column names.
+"""
+from bisect import bisect_right
+
+from db import dates
+
+OK = "OK"
+LOW_STOCK = "LOW STOCK"
+OVERSTOCK = "OVERSTOCK"
+EXPIRED = "EXPIRED"
+EXPIRING_SOON = "EXPIRING SOON"
+
+# Items expiring within this many days are EXPIRING SOON
+EXPIRING_SOON_DAYS = 90
+
+# Bits of a check's status_flags: any item LOW STOCK, any item already
+# EXPIRED on the check date
+LOW_STOCK_FLAG = 1
+EXPIRED_FLAG = 2
+
+
+def stock_statuses(current_qtys, standard_qtys):
+    """stock_status of each (current, standard) pair, as a list."""
+    return [
+        LOW_STOCK if current < standard else OVERSTOCK if current > standard else OK
+        for current, standard in zip(current_qtys, standard_qtys)
+    ]
+
+
+def expiry_statuses(expiry_days, today=None, ordered=False):
+    """EXPIRED, EXPIRING SOON or "" for each day number in ``expiry_days``.
+
+    None means no expiry date. With ``ordered`` the days must be sorted
+    ascending and free of None, as an expiry calendar range is; the result
+    is then built from two bisections instead of a comparison per day.
+    """
+    if today is None:
+        today = dates.today()
+    soon = today + EXPIRING_SOON_DAYS
+    if ordered:
+        expired = bisect_right(expiry_days, today)
+        expiring = bisect_right(expiry_days, soon, expired)
+        return (
+            [EXPIRED] * expired
+            + [EXPIRING_SOON] * (expiring - expired)
+            + [""] * (len(expiry_days) - expiring)
+        )
+    return [
+        "" if day is None else EXPIRED if day <= today else EXPIRING_SOON if day <= soon else ""
+        for day in expiry_days
+    ]
+
+
+def stock_status(current_qty, standard_qty):
+    """OK, LOW STOCK or OVERSTOCK for a counted quantity."""
+    return stock_statuses([current_qty], [standard_qty])[0]
+
+
+def expiry_status(expiry_date, today=None):
+    """EXPIRED, EXPIRING SOON or "" for YYYY-MM-DD text.
+
+    An item is expired from its expiry date onwards. Blank or unreadable
+    dates have no status. ``today`` is a day number (default today).
+    """
+    return expiry_statuses([dates.to_day(expiry_date)], today)[0]
+
+
+def check_flags(items, check_day):
+    """status_flags for a check's (standard_qty, current_qty, expiry_day) items."""
+    flags = 0
+    if LOW_STOCK in stock_statuses([item[1] for item in items], [item[0] for item in items]):
+        flags |= LOW_STOCK_FLAG
+    if EXPIRED in expiry_statuses([item[2] for item in items], check_day):
+        flags |= EXPIRED_FLAG
+    return flags
+
+
+def low_stock_sql(current, standard):
+    """SQL true where stock_status(current, standard) is LOW STOCK."""
+    return f"({current} < {standard})"
+
+
+def shortfall_sql(current, standard):
+    """SQL for the units missing against the standard: positive exactly
+    where low_stock_sql is true, 0 otherwise."""
+    return f"MAX({standard} - {current}, 0)"
+
+
+def expired_sql(expiry_day, day):
+    """SQL true where an item is EXPIRED on day number ``day``; NULL, so
+    not true, without an expiry date."""
+    return f"({expiry_day} <= {day})"
+
+
+def check_flags_sql(current, standard, expiry_day, check_day):
+    """SQL aggregate computing check_flags over a check's item rows; 0
+    for a check without items."""
+    return (
+        f"COALESCE(MAX({low_stock_sql(current, standard)}), 0) * {LOW_STOCK_FLAG}"
+        f" | COALESCE(MAX({expired_sql(expiry_day, check_day)}), 0) * {EXPIRED_FLAG}"
+    )
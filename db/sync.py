@@ -0,0 +1,392 @@
+"""Offline delta sync of checks between devices.
+
+Every device keeps its own database and a random device id (migration
+10). change_log already records each check mutation with a stamp (ms) and
+the device it was made on; a bundle carries the latest state of every
+check changed since the peer last acknowledged, items with the standard
+quantities they were checked against, so its size depends on
+the number of changes, never on the size of the database.
+
+Checks are identified across devices by a uid, ``"<device>:<local id>"``
+as assigned on the device that created them; sync_ids maps uids of checks
+received from elsewhere to their local ids.
+
+Conflicts are resolved per check, last writer wins: the change with the
+higher (stamp, device) pair is kept, whole check and items together, and
+deletes travel as tombstones ranked the same way. Every device applying
+the same changes in any order ends up with the same checks. Checks this
+device has archived are left alone.
+
+Bundles are zlib-compressed JSON, exchanged as files (``write_bundle`` /
+``read_bundle``) or through a small HTTP server (``make_server``,
+``sync_with_server``).
+"""
+import hmac
+import json
+import os
+import zlib
+
+from db.catalog import add_boxes, catalog_cache, item_id_for
+from db.changes import current_version
+from db.dates import EPOCH_JULIAN_DAY, to_day
+from db.repository import refresh_status_flags, transaction
+
+BUNDLE_FORMAT = 1
+SYNC_PORT = 8765
+# Checks read per IN (...) query while building a bundle
+FETCH_BATCH = 400
+
+
+def device_id(conn):
+    """This database's device id."""
+    return conn.execute("SELECT device_id FROM sync_state WHERE id = 1").fetchone()[0]
+
+
+def peer_state(conn, peer):
+    """Return (acked_seq, received_seq) for a peer device.
+
+    acked_seq is how far into our change_log the peer has confirmed
+    having; received_seq is how far into the peer's log we have applied.
+    """
+    row = conn.execute(
+        "SELECT acked_seq, received_seq FROM sync_peers WHERE device_id = ?", (peer,)
+    ).fetchone()
+    return tuple(row) if row else (0, 0)
+
+
+def list_peers(conn):
+    """Return (device_id, acked_seq, received_seq, last_sync) rows."""
+    return conn.execute("""
+        SELECT device_id, acked_seq, received_seq, last_sync
+        FROM sync_peers ORDER BY last_sync DESC
+    """).fetchall()
+
+
+def latest_changes(conn, since, exclude_device=None):
+    """Return (check_id, op, stamp, device) of the latest change of each
+    check changed after seq ``since``, in log order.
+
+    Archive moves ('A') stay local, and changes made on ``exclude_device``
+    are left out since that device has them already.
+    """
+    rows = conn.execute("""
+        SELECT check_id, op, stamp, device FROM change_log
+        WHERE seq IN (SELECT MAX(seq) FROM change_log WHERE seq > ? GROUP BY check_id)
+        ORDER BY seq
+    """, (since,)).fetchall()
+    return [row for row in rows if row[1] != "A" and row[3] != exclude_device]
+
+
+def batches(values, size=FETCH_BATCH):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def build_bundle(conn, peer=None):
+    """Return a bundle of the changes ``peer`` has not acknowledged.
+
+    Without a peer the bundle holds the latest change of every check in
+    the log, for seeding a new device from a file.
+    """
+    own = device_id(conn)
+    with transaction(conn): # One snapshot for the version and the rows
+        acked, received = peer_state(conn, peer) if peer else (0, 0)
+        until = current_version(conn)
+        changes = latest_changes(conn, acked, exclude_device=peer)
+        check_ids = [check_id for check_id, op, _, _ in changes if op != "D"]
+
+        checks = {}
+        items = {}
+        uids = {}
+        for batch in batches([check_id for check_id, _, _, _ in changes]):
+            placeholders = ", ".join("?" for _ in batch)
+            uids.update(conn.execute(
+                f"SELECT check_id, uid FROM sync_ids WHERE check_id IN ({placeholders})", batch
+            ).fetchall())
+        for batch in batches(check_ids):
+            placeholders = ", ".join("?" for _ in batch)
+            for check_id, *check in conn.execute(f"""
+                SELECT id, box_name, date(check_day + {EPOCH_JULIAN_DAY}), general_notes
+                FROM first_aid_checks WHERE id IN ({placeholders})
+            """, batch):
+                checks[check_id] = check
+            for check_id, *item in conn.execute(f"""
+                SELECT check_id, item_name, standard_quantity, current_quantity, expiry_date, item_notes
+                FROM check_item_details WHERE check_id IN ({placeholders})
+            """, batch):
+                items.setdefault(check_id, []).append(item)
+
+    entries = []
+    for check_id, op, stamp, device in changes:
+        entry = {
+            "uid": uids.get(check_id, f"{own}:{check_id}"),
+            "stamp": stamp,
+            "device": device,
+            "deleted": op == "D",
+        }
+        if op != "D":
+            if check_id not in checks:
+                continue
+            box_name, check_date, general_notes = checks[check_id]
+            entry.update({
+                "box_name": box_name,
+                "check_date": check_date,
+                "general_notes": general_notes or "",
+                "items": items.get(check_id, []),
+            })
+        entries.append(entry)
+    return {
+        "format": BUNDLE_FORMAT,
+        "device": own,
+        "peer": peer,
+        "since": acked,
+        "until": until,
+        "ack": received,
+        "checks": entries,
+    }
+
+
+def encode_bundle(bundle):
+    return zlib.compress(json.dumps(bundle, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode_bundle(data):
+    bundle = json.loads(zlib.decompress(data).decode("utf-8"))
+    if bundle.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported sync bundle format: {bundle.get('format')}")
+    return bundle
+
+
+def write_bundle(bundle, path):
+    """Write a bundle file; returns its size in bytes."""
+    data = encode_bundle(bundle)
+    partial_path = path + ".part"
+    with open(partial_path, "wb") as out:
+        out.write(data)
+    os.replace(partial_path, path)
+    return len(data)
+
+
+def read_bundle(path):
+    with open(path, "rb") as source:
+        return decode_bundle(source.read())
+
+
+def local_check_id(conn, own, uid):
+    """Local id for a uid, or None if this device has never had the check."""
+    device, _, number = uid.partition(":")
+    if device == own:
+        return int(number)
+    row = conn.execute("SELECT check_id FROM sync_ids WHERE uid = ?", (uid,)).fetchone()
+    return row[0] if row else None
+
+
+def apply_entry(conn, own, entry, item_ids):
+    """Apply one bundle entry; returns "applied", "deleted" or "skipped"."""
+    check_id = local_check_id(conn, own, entry["uid"])
+    incoming = (entry["stamp"], entry["device"])
+    exists = False
+    if check_id is not None:
+        latest = conn.execute("""
+            SELECT op, stamp, device FROM change_log
+            WHERE check_id = ? ORDER BY seq DESC LIMIT 1
+        """, (check_id,)).fetchone()
+        if latest is not None and (latest[0] == "A" or (latest[1], latest[2]) >= incoming):
+            return "skipped"
+        exists = conn.execute(
+            "SELECT 1 FROM first_aid_checks WHERE id = ?", (check_id,)
+        ).fetchone() is not None
+
+    # The change_log triggers record the change with its original stamp
+    conn.execute(
+        "UPDATE sync_state SET apply_stamp = ?, apply_device = ? WHERE id = 1", incoming
+    )
+    if entry["deleted"]:
+        if not exists:
+            return "skipped"
+        conn.execute("DELETE FROM check_items WHERE check_id = ?", (check_id,))
+        conn.execute("DELETE FROM first_aid_checks WHERE id = ?", (check_id,))
+        return "deleted"
+
+    check = (entry["box_name"], to_day(entry["check_date"]), entry["general_notes"])
+    if exists:
+        conn.execute("""
+            UPDATE first_aid_checks SET box_name = ?, check_day = ?, general_notes = ?
+            WHERE id = ?
+        """, (*check, check_id))
+        conn.execute("DELETE FROM check_items WHERE check_id = ?", (check_id,))
+    else:
+        # Ids are never reused, so a known check comes back under its old id
+        check_id = conn.execute("""
+            INSERT INTO first_aid_checks (id, box_name, check_day, general_notes)
+            VALUES (?, ?, ?, ?)
+        """, (check_id, *check)).lastrowid
+        if entry["uid"].partition(":")[0] != own:
+            conn.execute(
+                "INSERT OR IGNORE INTO sync_ids (check_id, uid) VALUES (?, ?)",
+                (check_id, entry["uid"]),
+            )
+    rows = []
+    for item_name, standard_qty, current_qty, expiry_date, item_notes in entry["items"]:
+        if item_name not in item_ids:
+            item_ids[item_name] = item_id_for(conn, item_name)
+        rows.append((
+            check_id, item_ids[item_name], current_qty, to_day(expiry_date), item_notes or "", standard_qty
+        ))
+    conn.executemany("""
+        INSERT INTO check_items (check_id, item_id, current_quantity, expiry_day, item_notes, standard_quantity)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows)
+    refresh_status_flags(conn, [check_id])
+    return "applied"
+
+
+def apply_bundle(conn, bundle):
+    """Apply a bundle from another device in one transaction.
+
+    Returns {"applied", "deleted", "skipped"} counts. Also records how far
+    into the sender's log this device now is, and what the sender has
+    acknowledged of ours, for the next bundle either way.
+    """
+    own = device_id(conn)
+    sender = bundle["device"]
+    if sender == own:
+        raise ValueError("This sync bundle was made on this device!")
+    result = {"applied": 0, "deleted": 0, "skipped": 0}
+    item_ids = {}
+    box_names = set()
+    with transaction(conn):
+        for entry in bundle["checks"]:
+            outcome = apply_entry(conn, own, entry, item_ids)
+            result[outcome] += 1
+            if outcome == "applied":
+                box_names.add(entry["box_name"])
+        conn.execute("UPDATE sync_state SET apply_stamp = NULL, apply_device = NULL WHERE id = 1")
+
+        acked, received = peer_state(conn, sender)
+        if bundle["peer"] == own:
+            acked = max(acked, bundle["ack"])
+            # Without a gap since what we had, we now have all of it
+            if bundle["since"] <= received:
+                received = max(received, bundle["until"])
+        conn.execute("""
+            INSERT INTO sync_peers (device_id, acked_seq, received_seq, last_sync)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (device_id) DO UPDATE SET
+                acked_seq = excluded.acked_seq,
+                received_seq = excluded.received_seq,
+                last_sync = excluded.last_sync
+        """, (sender, acked, received))
+
+        # Boxes first seen in the bundle join the catalog with the default type
+        new_boxes = sorted(box_names - set(catalog_cache.get(conn).box_names))
+        if new_boxes:
+            add_boxes(conn, new_boxes)
+    return result
+
+
+class SyncRequestHandler:
+    """GET /device returns the device id; POST /sync takes the client's
+    bundle and answers with a bundle for the client. Both answer 401
+    unless the request carries the server's token as
+    ``Authorization: Bearer <token>``.
+
+    make_server mixes this into http.server.BaseHTTPRequestHandler; the
+    HTTP modules are only imported where they are used, as they would
+    double the command line tools' startup time.
+    """
+
+    def authorized(self):
+        """Whether the request carries the server's token; answers 401 if not."""
+        expected = f"Bearer {self.server.token}".encode("utf-8")
+        received = (self.headers.get("Authorization") or "").encode("utf-8")
+        if hmac.compare_digest(received, expected):
+            return True
+        self.send_error(401)
+        return False
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        if self.path != "/device":
+            self.send_error(404)
+            return
+        self.send_body(json.dumps({"device": device_id(self.server.conn)}).encode("utf-8"),
+                       "application/json")
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        if self.path != "/sync":
+            self.send_error(404)
+            return
+        try:
+            bundle = decode_bundle(self.rfile.read(int(self.headers["Content-Length"])))
+            result = apply_bundle(self.server.conn, bundle)
+            reply = build_bundle(self.server.conn, peer=bundle["device"])
+        except (ValueError, KeyError, zlib.error) as e:
+            self.send_error(400, str(e))
+            return
+        self.log_message("from %s: %s; sent %d checks", bundle["device"], result, len(reply["checks"]))
+        self.send_body(encode_bundle(reply), "application/octet-stream")
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(conn, token, host="127.0.0.1", port=SYNC_PORT):
+    """A single-threaded sync server; call serve_forever on the thread
+    that opened ``conn``.
+
+    Clients must present ``token``, a secret shared with every device
+    syncing with this one: a bundle can delete any check. The server only
+    listens on the loopback interface unless ``host`` says otherwise.
+    """
+    import http.server
+
+    if not token:
+        raise ValueError("A sync server needs a token")
+    handler = type("SyncRequestHandler", (SyncRequestHandler, http.server.BaseHTTPRequestHandler), {})
+    server = http.server.HTTPServer((host, port), handler)
+    server.conn = conn
+    server.token = token
+    return server
+
+
+def sync_with_server(conn, url, token, timeout=30, call=None):
+    """Exchange bundles with a sync server at ``url`` (http://host:port),
+    presenting its shared ``token``.
+
+    ``call(fn, *args)`` runs ``fn(conn, *args)`` for the two database
+    steps, building and applying a bundle; by default they run directly
+    on ``conn``. The app passes its writer's DatabaseWorker.call and runs
+    this on a thread of its own, so the HTTP round trips never hold up
+    the writer.
+
+    Returns the apply_bundle counts plus "sent" (checks), "bytes_sent"
+    and "bytes_received".
+    """
+    import urllib.request
+
+    if call is None:
+        call = lambda fn, *args: fn(conn, *args)
+    url = url.rstrip("/")
+    authorization = {"Authorization": f"Bearer {token}"}
+    request = urllib.request.Request(url + "/device", headers=authorization)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        peer = json.loads(response.read().decode("utf-8"))["device"]
+    bundle = call(build_bundle, peer)
+    data = encode_bundle(bundle)
+    request = urllib.request.Request(
+        url + "/sync", data=data, method="POST",
+        headers={"Content-Type": "application/octet-stream", **authorization},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        reply_data = response.read()
+    result = call(apply_bundle, decode_bundle(reply_data))
+    result.update(sent=len(bundle["checks"]), bytes_sent=len(data), bytes_received=len(reply_data))
+    return result
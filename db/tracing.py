@@ -0,0 +1,174 @@
+"""Lightweight timing instrumentation with Chrome trace export.
+
+``tracer`` records complete events (name, category, start, duration,
+thread) into a bounded ring buffer and keeps running totals per event, so
+recording costs two ``perf_counter`` calls and a deque append. SQL
+statements are timed by db.connection, worker tasks by db.worker, and the
+app adds screen, card build and frame-time events.
+
+``export_chrome_trace`` writes the buffer in the Chrome trace event format,
+which chrome://tracing and https://ui.perfetto.dev open directly.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Events kept for export and the live overlay; older ones are dropped
+EVENT_CAPACITY = 20000
+
+# Categories used across the app
+SQL = "sql"
+TASK = "db-task"
+SCREEN = "screen"
+CARD = "card"
+FRAME = "frame"
+
+
+def statement_name(sql, limit=80):
+    """Short single-line event name for an SQL statement."""
+    name = " ".join(sql.split())
+    return name if len(name) <= limit else name[:limit - 3] + "..."
+
+
+class Tracer:
+    """Thread-safe recorder of timed events."""
+
+    def __init__(self, capacity=EVENT_CAPACITY):
+        self.enabled = True
+        self.events = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.totals = {} # (category, name) -> [count, total seconds, max seconds]
+        self.thread_names = {}
+        self.origin = time.perf_counter()
+
+    def add(self, name, category, start, duration):
+        """Record an event that began at ``start`` (a perf_counter value)."""
+        if not self.enabled:
+            return
+        thread_id = threading.get_ident()
+        self.events.append((category, name, start, duration, thread_id))
+        with self.lock:
+            if thread_id not in self.thread_names:
+                self.thread_names[thread_id] = threading.current_thread().name
+            totals = self.totals.get((category, name))
+            if totals is None:
+                self.totals[(category, name)] = [1, duration, duration]
+            else:
+                totals[0] += 1
+                totals[1] += duration
+                if duration > totals[2]:
+                    totals[2] = duration
+
+    @contextmanager
+    def span(self, name, category):
+        """Time the enclosed block as one event."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, category, start, time.perf_counter() - start)
+
+    def timed(self, category, name=None):
+        """Decorator timing every call of a function or method."""
+        def decorate(fn):
+            event_name = name or fn.__qualname__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.add(event_name, category, start, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.totals.clear()
+
+    def recent(self, seconds):
+        """Return the buffered events that began in the last ``seconds``."""
+        since = time.perf_counter() - seconds
+        events = []
+        # Snapshot first: other threads keep appending
+        for event in reversed(list(self.events)):
+            if event[2] < since:
+                break
+            events.append(event)
+        events.reverse()
+        return events
+
+    def summary(self, seconds=5.0):
+        """Return {category: {"count", "total_ms", "max_ms", "last"}} over the
+        last ``seconds``; "last" is (name, ms) of the latest event."""
+        summary = {}
+        for category, name, _, duration, _ in self.recent(seconds):
+            entry = summary.get(category)
+            if entry is None:
+                entry = summary[category] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            ms = duration * 1000
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["last"] = (name, ms)
+        return summary
+
+    def slowest(self, category, limit=10):
+        """Return (name, count, total_ms, max_ms) rows with the most total time."""
+        with self.lock:
+            rows = [
+                (name, count, total * 1000, longest * 1000)
+                for (event_category, name), (count, total, longest) in self.totals.items()
+                if event_category == category
+            ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:limit]
+
+    def chrome_trace(self):
+        """The buffered events as a Chrome trace format dict."""
+        pid = os.getpid()
+        with self.lock:
+            thread_names = dict(self.thread_names)
+        trace_events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+             "args": {"name": thread_name}}
+            for thread_id, thread_name in thread_names.items()
+        ]
+        for category, name, start, duration, thread_id in list(self.events):
+            trace_events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                # Microseconds since the tracer was created
+                "ts": round((start - self.origin) * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "pid": pid,
+                "tid": thread_id,
+            })
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        """Write the trace to ``path``; returns the number of events written."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        trace = self.chrome_trace()
+        partial_path = path + ".part"
+        with open(partial_path, "w", encoding="utf-8") as out:
+            json.dump(trace, out, separators=(",", ":"))
+        os.replace(partial_path, path)
+        return sum(1 for event in trace["traceEvents"] if event["ph"] == "X")
+
+
+tracer = Tracer()
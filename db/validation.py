@@ -0,0 +1,44 @@
+"""Validation rules shared by the check form and the bulk importer."""
+from datetime import date, datetime
+from functools import lru_cache
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+@lru_cache(maxsize=65536)
+def is_valid_date(text):
+    """Whether text is a YYYY-MM-DD date (cached: the same dates recur a lot)."""
+    if len(text) == 10 and text[4] == "-" and text[7] == "-":
+        # Fast path for the zero-padded form almost every value uses
+        try:
+            date.fromisoformat(text)
+            return True
+        except ValueError:
+            pass
+    try:
+        datetime.strptime(text, DATE_FORMAT)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_quantity(item_name, text):
+    """Quantity field value as an int; blank means 0."""
+    try:
+        return int(text) if text else 0
+    except ValueError:
+        raise ValueError(f"Quantity for {item_name} must be a number!")
+
+
+def check_expiry_date(item_name, text):
+    """Return the expiry date text, which may be blank, if it is valid."""
+    if text and not is_valid_date(text):
+        raise ValueError(f"Expiry date for {item_name} must be in YYYY-MM-DD format!")
+    return text
+
+
+def check_check_date(text):
+    """Return the check date text if it is a valid YYYY-MM-DD date."""
+    if not is_valid_date(text):
+        raise ValueError("Check Date must be in YYYY-MM-DD format!")
+    return text
@@ -0,0 +1,102 @@
+"""Run database calls on a dedicated thread that owns its connection."""
+import queue
+import threading
+from concurrent.futures import Future
+from functools import partial
+
+from db.tracing import TASK, tracer
+
+
+def call_directly(callback):
+    """Default dispatcher: run result callbacks on the worker thread."""
+    callback()
+
+
+class DatabaseWorker:
+    """Serializes calls of the form ``fn(conn, *args)`` on one thread.
+
+    ``connect`` is called on the worker thread to open the connection, since
+    sqlite3 connections must stay on the thread that created them.
+    ``dispatch`` receives a zero-argument callable whenever a result callback
+    is due; the GUI passes one that goes through ``Clock.schedule_once`` so
+    callbacks run on the main thread.
+    """
+
+    def __init__(self, connect, dispatch=call_directly, name="db-worker"):
+        self.connect = connect
+        self.dispatch = dispatch
+        self.tasks = queue.Queue()
+        self.busy = False # True while a call is running
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args, on_success=None, on_error=None, **kwargs):
+        """Queue ``fn(conn, *args, **kwargs)`` and return a Future.
+
+        ``on_success(result)`` or ``on_error(exception)`` are delivered
+        through the dispatcher once the call finishes.
+        """
+        future = Future()
+        if on_success or on_error:
+            future.add_done_callback(
+                lambda done: self.dispatch(partial(self.deliver, done, on_success, on_error))
+            )
+        self.tasks.put((future, fn, args, kwargs))
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        """Run ``fn`` on the worker and block until it returns."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def idle(self):
+        """Whether nothing is running or queued, for background housekeeping."""
+        return not self.busy and self.tasks.empty()
+
+    @staticmethod
+    def deliver(future, on_success, on_error):
+        error = future.exception()
+        if error is None:
+            if on_success:
+                on_success(future.result())
+        elif on_error:
+            on_error(error)
+        else:
+            print(f"Unhandled database error: {error}")
+
+    def run(self):
+        conn = None
+        connect_error = None
+        try:
+            conn = self.connect()
+        except Exception as e:
+            connect_error = e
+
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            future, fn, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            if connect_error is not None:
+                future.set_exception(connect_error)
+                continue
+            self.busy = True
+            try:
+                with tracer.span(getattr(fn, "__qualname__", "task"), TASK):
+                    result = fn(conn, *args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                self.busy = False
+
+        if conn is not None:
+            conn.close()
+
+    def stop(self, wait=True):
+        """Finish the queued calls, then close the connection."""
+        self.tasks.put(None)
+        if wait:
+            self.thread.join()
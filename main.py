@@ -1,5 +1,15 @@
 # main.py
-import sqlite3
+import time
+LAUNCH_TIME = time.perf_counter()
+import sys
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # "python main.py summary" etc. run the headless tools without importing Kivy
+    import cli
+    if cli.COMMANDS.intersection(sys.argv[1:]):
+        sys.exit(cli.main(sys.argv[1:]))
+
+import threading
 from datetime import datetime
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
@@ -8,46 +18,230 @@ from kivymd.uix.menu import MDDropdownMenu
 from kivy.lang import Builder
 from kivymd.uix.label import MDLabel
 from kivymd.uix.dialog import MDDialog
-from kivy.properties import StringProperty, ListProperty
+from kivy.properties import StringProperty, ListProperty, NumericProperty, BooleanProperty, ObjectProperty
+from kivy.clock import Clock
 from kivymd.uix.button import MDFlatButton, MDRaisedButton
 from kivymd.uix.list import OneLineListItem, TwoLineListItem
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.card import MDCard
 from kivymd.uix.textfield import MDTextField
+from kivymd.uix.toolbar import MDTopAppBar
 # Removed: from kivymd.uix.separator import MDSeparator # Not available in KivyMD 1.2.0
 from kivymd.toast import toast
 from kivy.metrics import dp
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.scrollview import ScrollView
 import os
 
+from db import analytics, changes, dates, drafts, export, fleet, reports, repository, retention, search, status, sync, validation
+from db.catalog import catalog_cache
+from db.details import details_cache
+from db.connection import ConnectionManager
+from db.tracing import CARD, FRAME, SCREEN, SQL, TASK, tracer
+from db.worker import DatabaseWorker
+
+IMPORT_SECONDS = time.perf_counter() - LAUNCH_TIME
+
 # Define colour variables
 sage = (0.584, 0.773, 0.584, 1)  
 mauve = (0.741, 0.553, 0.773, 1)
 black = (0, 0, 0, 1)
 white = (1, 1, 1, 1)
 
-# Define the standard contents for each First Aid Box
-STANDARD_BOX_CONTENTS = {
-    "General First Aid Guidance Card": 1,
-    "Assorted Sterile Plasters": 20,
-    "Safety Pins": 6,
-    "Medium Sterile Dressing (12cm x 12cm)": 6,
-    "Large Sterile Dressing (18cm x 18cm)": 2,
-    "Sterile Eye Pad Dressing": 2,
-    "Sterile Saline Alcohol Free Cleansing Wipe": 6,
-    "Nitrile Examination Gloves - Large (Pair)": 4,
-    "Non Sterile Non Woven Triangular Bandage": 4,
+# Number of history rows fetched per keyset page
+HISTORY_PAGE_SIZE = 50
+# (label, status_mask) choices of the history status filter
+HISTORY_STATUS_FILTERS = (
+    ("Any status", 0),
+    ("Low stock", status.LOW_STOCK_FLAG),
+    ("Expired", status.EXPIRED_FLAG),
+    ("Low or expired", status.LOW_STOCK_FLAG | status.EXPIRED_FLAG),
+)
+
+# Checks older than this are archived; 0 turns archiving off. Stored in the
+# app's config file (section "retention", key "archive_after_months").
+ARCHIVE_AFTER_MONTHS = 24
+# Seconds after start before housekeeping begins, and between its steps
+MAINTENANCE_START_DELAY = 30
+MAINTENANCE_INTERVAL = 2
+
+# Frames taking longer than this are recorded as spikes. Instrumentation can
+# be turned off in the app's config file (section "instrumentation", key
+# "enabled").
+FRAME_SPIKE_MS = 50
+# Seconds between overlay refreshes, and the window its numbers cover
+OVERLAY_INTERVAL = 0.5
+OVERLAY_WINDOW = 5
+
+# Seconds of quiet after an edit before the check form's draft is written
+DRAFT_SAVE_DELAY = 1.5
+
+# History rows either side of a tapped one whose details are prefetched
+DETAILS_PREFETCH_RADIUS = 2
+
+# Expiry horizons, in days, offered on the restock list and expiry screens
+RESTOCK_HORIZONS = (30, 90, 180)
+EXPIRY_HORIZONS = (7, 30, 90)
+
+# KV file for each screen; parsed the first time the screen is shown.
+# Screens not listed build their widgets in Python.
+KV_FILES = {
+    'home': 'screens/home.kv',
+    'boxcheck': 'screens/boxcheck.kv',
+    'checkhistory': 'screens/checkhistory.kv',
+    'checkdetails': 'screens/checkdetails.kv',
 }
 
-# Load all KV files
-KV_FILES = [
-    'screens/home.kv',
-    'screens/boxcheck.kv',
-    'screens/checkhistory.kv',
-    'screens/checkdetails.kv'
-]
 
-for kv_file in KV_FILES:
-    Builder.load_file(kv_file)
+class StartupTimer:
+    """Collects cold start timings and prints a breakdown once startup is done"""
+
+    def __init__(self, pending=("DB setup", "first frame")):
+        self.phases = {"import": IMPORT_SECONDS}
+        self.pending = set(pending)
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def finish(self, phase, seconds):
+        """Record a one-off phase and print the report after the last one."""
+        self.add(phase, seconds)
+        self.pending.discard(phase)
+        if not self.pending:
+            print(self.report())
+
+    def report(self):
+        parts = [f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases.items()]
+        return f"Startup: {', '.join(parts)}"
+
+
+def run_on_main_thread(callback):
+    """Dispatcher for DatabaseWorker results: run them on the Kivy thread."""
+    Clock.schedule_once(lambda dt: callback())
+
+
+class FrameMonitor:
+    """Counts frames and records those slower than FRAME_SPIKE_MS"""
+
+    def __init__(self, spike_ms=FRAME_SPIKE_MS):
+        self.spike_seconds = spike_ms / 1000
+        self.frames = 0
+        self.event = None
+
+    def start(self):
+        if self.event is None:
+            self.event = Clock.schedule_interval(self.on_frame, 0)
+
+    def stop(self):
+        if self.event is not None:
+            self.event.cancel()
+            self.event = None
+
+    def on_frame(self, dt):
+        self.frames += 1
+        if dt > self.spike_seconds and self.frames > 1: # The first dt includes startup
+            tracer.add("frame", FRAME, time.perf_counter() - dt, dt)
+
+
+class PerformanceOverlay:
+    """Live SQL, screen, card and frame timings drawn over every screen"""
+
+    def __init__(self, frame_monitor):
+        self.frame_monitor = frame_monitor
+        self.label = MDLabel(
+            font_style="Caption",
+            theme_text_color="Custom",
+            text_color=white,
+            md_bg_color=(0, 0, 0, 0.65),
+            halign="left",
+            valign="top",
+            padding=(dp(6), dp(4)),
+            size_hint=(None, None),
+            size=(dp(340), dp(128)),
+            pos=(dp(8), dp(8)),
+        )
+        self.event = None
+        self.last_frames = 0
+        self.last_time = time.perf_counter()
+
+    @property
+    def visible(self):
+        return self.event is not None
+
+    def toggle(self):
+        from kivy.core.window import Window
+
+        if self.visible:
+            self.event.cancel()
+            self.event = None
+            Window.remove_widget(self.label)
+        else:
+            Window.add_widget(self.label)
+            self.last_frames = self.frame_monitor.frames
+            self.last_time = time.perf_counter()
+            self.update()
+            self.event = Clock.schedule_interval(self.update, OVERLAY_INTERVAL)
+
+    def update(self, *args):
+        now = time.perf_counter()
+        frames = self.frame_monitor.frames
+        fps = (frames - self.last_frames) / (now - self.last_time) if now > self.last_time else 0.0
+        self.last_frames, self.last_time = frames, now
+
+        summary = tracer.summary(OVERLAY_WINDOW)
+        lines = [f"Last {OVERLAY_WINDOW} s" + ("" if tracer.enabled else " (tracing off)")]
+        for category, label in ((SQL, "SQL"), (TASK, "DB tasks"), (CARD, "Cards")):
+            entry = summary.get(category)
+            if entry:
+                lines.append(
+                    f"{label}: {entry['count']}, {entry['total_ms']:.1f} ms total, "
+                    f"max {entry['max_ms']:.1f} ms"
+                )
+            else:
+                lines.append(f"{label}: none")
+        screen = summary.get(SCREEN)
+        if screen:
+            name, ms = screen["last"]
+            lines.append(f"Screen: {name} {ms:.1f} ms")
+        cache = details_cache.stats()
+        lines.append(
+            f"Details cache: {cache['hits']} hits, {cache['misses']} misses, "
+            f"{cache['prefetched']} prefetched"
+        )
+        spikes = summary.get(FRAME)
+        lines.append(
+            f"Frames: {fps:.0f} fps, {spikes['count'] if spikes else 0} spikes"
+            + (f", worst {spikes['max_ms']:.0f} ms" if spikes else "")
+        )
+        self.label.text = "\n".join(lines)
+
+
+class LazyScreenManager(MDScreenManager):
+    """Screen manager that parses KV and builds each screen on first use"""
+
+    def __init__(self, screen_classes, startup_timer=None, **kwargs):
+        super().__init__(**kwargs)
+        self.pending_screens = dict(screen_classes)
+        self.startup_timer = startup_timer
+
+    def get_screen(self, name):
+        if name in self.pending_screens:
+            self.load_screen(name)
+        return super().get_screen(name)
+
+    def load_screen(self, name):
+        """Parse the screen's KV file and add a new instance of it."""
+        screen_class = self.pending_screens.pop(name)
+
+        with tracer.span(f"build {name}", SCREEN):
+            if name in KV_FILES:
+                start = time.perf_counter()
+                Builder.load_file(KV_FILES[name])
+                if self.startup_timer:
+                    self.startup_timer.add("KV parse", time.perf_counter() - start)
+
+            self.add_widget(screen_class(name=name))
 
 # Add this to your main.py file, after the imports and before the existing classes
 
@@ -69,24 +263,23 @@ class ItemCheckCard(MDCard):
             **kwargs
         )
         
-        # Store item data
-        self.item_name = item_name
-        self.standard_qty = standard_qty
-        
-        # Create the UI elements
-        self.setup_ui(current_qty, expiry_date, item_notes)
+        self.edit_callback = None # Called with the card when the user edits a field
+        self.binding = False # True while fields are filled in programmatically
+
+        # Create the UI elements, then fill them with the item data
+        self.setup_ui()
+        self.bind_item(item_name, standard_qty, current_qty, expiry_date, item_notes)
     
-    def setup_ui(self, current_qty, expiry_date, item_notes):
+    def setup_ui(self):
         """Create and add all UI elements to the card"""
         
         # Item title label
-        title_label = MDLabel(
-            text=f"{self.item_name} (Std: {self.standard_qty})",
+        self.title_label = MDLabel(
             font_style="Subtitle1",
             size_hint_y=None,
             height=dp(30)
         )
-        self.add_widget(title_label)
+        self.add_widget(self.title_label)
         
         # Input fields container
         inputs_box = MDBoxLayout(
@@ -101,7 +294,6 @@ class ItemCheckCard(MDCard):
             mode="rectangle",
             size_hint_x=0.5,
             max_text_length=3,
-            text=str(current_qty) if current_qty > 0 else "",
         )
         inputs_box.add_widget(self.qty_input)
         
@@ -111,7 +303,6 @@ class ItemCheckCard(MDCard):
             mode="rectangle",
             size_hint_x=0.5,
             max_text_length=10,
-            text=expiry_date or "",
         )
         inputs_box.add_widget(self.expiry_input)
         
@@ -124,23 +315,41 @@ class ItemCheckCard(MDCard):
             multiline=True,
             size_hint_y=None,
             height=dp(50),
-            text=item_notes or "",
         )
         self.add_widget(self.notes_input)
+
+        for field in (self.qty_input, self.expiry_input, self.notes_input):
+            field.bind(text=self.on_field_text)
+
+    def on_field_text(self, field, text):
+        if not self.binding and self.edit_callback:
+            self.edit_callback(self)
+
+    def bind_item(self, item_name, standard_qty, current_qty=0, expiry_date="", item_notes=""):
+        """Show a (possibly different) item on this card, reusing its widgets"""
+        self.item_name = item_name
+        self.standard_qty = standard_qty
+        self.title_label.text = f"{item_name} (Std: {standard_qty})"
+        self.set_fields(str(current_qty) if current_qty > 0 else "", expiry_date or "", item_notes or "")
+
+    def set_fields(self, qty_text, expiry_text, notes_text):
+        """Fill the inputs without reporting it as an edit"""
+        self.binding = True
+        try:
+            self.qty_input.text = qty_text
+            self.expiry_input.text = expiry_text
+            self.notes_input.text = notes_text
+        finally:
+            self.binding = False
+
+    def get_draft_fields(self):
+        """(item_name, qty_text, expiry_text, notes_text) exactly as typed"""
+        return (self.item_name, self.qty_input.text, self.expiry_input.text, self.notes_input.text)
     
     def get_item_data(self):
         """Get the current data from the card inputs"""
-        try:
-            current_qty = int(self.qty_input.text) if self.qty_input.text else 0
-        except ValueError:
-            raise ValueError(f"Quantity for {self.item_name} must be a number!")
-        
-        expiry_date = self.expiry_input.text
-        if expiry_date:
-            try:
-                datetime.strptime(expiry_date, "%Y-%m-%d")
-            except ValueError:
-                raise ValueError(f"Expiry date for {self.item_name} must be in YYYY-MM-DD format!")
+        current_qty = validation.parse_quantity(self.item_name, self.qty_input.text)
+        expiry_date = validation.check_expiry_date(self.item_name, self.expiry_input.text)
         
         return {
             'item_name': self.item_name,
@@ -152,9 +361,7 @@ class ItemCheckCard(MDCard):
     
     def clear_inputs(self):
         """Clear all input fields"""
-        self.qty_input.text = ""
-        self.expiry_input.text = ""
-        self.notes_input.text = ""
+        self.set_fields("", "", "")
         
         
         
@@ -169,20 +376,14 @@ class DatabaseMixin:
         return MDApp.get_running_app()
 
     @property
-    def cursor(self):
-        return self.app.cursor
+    def db(self):
+        """Worker for writes (and anything that must follow them in order)"""
+        return self.app.db
 
     @property
-    def conn(self):
-        return self.app.conn
-
-    def get_first_aid_boxes(self):
-        """Returns a list of predefined first aid box names."""
-        return ["Back Kitchen", "Cafe", "Upstairs"]
-
-    def get_standard_item_quantity(self, item_name):
-        """Get the standard quantity for a given item."""
-        return STANDARD_BOX_CONTENTS.get(item_name, 0)
+    def db_reader(self):
+        """Worker with a read-only connection; runs alongside writes"""
+        return self.app.db_reader
 
     def format_date_for_display(self, date_str):
         """Format ISO date string for display"""
@@ -218,69 +419,419 @@ class DialogMixin:
         confirm_dialog.open()
 
 
-class HomeScreen(MDScreen):
+class FleetBoxItem(TwoLineListItem):
+    """Recycled row of the home screen's fleet dashboard"""
+    check_id = NumericProperty(0)
+
+    def on_release(self):
+        if self.check_id:
+            app = MDApp.get_running_app()
+            app.screen_manager.get_screen("checkdetails").load_check_details(self.check_id)
+            app.screen_manager.current = "checkdetails"
+
+
+class HomeScreen(MDScreen, DatabaseMixin):
+    loading = BooleanProperty(False)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = "home"
+        self.dashboard = None
+
+    def on_enter(self, *args):
+        self.load_fleet_status()
+
+    def build_dashboard(self):
+        """Add the fleet dashboard below the KV-declared home layout."""
+        self.dashboard = MDBoxLayout(orientation="vertical", padding=("8dp", 0))
+        self.fleet_summary = MDLabel(
+            text="Loading box status...",
+            size_hint_y=None,
+            height=dp(32),
+            theme_text_color="Secondary",
+        )
+        self.dashboard.add_widget(self.fleet_summary)
+        self.fleet_view = RecycleView()
+        self.fleet_view.viewclass = "FleetBoxItem"
+        layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, dp(72)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+        )
+        layout.bind(minimum_height=layout.setter("height"))
+        self.fleet_view.add_widget(layout)
+        self.dashboard.add_widget(self.fleet_view)
+        host = self.children[0] if self.children else self
+        host.add_widget(self.dashboard)
+
+    def load_fleet_status(self):
+        """Catch box_status up with recent changes and show it"""
+        if self.dashboard is None:
+            self.build_dashboard()
+        if self.loading:
+            return
+        self.loading = True
+        # On the writer: catching up updates box_status
+        self.db.submit(
+            fleet.update_and_status,
+            on_success=self.on_fleet_status_loaded,
+            on_error=self.on_fleet_status_error,
+        )
+
+    @tracer.timed(SCREEN)
+    def on_fleet_status_loaded(self, boxes):
+        self.loading = False
+        overdue = sum(box["overdue"] for box in boxes)
+        low = sum(1 for box in boxes if box["low_stock"])
+        expired = sum(box["expired_since"] for box in boxes)
+        self.fleet_summary.text = f"{len(boxes)} boxes: {overdue} overdue, {low} low, {expired} expired"
+        self.fleet_view.data = [self.fleet_row_data(box) for box in boxes]
+
+    def on_fleet_status_error(self, error):
+        self.loading = False
+        print(f"Error loading box status: {error}")
+        self.fleet_summary.text = "Box status unavailable"
+
+    def fleet_row_data(self, box):
+        if box["check_id"] is None:
+            checked = "Never checked"
+        else:
+            checked = (f"Checked {self.format_date_for_display(box['check_date'])}"
+                       f" ({box['days_since']} days ago)")
+        problems = []
+        if box["overdue"] and box["check_id"] is not None:
+            problems.append("overdue")
+        if box["low_stock"]:
+            problems.append(f"{box['low_stock']} low")
+        if box["expired_since"]:
+            problems.append("expired items")
+        title = f"{box['box_name']} ({box['site']})" if box["site"] else box["box_name"]
+        return {
+            "text": title,
+            "secondary_text": f"{checked}. {', '.join(problems) or 'OK'}",
+            "check_id": box["check_id"] or 0,
+        }
+
+
+class BoxPickerItem(OneLineListItem):
+    """Recycled row of the box picker"""
+    box_name = StringProperty("")
+    picker = ObjectProperty(None, allownone=True)
+
+    def on_release(self):
+        if self.picker:
+            self.picker.select(self.box_name)
+
+
+class BoxPicker:
+    """Dialog for choosing a box, filtered as the user types.
+
+    Only the rows on screen exist as widgets, so the catalog can hold
+    thousands of boxes. When the new search text contains the previous one,
+    only the previous matches are filtered again.
+    """
+
+    def __init__(self, on_select):
+        self.on_select = on_select
+        self.catalog = None
+        self.last_text = ""
+        self.last_matches = None
+
+        content = MDBoxLayout(orientation="vertical", spacing="8dp", size_hint_y=None, height=dp(360))
+        self.search_field = MDTextField(
+            hint_text="Search boxes or sites",
+            size_hint_y=None,
+            height=dp(48),
+        )
+        self.search_field.bind(text=lambda field, text: self.show_matches(text))
+        content.add_widget(self.search_field)
+
+        self.results = RecycleView()
+        self.results.viewclass = "BoxPickerItem"
+        layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, dp(48)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+        )
+        layout.bind(minimum_height=layout.setter("height"))
+        self.results.add_widget(layout)
+        content.add_widget(self.results)
+
+        self.dialog = MDDialog(
+            title="Select First Aid Box",
+            type="custom",
+            content_cls=content,
+            buttons=[MDFlatButton(text="CANCEL", on_release=lambda x: self.dismiss())],
+        )
+
+    def open(self, catalog):
+        """Open the picker over a catalog snapshot"""
+        self.catalog = catalog
+        self.last_matches = None
+        if self.search_field.text:
+            self.search_field.text = "" # Triggers show_matches
+        else:
+            self.show_matches("")
+        self.dialog.open()
+
+    def show_matches(self, text):
+        """Show the boxes whose name or site contains ``text``"""
+        if self.catalog is None:
+            return
+        text = text.strip().lower()
+        within = self.last_matches if self.last_matches is not None and self.last_text in text else None
+        matches = self.catalog.search(text, within)
+        self.last_text, self.last_matches = text, matches
+
+        boxes = self.catalog.boxes
+        data = []
+        for index in matches:
+            name, site = boxes[index][0], boxes[index][1]
+            data.append({
+                "text": f"{name} ({site})" if site else name,
+                "box_name": name,
+                "picker": self,
+            })
+        self.results.data = data
+        self.results.scroll_y = 1
+
+    def select(self, box_name):
+        self.on_select(box_name)
+
+    def dismiss(self):
+        self.dialog.dismiss()
+
+
+class DraftRecorder:
+    """Coalesces check form edits into small background draft writes.
+
+    Edits only mark the header or a card dirty and restart a short timer;
+    when it fires, the header and the dirty cards' fields are queued on the
+    writer worker in one transaction, so typing never waits on the disk.
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.dirty_cards = set()
+        self.dirty = False
+        self.reset_pending = False # Next write replaces the stored items
+        self.paused = False # Set while the screen fills in its own fields
+        self.trigger = Clock.create_trigger(self.flush, DRAFT_SAVE_DELAY)
+
+    def field_changed(self, card=None):
+        """Record an edit to a card, or to the header fields when card is None"""
+        if self.paused:
+            return
+        if card is not None:
+            self.dirty_cards.add(card)
+        self.dirty = True
+        self.trigger()
+
+    def start_new(self):
+        """A different check is now in the form; its first write starts afresh"""
+        self.trigger.cancel()
+        self.dirty_cards.clear()
+        self.dirty = False
+        self.reset_pending = True
+
+    def flush(self, *args):
+        """Queue the pending edits now"""
+        self.trigger.cancel()
+        if not self.dirty:
+            return
+        screen = self.screen
+        cards = screen.active_cards() if self.reset_pending else self.dirty_cards
+        header = (
+            screen.current_check_id,
+            screen.selected_box,
+            screen.ids.check_date_input.text,
+            screen.ids.notes_input.text,
+        )
+        items = [card.get_draft_fields() for card in cards if card.parent is not None]
+        screen.db.submit(
+            drafts.save_draft, header, items, reset=self.reset_pending,
+            on_error=lambda error: print(f"Error saving draft: {error}"),
+        )
+        self.dirty_cards.clear()
+        self.dirty = False
+        self.reset_pending = False
+
+    def discard(self):
+        """Forget pending edits and delete the stored draft"""
+        self.start_new()
+        self.screen.db.submit(
+            drafts.clear_draft,
+            on_error=lambda error: print(f"Error clearing draft: {error}"),
+        )
 
 
 # Replace your existing BoxCheckScreen class with this updated version
 
 class BoxCheckScreen(MDScreen, DatabaseMixin, DialogMixin):
     selected_box = StringProperty("Select First Aid Box")
+    loading = BooleanProperty(False) # True while a save or edit-load is in flight
+    box_picker = None
     current_check_id = None
+    card_pool = None # ItemCheckCards kept alive and rebound between boxes/checks
+    edit_pending = False # Set by load_check_for_edit so on_enter keeps the loaded check
+    stored_check = None # (box_name, check_date, general_notes) as last saved
+    stored_items = {} # item_name -> (standard_qty, current_qty, expiry_date, item_notes) as last saved
+    pending_draft = None # Draft being resumed, applied once its cards are shown
+    draft_dialog = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.draft = DraftRecorder(self)
+        self.ids.check_date_input.bind(text=lambda field, text: self.draft.field_changed())
+        self.ids.notes_input.bind(text=lambda field, text: self.draft.field_changed())
     
+    @tracer.timed(SCREEN)
     def on_enter(self):
+        if self.edit_pending:
+            self.edit_pending = False
+            return
         self.current_check_id = None
+        self.stored_check = None
+        self.stored_items = {}
+        self.pending_draft = None
+        self.draft.paused = True
         self.ids.check_date_input.text = datetime.now().strftime("%Y-%m-%d")
         self.ids.notes_input.text = ""
         self.clear_item_inputs()
         self.selected_box = "Select First Aid Box"
+        self.draft.paused = False
+        self.draft.start_new()
+        # On the writer, so it sees draft writes still in its queue
+        self.db.submit(
+            drafts.get_draft,
+            on_success=self.offer_draft,
+            on_error=lambda error: print(f"Error loading draft: {error}"),
+        )
 
-    def setup_box_menu(self):
-        """Setup the first aid box dropdown menu"""
-        box_names = self.get_first_aid_boxes()
-        
-        box_items = [
-            {
-                "text": box_name,
-                "viewclass": "OneLineListItem",
-                "on_release": lambda x=box_name: self.set_first_aid_box(x),
-            }
-            for box_name in box_names
-        ]
-        
-        self.box_menu = MDDropdownMenu(
-            caller=self.ids.box_selector_card,
-            items=box_items,
-            position="bottom",
-            width_mult=4,
+    def on_leave(self):
+        self.draft.flush()
+
+    def offer_draft(self, draft):
+        """Ask whether to carry on with a check left unsaved"""
+        if draft is None or self.manager.current != self.name or self.current_check_id:
+            return
+        (check_id, box_name, check_date, _), items, updated_at = draft
+        kind = "edit of the" if check_id else "new"
+        self.draft_dialog = MDDialog(
+            title="Resume unsaved check?",
+            text=f"An unsaved {kind} check of {box_name} dated {check_date} "
+                 f"was last changed at {updated_at} (UTC).",
+            auto_dismiss=False,
+            buttons=[
+                MDFlatButton(text="DISCARD", on_release=lambda x: self.discard_draft()),
+                MDRaisedButton(
+                    text="RESUME",
+                    md_bg_color=self.app.theme_cls.primary_color,
+                    on_release=lambda x: self.resume_draft(draft),
+                ),
+            ],
         )
+        self.draft_dialog.open()
+
+    def discard_draft(self):
+        self.draft_dialog.dismiss()
+        self.draft.discard()
+
+    def resume_draft(self, draft):
+        """Refill the form from a draft: load the box or check, then its fields"""
+        self.draft_dialog.dismiss()
+        (check_id, box_name, _, _), _, _ = draft
+        self.pending_draft = draft
+        if check_id:
+            self.load_check_for_edit(check_id)
+            self.edit_pending = False # Already on this screen
+        else:
+            self.selected_box = box_name
+            self.load_box_contents_for_check()
+
+    def apply_pending_draft(self):
+        """Put the draft's typed text back into the header and cards"""
+        (_, _, check_date, general_notes), items, _ = self.pending_draft
+        self.pending_draft = None
+        self.draft.paused = True
+        self.ids.check_date_input.text = check_date
+        self.ids.notes_input.text = general_notes
+        self.draft.paused = False
+        for card in self.active_cards():
+            if card.item_name in items:
+                card.set_fields(*items[card.item_name])
+        # Later edits update the stored draft as usual
+        self.draft.reset_pending = False
 
     def open_box_menu(self):
-        """Open the first aid box dropdown menu"""
-        if not hasattr(self, 'box_menu') or not self.box_menu:
-            self.setup_box_menu()
-        self.box_menu.open()
+        """Open the searchable first aid box picker"""
+        self.db_reader.submit(
+            catalog_cache.get,
+            on_success=self.show_box_picker,
+            on_error=self.on_catalog_error,
+        )
+
+    def show_box_picker(self, catalog):
+        """Show the picker once the catalog snapshot is available"""
+        if self.box_picker is None:
+            self.box_picker = BoxPicker(on_select=self.set_first_aid_box)
+        self.box_picker.open(catalog)
+
+    def on_catalog_error(self, error):
+        print(f"Error loading box catalog: {error}")
+        toast("Error loading first aid boxes.")
 
     def set_first_aid_box(self, box_name):
         """Set the selected first aid box and load its contents for check."""
         self.selected_box = box_name
-        self.box_menu.dismiss()
+        self.box_picker.dismiss()
+        self.draft.start_new()
         self.load_box_contents_for_check()
 
     def load_box_contents_for_check(self):
         """Load standard contents for the selected box into the form."""
+        box_name = self.selected_box
+        self.db_reader.submit(
+            catalog_cache.get,
+            on_success=lambda catalog: self.show_item_cards(catalog.standard_contents(box_name)),
+            on_error=self.on_catalog_error,
+        )
+
+    def show_item_cards(self, items):
+        """Bind pooled cards to items, only creating cards the pool lacks.
+
+        Each entry of items is (item_name, standard_qty[, current_qty, expiry_date, item_notes]).
+        """
+        if self.card_pool is None:
+            self.card_pool = []
         contents_container = self.ids.contents_container
-        contents_container.clear_widgets()
 
-        for item_name, standard_qty in STANDARD_BOX_CONTENTS.items():
-            # Create the custom card widget
-            card = ItemCheckCard(
-                item_name=item_name,
-                standard_qty=standard_qty
-            )
-            contents_container.add_widget(card)
+        for index, item in enumerate(items):
+            if index < len(self.card_pool):
+                card = self.card_pool[index]
+                with tracer.span("ItemCheckCard rebind", CARD):
+                    card.bind_item(*item)
+            else:
+                with tracer.span("ItemCheckCard build", CARD):
+                    card = ItemCheckCard(*item)
+                card.edit_callback = self.draft.field_changed
+                self.card_pool.append(card)
+            if card.parent is None:
+                contents_container.add_widget(card)
+
+        # Detach spare cards but keep them pooled for a larger box later
+        for card in self.card_pool[len(items):]:
+            if card.parent is not None:
+                contents_container.remove_widget(card)
+
+        if self.pending_draft is not None:
+            self.apply_pending_draft()
+
+    def active_cards(self):
+        """Cards currently shown in the form"""
+        return [card for card in self.card_pool or [] if card.parent is not None]
 
     def clear_item_inputs(self):
         """Clear all item-specific input fields."""
@@ -294,6 +845,9 @@ class BoxCheckScreen(MDScreen, DatabaseMixin, DialogMixin):
         check_date = self.ids.check_date_input.text
         general_notes = self.ids.notes_input.text
 
+        if self.loading:
+            return
+
         if box_name == "Select First Aid Box":
             toast("Please select a First Aid Box!")
             return
@@ -302,9 +856,9 @@ class BoxCheckScreen(MDScreen, DatabaseMixin, DialogMixin):
             check_date = datetime.now().strftime("%Y-%m-%d")
         
         try:
-            datetime.strptime(check_date, "%Y-%m-%d")
-        except ValueError:
-            toast("Check Date must be in YYYY-MM-DD format!")
+            validation.check_check_date(check_date)
+        except ValueError as e:
+            toast(str(e))
             return
 
         # Collect item data using the new method
@@ -324,82 +878,91 @@ class BoxCheckScreen(MDScreen, DatabaseMixin, DialogMixin):
             toast(str(e))
             return
 
-        try:
-            self.conn.execute("BEGIN TRANSACTION;")
-            
-            if self.current_check_id:
-                # Update existing check record
-                self.cursor.execute("""
-                    UPDATE first_aid_checks
-                    SET box_name = ?, check_date = ?, general_notes = ?
-                    WHERE id = ?
-                """, (box_name, check_date, general_notes, self.current_check_id))
-                
-                # Delete old item entries and insert new ones for this check
-                self.cursor.execute("DELETE FROM check_items WHERE check_id = ?", (self.current_check_id,))
-                
-            else:
-                # Insert new check record
-                self.cursor.execute("""
-                    INSERT INTO first_aid_checks (box_name, check_date, general_notes)
-                    VALUES (?, ?, ?)
-                """, (box_name, check_date, general_notes))
-                self.current_check_id = self.cursor.lastrowid
-
-            # Insert item details
-            for item_name, standard_qty, current_qty, expiry_date, item_notes in item_data:
-                self.cursor.execute("""
-                    INSERT INTO check_items (check_id, item_name, standard_quantity, current_quantity, expiry_date, item_notes)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (self.current_check_id, item_name, standard_qty, current_qty, expiry_date, item_notes))
-            
-            self.conn.commit()
-            toast("First Aid Box check saved successfully!")
-            self.app.screen_manager.current = "checkhistory"
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error saving check: {e}")
-            toast("Error saving check. Please try again.")
+        check = (box_name, check_date, general_notes)
+        self.loading = True
+        self.draft.flush() # Keep the draft until the save succeeds
+        toast("Saving check...")
+        self.db.submit(
+            repository.save_check, check, item_data,
+            check_id=self.current_check_id,
+            stored_check=self.stored_check,
+            stored_items=self.stored_items,
+            on_success=lambda check_id: self.on_check_saved(check_id, check, item_data),
+            on_error=self.on_save_error,
+        )
+
+    def on_check_saved(self, check_id, check, item_data):
+        """Record what was written and move on to the history screen."""
+        self.loading = False
+        self.current_check_id = check_id
+        self.stored_check = check
+        self.stored_items = {row[0]: tuple(row[1:]) for row in item_data}
+        details_cache.invalidate(check_id)
+        self.app.update_summaries()
+        self.draft.discard()
+        toast("First Aid Box check saved successfully!")
+        self.app.screen_manager.current = "checkhistory"
+
+    def on_save_error(self, error):
+        self.loading = False
+        print(f"Error saving check: {error}")
+        toast("Error saving check. Please try again.")
 
     def load_check_for_edit(self, check_id):
         """Loads an existing check's data into the input fields for editing"""
         self.current_check_id = check_id
-        try:
-            self.cursor.execute("""
-                SELECT box_name, check_date, general_notes
-                FROM first_aid_checks WHERE id = ?
-            """, (check_id,))
-            check_data = self.cursor.fetchone()
-
-            if check_data:
-                box_name, check_date, general_notes = check_data
-                self.selected_box = box_name
-                self.ids.check_date_input.text = check_date
-                self.ids.notes_input.text = general_notes or ""
-                self.load_box_contents_for_edit(check_id)
-            else:
-                toast("Error: Check not found for editing.")
-                self.current_check_id = None
-        except Exception as e:
-            print(f"Error loading check for edit: {e}")
-            toast("Error loading check for edit.")
+        self.edit_pending = True
+        self.loading = True
+        if self.pending_draft is None:
+            self.draft.start_new()
+        self.db_reader.submit(
+            repository.get_check_for_edit, check_id,
+            on_success=lambda result: self.on_check_loaded_for_edit(check_id, *result),
+            on_error=self.on_edit_load_error,
+        )
+
+    def on_check_loaded_for_edit(self, check_id, check_data, item_details, contents):
+        """Fill the form with a check loaded by load_check_for_edit."""
+        if check_id != self.current_check_id:
+            return # A newer check was requested meanwhile
+        self.loading = False
+
+        if check_data:
+            box_name, check_date, general_notes = check_data
+            self.stored_check = (box_name, check_date, general_notes or "")
+            self.selected_box = box_name
+            self.draft.paused = True
+            self.ids.check_date_input.text = check_date
+            self.ids.notes_input.text = general_notes or ""
+            self.draft.paused = False
+            self.load_box_contents_for_edit(item_details, contents)
+        else:
+            toast("Error: Check not found for editing.")
             self.current_check_id = None
+            self.edit_pending = False
+            if self.pending_draft is not None:
+                # The check was deleted since; its draft cannot be resumed
+                self.pending_draft = None
+                self.draft.discard()
+
+    def on_edit_load_error(self, error):
+        self.loading = False
+        print(f"Error loading check for edit: {error}")
+        toast("Error loading check for edit.")
+        self.current_check_id = None
+        self.edit_pending = False
 
-    def load_box_contents_for_edit(self, check_id):
+    def load_box_contents_for_edit(self, item_details, contents):
         """Load specific item data for editing a check."""
-        contents_container = self.ids.contents_container
-        contents_container.clear_widgets()
-
-        self.cursor.execute("""
-            SELECT item_name, standard_quantity, current_quantity, expiry_date, item_notes
-            FROM check_items WHERE check_id = ?
-        """, (check_id,))
-        item_details = self.cursor.fetchall()
-
         # Create a dictionary for easy lookup of existing item data
         existing_items = {item[0]: item for item in item_details}
+        self.stored_items = {
+            item_name: (standard_qty, current_qty, expiry_date or "", item_notes or "")
+            for item_name, standard_qty, current_qty, expiry_date, item_notes in item_details
+        }
 
-        for item_name, standard_qty in STANDARD_BOX_CONTENTS.items():
+        items = []
+        for item_name, standard_qty in contents:
             current_qty = 0
             expiry_date = ""
             item_notes = ""
@@ -407,76 +970,391 @@ class BoxCheckScreen(MDScreen, DatabaseMixin, DialogMixin):
             if item_name in existing_items:
                 _, _, current_qty, expiry_date, item_notes = existing_items[item_name]
 
-            # Create the custom card widget with existing data
-            card = ItemCheckCard(
-                item_name=item_name,
-                standard_qty=standard_qty,
-                current_qty=current_qty,
-                expiry_date=expiry_date,
-                item_notes=item_notes
-            )
-            contents_container.add_widget(card)
+            items.append((item_name, standard_qty, current_qty, expiry_date, item_notes))
+        self.show_item_cards(items)
+
+
+class CheckHistoryItem(TwoLineListItem):
+    """Recycled row view for the check history list"""
+    check_id = NumericProperty(0)
+    check_date = StringProperty("")
+    archived = BooleanProperty(False)
+
+    def on_release(self):
+        if self.check_id:
+            screen = MDApp.get_running_app().screen_manager.get_screen("checkhistory")
+            screen.show_check_options(self.check_id, self.archived)
+
+
+class CheckHistoryRecycleView(RecycleView):
+    """RecycleView that requests the next page when scrolled near the end"""
+
+    def __init__(self, load_more_callback, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = "CheckHistoryItem"
+        self.load_more_callback = load_more_callback
+
+        layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, dp(72)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+        )
+        layout.bind(minimum_height=layout.setter("height"))
+        self.add_widget(layout)
+        self.bind(scroll_y=self.on_scroll_position)
+
+    def on_scroll_position(self, instance, scroll_y):
+        # scroll_y is 0 at the bottom of the list
+        if self.data and scroll_y <= 0.1:
+            self.load_more_callback()
 
 
 class CheckHistoryScreen(MDScreen, DatabaseMixin, DialogMixin):
+    loading = BooleanProperty(False) # True while a history page is in flight
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = "checkhistory"
         self.dialog = None
-
+        self.history_view = None
+        self.search_field = None
+        self.search_text = "" # Notes search applied to the list; empty shows all checks
+        # Filters of the date-ordered list, passed to repository.get_history_page
+        self.history_filters = {"box_name": None, "date_from": None, "date_to": None, "status_mask": 0}
+        self.filter_bar = None
+        self.box_picker = None
+        self.status_menu = None
+        self.search_trigger = Clock.create_trigger(self.apply_search, 0.25)
+        # (check_date, id) of the last row loaded, or the row offset while searching
+        self.history_cursor = None
+        self.history_exhausted = False
+        self.history_generation = 0 # Bumped on reset so stale pages are dropped
+        self.history_version = None # Change seq the plain list is current as of
+
+    @tracer.timed(SCREEN)
     def on_enter(self):
-        self.load_check_history()
+        self.refresh_history()
+
+    def get_history_view(self):
+        """Swap the KV-declared list for a RecycleView on first use."""
+        if self.history_view is None:
+            placeholder = self.ids.check_history_list
+            if isinstance(placeholder.parent, ScrollView):
+                placeholder = placeholder.parent
+            host = placeholder.parent
+            index = host.children.index(placeholder)
+            host.remove_widget(placeholder)
+
+            self.history_view = CheckHistoryRecycleView(
+                load_more_callback=self.load_next_history_page
+            )
+            host.add_widget(self.history_view, index=index)
+
+            # Notes search box directly above the list
+            self.search_field = MDTextField(
+                hint_text="Search notes",
+                mode="rectangle",
+                size_hint_y=None,
+                height=dp(48),
+            )
+            self.search_field.bind(text=lambda field, text: self.search_trigger())
+            host.add_widget(self.build_filter_bar(), index=index + 1)
+            host.add_widget(self.search_field, index=index + 2)
+        return self.history_view
+
+    def build_filter_bar(self):
+        """Row of list filters between the search box and the list"""
+        self.filter_bar = MDBoxLayout(
+            orientation="horizontal", spacing="8dp", padding=("8dp", 0),
+            size_hint_y=None, height=dp(48),
+        )
+        self.box_button = MDFlatButton(text="All boxes", on_release=lambda x: self.choose_filter_box())
+        self.date_from_field = MDTextField(hint_text="From YYYY-MM-DD")
+        self.date_to_field = MDTextField(hint_text="To YYYY-MM-DD")
+        for field in (self.date_from_field, self.date_to_field):
+            field.bind(text=lambda field, text: self.search_trigger())
+        self.status_button = MDFlatButton(text=HISTORY_STATUS_FILTERS[0][0], on_release=self.open_status_menu)
+        for widget in (self.box_button, self.date_from_field, self.date_to_field, self.status_button):
+            self.filter_bar.add_widget(widget)
+        return self.filter_bar
+
+    def filtering(self):
+        return any(self.history_filters.values())
+
+    def apply_search(self, *args):
+        """Reload the list for the search box text and date range (debounced while typing).
+
+        A notes search covers all checks, so the filters are set aside while
+        it is shown. Dates that do not parse yet leave the range as it was.
+        """
+        search_text = self.search_field.text.strip()
+        changed = search_text != self.search_text
+        for key, field in (("date_from", self.date_from_field), ("date_to", self.date_to_field)):
+            text = field.text.strip()
+            field.error = bool(text) and not validation.is_valid_date(text)
+            if not field.error and self.history_filters[key] != (text or None):
+                self.history_filters[key] = text or None
+                changed = True
+        if changed:
+            self.search_text = search_text
+            self.filter_bar.disabled = bool(search_text)
+            self.load_check_history()
+
+    def set_history_filter(self, key, value):
+        if self.history_filters[key] != value:
+            self.history_filters[key] = value
+            self.load_check_history()
+
+    def choose_filter_box(self):
+        """Pick a box to list, or show all boxes again when one is chosen"""
+        if self.history_filters["box_name"] is not None:
+            self.box_button.text = "All boxes"
+            self.set_history_filter("box_name", None)
+            return
+        self.db_reader.submit(
+            catalog_cache.get,
+            on_success=self.show_box_picker,
+            on_error=self.on_catalog_error,
+        )
+
+    def show_box_picker(self, catalog):
+        if self.box_picker is None:
+            self.box_picker = BoxPicker(on_select=self.set_filter_box)
+        self.box_picker.open(catalog)
+
+    def on_catalog_error(self, error):
+        print(f"Error loading box catalog: {error}")
+        toast("Error loading first aid boxes.")
+
+    def set_filter_box(self, box_name):
+        self.box_picker.dismiss()
+        self.box_button.text = box_name
+        self.set_history_filter("box_name", box_name)
+
+    def open_status_menu(self, button):
+        if self.status_menu is None:
+            self.status_menu = MDDropdownMenu(
+                caller=button,
+                items=[
+                    {
+                        "text": label,
+                        "viewclass": "OneLineListItem",
+                        "on_release": lambda label=label, mask=mask: self.set_filter_status(label, mask),
+                    }
+                    for label, mask in HISTORY_STATUS_FILTERS
+                ],
+                width_mult=4,
+            )
+        self.status_menu.open()
+
+    def set_filter_status(self, label, mask):
+        self.status_menu.dismiss()
+        self.status_button.text = label
+        self.set_history_filter("status_mask", mask)
 
     def load_check_history(self):
-        """Load all first aid box check records."""
-        history_list = self.ids.check_history_list
-        history_list.clear_widgets()
+        """Reset the history list and load its first page."""
+        history_view = self.get_history_view()
+        history_view.data = [self.placeholder_row_data("Loading...")]
+        history_view.scroll_y = 1
+        self.history_cursor = None
+        self.history_exhausted = False
+        self.history_generation += 1
+        self.history_version = None
+        self.loading = False
+
+        self.load_next_history_page()
+
+    def refresh_history(self):
+        """Bring the list up to date, patching only the checks that changed.
+
+        Search results are ranked rather than ordered, and a changed check
+        may have entered or left a filtered list, so both are always
+        reloaded.
+        """
+        if self.history_version is None or self.search_text or self.filtering() or self.loading:
+            self.load_check_history()
+            return
+        generation = self.history_generation
+        self.db_reader.submit(
+            changes.history_changes, self.history_version,
+            on_success=lambda result: self.on_history_changes(generation, result),
+            on_error=lambda error: self.on_history_error(generation, error),
+        )
 
-        try:
-            self.cursor.execute("""
-                SELECT id, box_name, check_date, general_notes
-                FROM first_aid_checks
-                ORDER BY check_date DESC
-            """)
-            checks_data = self.cursor.fetchall()
-
-            if not checks_data:
-                history_list.add_widget(
-                    MDLabel(
-                        text="No checks recorded yet.",
-                        halign="center",
-                        valign="center",
-                        adaptive_height=True,
-                        padding_y="20dp"
-                    )
-                )
-                return
-
-            for check_id, box_name, check_date, general_notes in checks_data:
-                date_display = self.format_date_for_display(check_date)
-                primary_text = f"{date_display} - {box_name}"
-                secondary_text = f"Notes: {general_notes[:50]}..." if general_notes else "No general notes"
-
-                history_list.add_widget(
-                    TwoLineListItem(
-                        text=primary_text,
-                        secondary_text=secondary_text,
-                        on_release=lambda x, ch_id=check_id: self.show_check_options(ch_id)
-                    )
-                )
-        except Exception as e:
-            print(f"Error loading check history: {e}")
-            toast("Error loading check history.")
+    def on_history_changes(self, generation, result):
+        """Apply what changes.history_changes found."""
+        if generation != self.history_generation:
+            return
+        if result is None:
+            self.load_check_history() # Too much changed to patch
+            return
+        version, rows, removed_ids = result
+        if version == self.history_version:
+            return
+        self.history_version = version
+
+        changed_ids = {row[0] for row in rows}.union(removed_ids)
+        data = [
+            entry for entry in self.history_view.data
+            if entry["check_id"] and entry["check_id"] not in changed_ids
+        ]
+        for row in rows:
+            check_id, _, check_date = row[:3]
+            # Rows past the last loaded page arrive with a later page
+            if not self.history_exhausted and (check_date, check_id) < self.history_cursor:
+                continue
+            data.insert(self.history_position(data, check_date, check_id), self.history_row_data(*row))
+        self.history_view.data = data or [self.placeholder_row_data("No checks recorded yet.")]
+
+    @staticmethod
+    def history_position(data, check_date, check_id):
+        """Index keeping data sorted newest first by (check_date, check_id)"""
+        low, high = 0, len(data)
+        while low < high:
+            middle = (low + high) // 2
+            entry = data[middle]
+            if (entry["check_date"], entry["check_id"]) > (check_date, check_id):
+                low = middle + 1
+            else:
+                high = middle
+        return low
 
-    def show_check_options(self, check_id):
+    def load_next_history_page(self):
+        """Fetch the page after history_cursor.
+
+        Plain history uses keyset pagination; search results are ranked, so
+        they are paged by offset.
+        """
+        if self.history_exhausted or self.loading:
+            return
+
+        self.loading = True
+        generation = self.history_generation
+        callbacks = {
+            "on_success": lambda rows: self.on_history_page_loaded(generation, rows),
+            "on_error": lambda error: self.on_history_error(generation, error),
+        }
+        if self.search_text:
+            self.db_reader.submit(
+                search.search_checks, self.search_text,
+                limit=HISTORY_PAGE_SIZE, offset=self.history_cursor or 0,
+                **callbacks
+            )
+        else:
+            self.db_reader.submit(
+                changes.versioned, repository.get_history_page,
+                after=self.history_cursor, limit=HISTORY_PAGE_SIZE, **self.history_filters,
+                on_success=lambda result: self.on_history_page_loaded(generation, result[1], result[0]),
+                on_error=callbacks["on_error"],
+            )
+
+    def on_history_page_loaded(self, generation, checks_data, version=None):
+        """Append a page fetched by load_next_history_page."""
+        if generation != self.history_generation:
+            return
+        self.loading = False
+        first_page = self.history_cursor is None
+        if first_page and version is not None:
+            self.history_version = version
+
+        if len(checks_data) < HISTORY_PAGE_SIZE:
+            self.history_exhausted = True
+
+        if self.search_text:
+            rows = [self.search_row_data(*row) for row in checks_data]
+            empty_text = "No notes match your search."
+        else:
+            rows = [self.history_row_data(*row) for row in checks_data]
+            empty_text = "No checks match the filters." if self.filtering() else "No checks recorded yet."
+
+        if first_page:
+            # Replaces the "Loading..." placeholder
+            self.history_view.data = rows or [self.placeholder_row_data(empty_text)]
+        else:
+            self.history_view.data.extend(rows)
+
+        if self.search_text:
+            self.history_cursor = (self.history_cursor or 0) + len(checks_data)
+        elif checks_data:
+            last_id, _, last_date = checks_data[-1][:3]
+            self.history_cursor = (last_date, last_id)
+
+    def on_history_error(self, generation, error):
+        if generation != self.history_generation:
+            return
+        self.loading = False
+        print(f"Error loading check history: {error}")
+        toast("Error loading check history.")
+
+    def history_row_data(self, check_id, box_name, check_date, general_notes, archived=0):
+        """Build the RecycleView data dict for one check."""
+        date_display = self.format_date_for_display(check_date)
+        if archived:
+            secondary_text = "Archived check"
+        elif general_notes:
+            secondary_text = f"Notes: {general_notes[:50]}..."
+        else:
+            secondary_text = "No general notes"
+        return {
+            "text": f"{date_display} - {box_name}",
+            "secondary_text": secondary_text,
+            "check_id": check_id,
+            "check_date": check_date,
+            "archived": bool(archived),
+        }
+
+    def placeholder_row_data(self, text):
+        """Build the data dict for a message row with no check behind it."""
+        return {
+            "text": text,
+            "secondary_text": "",
+            "check_id": 0,
+            "check_date": "",
+            "archived": False,
+        }
+
+    def search_row_data(self, check_id, box_name, check_date, snippet):
+        """Build the RecycleView data dict for one search result."""
+        date_display = self.format_date_for_display(check_date)
+        return {
+            "text": f"{date_display} - {box_name}",
+            "secondary_text": snippet,
+            "check_id": check_id,
+            "check_date": check_date,
+            "archived": False,
+        }
+
+    def show_check_options(self, check_id, archived=False):
         """Show options for selected check."""
         self.selected_check_id = check_id
-        options = [
-            ("View Details", self.view_check_details),
-            ("Edit Check", self.edit_check),
-            ("Delete Check", self.delete_check_with_confirmation),
+        self.prefetch_details(check_id)
+        options = [("View Details", self.view_check_details)]
+        if not archived: # Archived checks are read-only
+            options += [
+                ("Edit Check", self.edit_check),
+                ("Delete Check", self.delete_check_with_confirmation),
+            ]
+        self.create_options_dialog("Check Options", options, check_id)
+
+    def prefetch_details(self, check_id):
+        """Load the tapped check and its neighbours into the details cache"""
+        data = self.history_view.data
+        index = next(
+            (position for position, entry in enumerate(data) if entry["check_id"] == check_id), None
+        )
+        if index is None:
+            return
+        nearby = data[max(0, index - DETAILS_PREFETCH_RADIUS):index + DETAILS_PREFETCH_RADIUS + 1]
+        check_ids = [check_id] + [
+            entry["check_id"] for entry in nearby
+            if entry["check_id"] and entry["check_id"] != check_id
         ]
-        self.create_options_dialog(f"Check Options", options, check_id)
+        self.db_reader.submit(
+            details_cache.prefetch, check_ids,
+            on_error=lambda error: print(f"Error prefetching check details: {error}"),
+        )
 
     def create_options_dialog(self, title, options, selected_id):
         """Create a generic options dialog (overriding DialogMixin to handle dismissal)."""
@@ -541,71 +1419,79 @@ class CheckHistoryScreen(MDScreen, DatabaseMixin, DialogMixin):
     def _execute_delete_check(self, check_id, dialog_to_dismiss):
         """Execute check deletion."""
         dialog_to_dismiss.dismiss()
-        try:
-            self.conn.execute("BEGIN TRANSACTION;")
-            self.cursor.execute("DELETE FROM check_items WHERE check_id = ?", (check_id,))
-            self.cursor.execute("DELETE FROM first_aid_checks WHERE id = ?", (check_id,))
-            self.conn.commit()
-            toast("Check deleted!")
-            self.load_check_history() # Reload history after deletion
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error deleting check: {e}")
-            toast("Error deleting check.")
+        self.db.submit(
+            repository.delete_check, check_id,
+            on_success=lambda result: self.on_check_deleted(check_id),
+            on_error=self.on_delete_error,
+        )
+
+    def on_check_deleted(self, check_id):
+        details_cache.invalidate(check_id)
+        self.app.update_summaries()
+        toast("Check deleted!")
+        self.refresh_history() # Drops just the deleted row
+
+    def on_delete_error(self, error):
+        print(f"Error deleting check: {error}")
+        toast("Error deleting check.")
 
 
 class CheckDetailsScreen(MDScreen, DatabaseMixin):
     box_name = StringProperty("")
     check_date_display = StringProperty("")
     general_notes = StringProperty("")
-    item_details = ListProperty([]) # List of (item_name, standard_qty, current_qty, expiry_date, item_notes)
+    item_details = ListProperty([]) # (item_name, standard_qty, current_qty, expiry_date, item_notes, stock_status, expiry_status)
+    loading = BooleanProperty(False) # True while the check is being fetched
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = "checkdetails"
+        self.requested_check_id = None
+        self.shown_details = None # CheckDetails whose cards are built, kept after go_back
 
     def load_check_details(self, check_id):
-	    try:
-	        self.cursor.execute("""
-	            SELECT box_name, check_date, general_notes
-	            FROM first_aid_checks WHERE id =?
-	        """,(check_id,))
-	        check_data = self.cursor.fetchone()
-	
-	        if check_data:
-	            self.box_name, check_date, self.general_notes = check_data
-	            self.check_date_display = self.format_date_for_display(check_date)
-	            self.general_notes = self.general_notes or "No general notes."
-	
-	            self.cursor.execute("""
-	                SELECT item_name, standard_quantity, current_quantity, expiry_date, item_notes
-	                FROM check_items WHERE check_id =?
-	                ORDER BY item_name
-	            """, (check_id,))
-	            self.item_details = self.cursor.fetchall()
-	            self.populate_item_details()
-	        else:
-	            print("No check data found")
-	            toast("Error: Check details not found.")
-	            self.clear_details()
-	    except Exception as e:
-	        print(f"Error loading check details: {e}")
-	        toast(f"Error loading check details. {e}")
-	        self.clear_details()
-	
-
-
-
-
-
-
-
-
-
-
-
+        """Show a check, reusing the built cards if it is unchanged since last shown."""
+        if self.shown_details is None or self.shown_details.check_id != check_id:
+            self.clear_details()
+            self.box_name = "Loading..."
+        self.requested_check_id = check_id
+        self.loading = True
+        self.db_reader.submit(
+            details_cache.get, check_id,
+            on_success=lambda details: self.on_check_details_loaded(check_id, details),
+            on_error=lambda error: self.on_check_details_error(check_id, error),
+        )
 
+    def on_check_details_loaded(self, check_id, details):
+        """Show a CheckDetails view model fetched by load_check_details."""
+        if check_id != self.requested_check_id:
+            return
+        self.loading = False
+        if details is not None and details is self.shown_details:
+            return # Unchanged: the cards on screen are current
+
+        if details is not None:
+            self.shown_details = details
+            self.box_name = details.box_name
+            self.check_date_display = self.format_date_for_display(details.check_date)
+            self.general_notes = details.general_notes or "No general notes."
+
+            self.item_details = details.items
+            self.populate_item_details()
+        else:
+            print("No check data found")
+            toast("Error: Check details not found.")
+            self.clear_details()
+
+    def on_check_details_error(self, check_id, error):
+        if check_id != self.requested_check_id:
+            return
+        self.loading = False
+        print(f"Error loading check details: {error}")
+        toast(f"Error loading check details. {error}")
+        self.clear_details()
 
+    @tracer.timed(SCREEN)
     def populate_item_details(self):
 	    """Populate the item details container with cards."""
 	    container = self.ids.item_details_container
@@ -623,29 +1509,15 @@ class CheckDetailsScreen(MDScreen, DatabaseMixin):
 	        )
 	        return
 	
-	    for item_name, standard_qty, current_qty, expiry_date, item_notes in self.item_details:
-	        status_color = self.app.theme_cls.primary_color
-	        status_text = "OK"
+	    theme = self.app.theme_cls
+	    expiry_colors = {status.EXPIRED: theme.error_color, status.EXPIRING_SOON: theme.accent_color}
+	    # Statuses come precomputed with the view model, by the db.status rules
+	    for item in self.item_details:
+	        item_name, standard_qty, current_qty, expiry_date, item_notes, status_text, expiry_status_text = item
+	        card_start = time.perf_counter()
+	        status_color = theme.error_color if status_text == status.LOW_STOCK else theme.primary_color
 	
-	        if current_qty < standard_qty:
-	            status_color = self.app.theme_cls.error_color
-	            status_text = "LOW STOCK"
-	        elif current_qty > standard_qty:
-	            status_text = "OVERSTOCK"
-	
-	        expiry_status_color = (0, 0, 0, 0)
-	        expiry_status_text = ""
-	        if expiry_date:
-	            try:
-	                exp_dt = datetime.strptime(expiry_date, "%Y-%m-%d")
-	                if exp_dt < datetime.now():
-	                    expiry_status_color = self.app.theme_cls.error_color
-	                    expiry_status_text = "EXPIRED"
-	                elif (exp_dt - datetime.now()).days < 90:
-	                    expiry_status_color = self.app.theme_cls.accent_color
-	                    expiry_status_text = "EXPIRING SOON"
-	            except ValueError:
-	                pass
+	        expiry_status_color = expiry_colors.get(expiry_status_text, (0, 0, 0, 0))
 	
 	        # Create the MDCard
 	        card = MDCard(
@@ -724,6 +1596,7 @@ class CheckDetailsScreen(MDScreen, DatabaseMixin):
 	
 	        card.add_widget(content_container)
 	        container.add_widget(card)
+	        tracer.add("details card build", CARD, card_start, time.perf_counter() - card_start)
 	            
             
             
@@ -741,13 +1614,221 @@ class CheckDetailsScreen(MDScreen, DatabaseMixin):
         self.check_date_display = ""
         self.general_notes = ""
         self.item_details = []
+        self.shown_details = None
         self.ids.item_details_container.clear_widgets()
 
     def go_back(self):
-        """Navigate back to check history screen."""
+        """Navigate back to check history screen.
+
+        The cards stay built, so reopening the same unchanged check shows
+        them again without a reload.
+        """
         self.manager.current = "checkhistory"
         self.manager.transition.direction = 'right'
-        self.clear_details()
+
+
+class ReportScreen(MDScreen, DatabaseMixin):
+    """Screen built in Python: a top bar over a recycled two-line list"""
+    title = ""
+    loading = BooleanProperty(False)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.layout = MDBoxLayout(orientation="vertical")
+        self.layout.add_widget(MDTopAppBar(
+            title=self.title,
+            left_action_items=[["arrow-left", lambda x: self.go_back()]],
+        ))
+        self.add_controls(self.layout)
+        self.list_view = RecycleView()
+        self.list_view.viewclass = "TwoLineListItem"
+        rows = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, dp(72)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+        )
+        rows.bind(minimum_height=rows.setter("height"))
+        self.list_view.add_widget(rows)
+        self.layout.add_widget(self.list_view)
+        self.add_widget(self.layout)
+
+    def add_controls(self, layout):
+        """Add widgets between the top bar and the list; none by default"""
+
+    def go_back(self):
+        self.manager.current = "home"
+        self.manager.transition.direction = 'right'
+
+
+class ForecastScreen(ReportScreen):
+    """Consumption rates and when each item is expected to fall below standard"""
+    title = "Restock Forecast"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.name = "forecast"
+
+    def on_enter(self, *args):
+        self.load_forecast()
+
+    def load_forecast(self):
+        """Catch the totals up with recent changes, then show the forecast"""
+        if self.loading:
+            return
+        self.loading = True
+        # On the writer: catching up updates item_consumption
+        self.db.submit(
+            analytics.update_and_forecast,
+            on_success=self.on_forecast_loaded,
+            on_error=self.on_forecast_error,
+        )
+
+    @tracer.timed(SCREEN)
+    def on_forecast_loaded(self, rows):
+        self.loading = False
+        today = dates.today()
+        self.list_view.data = [self.forecast_row_data(row, today) for row in rows]
+        if not rows:
+            toast("No checks recorded yet.")
+
+    def on_forecast_error(self, error):
+        self.loading = False
+        print(f"Error loading forecast: {error}")
+        toast("Error loading restock forecast.")
+
+    def forecast_row_data(self, row, today):
+        box_name, item_name, standard_qty, last_qty, last_day, rate, below_day = row
+        counted = self.format_date_for_display(dates.from_day(last_day))
+        if last_qty < standard_qty:
+            outlook = "Below standard"
+        elif below_day is None:
+            outlook = "No use recorded"
+        elif below_day <= today:
+            outlook = "Probably below standard now"
+        else:
+            outlook = f"Below standard by {self.format_date_for_display(dates.from_day(below_day))}"
+        usage = f", uses {rate:.1f} per {analytics.RATE_PERIOD_DAYS} days" if rate else ""
+        return {
+            "text": f"{box_name} - {item_name}",
+            "secondary_text": f"{last_qty}/{standard_qty} on {counted}{usage}. {outlook}",
+        }
+
+
+class HorizonReportScreen(ReportScreen):
+    """Report screen with a row of buttons choosing a horizon in days.
+
+    ``report_query(conn, days)`` returns the rows; it runs on the reader
+    unless ``report_on_writer`` is set.
+    """
+    horizon_label = ""
+    horizons = ()
+    report_query = None
+    report_on_writer = False
+    horizon_days = NumericProperty(status.EXPIRING_SOON_DAYS)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requested_days = None
+
+    def add_controls(self, layout):
+        controls = MDBoxLayout(
+            orientation="horizontal", spacing="8dp", padding=("8dp", 0),
+            size_hint_y=None, height=dp(48),
+        )
+        controls.add_widget(MDLabel(text=self.horizon_label, size_hint_x=None, width=dp(200)))
+        self.horizon_buttons = {}
+        for days in self.horizons:
+            button = MDFlatButton(text=f"{days} days", on_release=lambda x, days=days: self.set_horizon(days))
+            self.horizon_buttons[days] = button
+            controls.add_widget(button)
+        layout.add_widget(controls)
+
+    def on_enter(self, *args):
+        self.load_report()
+
+    def set_horizon(self, days):
+        self.horizon_days = days
+        self.load_report()
+
+    def highlight_horizon(self, days):
+        for button_days, button in self.horizon_buttons.items():
+            button.md_bg_color = sage if button_days == days else (0, 0, 0, 0)
+
+    def load_report(self):
+        days = self.horizon_days
+        self.requested_days = days
+        self.highlight_horizon(days)
+        self.loading = True
+        worker = self.db if self.report_on_writer else self.db_reader
+        worker.submit(
+            self.report_query, days,
+            on_success=lambda rows: self.on_report_loaded(days, rows),
+            on_error=self.on_report_error,
+        )
+
+    @tracer.timed(SCREEN)
+    def on_report_loaded(self, days, rows):
+        if days != self.requested_days:
+            return # The horizon changed meanwhile
+        self.loading = False
+        self.list_view.data = [self.row_data(row) for row in rows]
+        if not rows:
+            toast(self.empty_text)
+
+    def on_report_error(self, error):
+        self.loading = False
+        print(f"Error loading {self.title}: {error}")
+        toast(f"Error loading {self.title.lower()}.")
+
+
+class RestockScreen(HorizonReportScreen):
+    """What to order to bring every box's latest check back to standard"""
+    title = "Restock List"
+    horizon_label = "Replace items expiring within"
+    horizons = RESTOCK_HORIZONS
+    empty_text = "Every box is at standard."
+    report_query = staticmethod(reports.restock_list)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.name = "restock"
+
+    def row_data(self, row):
+        item_name, to_order, short, replace, boxes = row
+        return {
+            "text": f"{item_name}: order {to_order}",
+            "secondary_text": f"{short} short, {replace} expiring - {boxes}",
+        }
+
+
+class ExpiryScreen(HorizonReportScreen):
+    """Items of every box's latest check expiring soon, read from the expiry calendar"""
+    title = "Upcoming Expiries"
+    horizon_label = "Expired or expiring within"
+    horizons = EXPIRY_HORIZONS
+    empty_text = "Nothing expires in that time."
+    report_query = staticmethod(fleet.update_and_expiring)
+    # On the writer: catching up refreshes box_status and the calendar
+    report_on_writer = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.name = "expiry"
+
+    def row_data(self, row):
+        expiry_day, box_name, item_name, quantity, expiry, days_left = row
+        expiry_date = self.format_date_for_display(dates.from_day(expiry_day))
+        if days_left < 0:
+            when = f"{-days_left} days ago"
+        elif days_left == 0:
+            when = "today"
+        else:
+            when = f"in {days_left} days"
+        return {
+            "text": f"{expiry_date} - {box_name}",
+            "secondary_text": f"{item_name} x{quantity}: {expiry or 'expires'} {when}",
+        }
 
 
 def status_color_to_hex(color_tuple):
@@ -764,59 +1845,109 @@ class MainApp(MDApp):
         self.theme_cls.primary_palette = "Blue"
         self.theme_cls.accent_palette = "Amber" 
 
+        self.startup_timer = StartupTimer()
         self.setup_database()
         
-        self.screen_manager = MDScreenManager()
-        screens = [
-            HomeScreen(name="home"),
-            BoxCheckScreen(name="boxcheck"),
-            CheckHistoryScreen(name="checkhistory"),
-            CheckDetailsScreen(name="checkdetails")
-        ]
-        
-        for screen in screens:
-            self.screen_manager.add_widget(screen)
-        
+        # Screens are only constructed when first navigated to
+        self.screen_manager = LazyScreenManager(
+            {
+                "home": HomeScreen,
+                "boxcheck": BoxCheckScreen,
+                "checkhistory": CheckHistoryScreen,
+                "checkdetails": CheckDetailsScreen,
+                "forecast": ForecastScreen,
+                "restock": RestockScreen,
+                "expiry": ExpiryScreen,
+            },
+            startup_timer=self.startup_timer,
+        )
         self.screen_manager.current = "home"
         return self.screen_manager
+
+    def build_config(self, config):
+        config.setdefaults("retention", {"archive_after_months": ARCHIVE_AFTER_MONTHS})
+        config.setdefaults("instrumentation", {"enabled": 1})
+        # Address of a sync server (python cli.py sync-serve), e.g. http://192.168.1.10:8765,
+        # and the token it was started with
+        config.setdefaults("sync", {"server_url": "", "token": ""})
+
+    def on_start(self):
+        from kivy.core.window import Window
+
+        def report_first_frame(*args):
+            Window.unbind(on_flip=report_first_frame)
+            self.screen_manager.startup_timer = None # Later KV parses are not startup cost
+            self.startup_timer.finish("first frame", time.perf_counter() - LAUNCH_TIME)
+
+        Window.bind(on_flip=report_first_frame)
+        Clock.schedule_once(self.start_maintenance, MAINTENANCE_START_DELAY)
+
+        tracer.enabled = self.config.getboolean("instrumentation", "enabled")
+        self.frame_monitor = FrameMonitor()
+        self.performance_overlay = None
+        if tracer.enabled:
+            self.frame_monitor.start()
+
+    def start_maintenance(self, *args):
+        """Archive checks past the retention period, a batch at a time"""
+        months = self.config.getint("retention", "archive_after_months")
+        if months <= 0:
+            return
+        self.maintenance_cutoff = retention.cutoff_date(months)
+        self.maintenance_running = False
+        self.maintenance_event = Clock.schedule_interval(self.maintenance_tick, MAINTENANCE_INTERVAL)
+
+    def maintenance_tick(self, dt):
+        """Run one archive or incremental_vacuum step if the writer is idle"""
+        if self.maintenance_running or not self.db.idle():
+            return
+        self.maintenance_running = True
+        self.db.submit(
+            retention.maintenance_step, self.maintenance_cutoff,
+            on_success=self.on_maintenance_step,
+            on_error=self.on_maintenance_error,
+        )
+
+    def on_maintenance_step(self, more_work):
+        self.maintenance_running = False
+        if not more_work:
+            self.maintenance_event.cancel()
+
+    def on_maintenance_error(self, error):
+        print(f"Error archiving old checks: {error}")
+        self.maintenance_event.cancel()
     
     def setup_database(self):
-        """Initialize database and tables"""
-        os.makedirs("database", exist_ok=True)
-        
-        self.conn = sqlite3.connect("database/first_aid_stock.db")
-        self.cursor = self.conn.cursor()
-        
-        # Create first_aid_checks table
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS first_aid_checks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                box_name TEXT NOT NULL,
-                check_date TEXT NOT NULL,
-                general_notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Create check_items table to store details for each item in a check
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS check_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                check_id INTEGER INTEGER NOT NULL,
-                item_name TEXT NOT NULL,
-                standard_quantity INTEGER NOT NULL,
-                current_quantity INTEGER NOT NULL,
-                expiry_date TEXT,
-                item_notes TEXT,
-                FOREIGN KEY (check_id) REFERENCES first_aid_checks (id) ON DELETE CASCADE
-            )
-        """)
-        self.conn.commit()
+        """Start the database workers; the writer opens and migrates the database"""
+        start = time.perf_counter()
+        self.connections = ConnectionManager()
+        # Writes are serialized on one thread; reads use a second connection
+        self.db = DatabaseWorker(
+            self.connections.open_writer, dispatch=run_on_main_thread, name="db-writer"
+        )
+        self.db_reader = DatabaseWorker(
+            self.connections.open_reader, dispatch=run_on_main_thread, name="db-reader"
+        )
+        self.db.submit(
+            lambda conn: None,
+            on_success=lambda result: self.startup_timer.finish("DB setup", time.perf_counter() - start),
+        )
     
+    def on_pause(self):
+        """Write the check form's draft before Android may kill the app"""
+        self.flush_draft()
+        return True
+
+    def flush_draft(self):
+        if self.screen_manager.has_screen("boxcheck"):
+            self.screen_manager.get_screen("boxcheck").draft.flush()
+
     def on_stop(self):
-        """Close database connection on app stop"""
-        if hasattr(self, 'conn'):
-            self.conn.close()
+        """Finish pending database work and close the connection on app stop"""
+        if hasattr(self, 'db'):
+            self.flush_draft()
+            self.db_reader.stop()
+            self.db.stop()
     
     def callback(self, *args):
         """Handle menu button callback (for general navigation/info)"""
@@ -831,6 +1962,46 @@ class MainApp(MDApp):
                 "viewclass": "OneLineListItem",
                 "on_release": lambda x="checkhistory": self.menu_callback(x),
             },
+            {
+                "text": "Restock List",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x="restock": self.menu_callback(x),
+            },
+            {
+                "text": "Upcoming Expiries",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x="expiry": self.menu_callback(x),
+            },
+            {
+                "text": "Restock Forecast",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x="forecast": self.menu_callback(x),
+            },
+            {
+                "text": "Export History (CSV)",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x="export_csv": self.menu_callback(x),
+            },
+            {
+                "text": "Export History (JSON Lines)",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x="export_jsonl": self.menu_callback(x),
+            },
+            {
+                "text": "Sync Now",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x="sync": self.menu_callback(x),
+            },
+            {
+                "text": "Performance Overlay",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x="overlay": self.menu_callback(x),
+            },
+            {
+                "text": "Export Performance Trace",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x="export_trace": self.menu_callback(x),
+            },
             {
                 "text": "About",
                 "viewclass": "OneLineListItem",
@@ -851,6 +2022,14 @@ class MainApp(MDApp):
         menu_actions = {
             "boxcheck": "boxcheck",
             "checkhistory": "checkhistory",
+            "restock": "restock",
+            "expiry": "expiry",
+            "forecast": "forecast",
+            "export_csv": lambda: self.export_history("csv"),
+            "export_jsonl": lambda: self.export_history("jsonl"),
+            "sync": self.sync_now,
+            "overlay": self.toggle_performance_overlay,
+            "export_trace": self.export_trace,
             "About": self.show_about_dialog,
         }
         
@@ -860,6 +2039,99 @@ class MainApp(MDApp):
         elif callable(action):
             action()
     
+    def export_history(self, fmt):
+        """Export the full check history to a file in the app's data directory"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(
+            self.user_data_dir, "exports", f"first_aid_history_{timestamp}.{export.FORMATS[fmt]}"
+        )
+
+        # A throwaway reader so a long export does not hold up screen queries
+        export_worker = DatabaseWorker(
+            self.connections.open_reader, dispatch=run_on_main_thread, name="db-export"
+        )
+
+        def report_progress(rows_written, rows_per_second):
+            print(f"Exported {rows_written} rows ({rows_per_second:.0f} rows/s)")
+
+        def on_exported(rows_written):
+            toast(f"Exported {rows_written} rows to {path}")
+
+        def on_export_error(error):
+            print(f"Error exporting history: {error}")
+            toast("Error exporting history.")
+
+        toast("Exporting check history...")
+        export_worker.submit(
+            export.export_history, path, fmt, progress=report_progress,
+            on_success=on_exported, on_error=on_export_error,
+        )
+        export_worker.stop(wait=False)
+
+    def sync_now(self):
+        """Exchange changed checks with the configured sync server"""
+        url = self.config.get("sync", "server_url").strip()
+        token = self.config.get("sync", "token").strip()
+        if not url or not token:
+            toast("Set sync/server_url and sync/token in the app config first.")
+            return
+
+        def on_synced(result):
+            details_cache.invalidate()
+            self.update_summaries()
+            toast(f"Synced: {result['applied']} checks received, {result['deleted']} deleted, "
+                  f"{result['sent']} sent")
+            if self.screen_manager.current == "checkhistory":
+                self.screen_manager.get_screen("checkhistory").refresh_history()
+            elif self.screen_manager.current == "home":
+                self.screen_manager.get_screen("home").load_fleet_status()
+
+        def on_sync_error(error):
+            print(f"Error syncing with {url}: {error}")
+            toast("Sync failed. Is the server reachable?")
+
+        def run():
+            # Only building and applying the bundles queue on the writer,
+            # each in one transaction; the HTTP requests wait here
+            try:
+                result = sync.sync_with_server(None, url, token, call=self.db.call)
+            except Exception as e:
+                Clock.schedule_once(lambda dt, error=e: on_sync_error(error))
+            else:
+                Clock.schedule_once(lambda dt: on_synced(result))
+
+        toast("Syncing...")
+        threading.Thread(target=run, name="sync", daemon=True).start()
+
+    def update_summaries(self):
+        """Fold committed check changes into box_status and the consumption totals"""
+        self.db.submit(
+            fleet.update,
+            on_error=lambda error: print(f"Error updating box status: {error}"),
+        )
+        self.db.submit(
+            analytics.update,
+            on_error=lambda error: print(f"Error updating consumption totals: {error}"),
+        )
+
+    def toggle_performance_overlay(self):
+        """Show or hide the live timings over the current screen"""
+        if self.performance_overlay is None:
+            self.performance_overlay = PerformanceOverlay(self.frame_monitor)
+        self.performance_overlay.toggle()
+
+    def export_trace(self):
+        """Write the recorded events as a Chrome trace to the app's data directory"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.user_data_dir, "traces", f"first_aid_trace_{timestamp}.json")
+        try:
+            events = tracer.export_chrome_trace(path)
+        except OSError as e:
+            print(f"Error exporting trace: {e}")
+            toast("Error exporting performance trace.")
+            return
+        toast(f"Exported {events} trace events to {path}")
+
     def show_about_dialog(self):
         """Show about dialog"""
         content = MDBoxLayout(
@@ -0,0 +1,76 @@
+"""Fixtures for the headless data layer tests; nothing here imports Kivy.
+
+Databases are files opened the way the app opens them (db.connection), so
+WAL, foreign keys and the other PRAGMAs match what the app runs with.
+"""
+import pytest
+
+from db.catalog import catalog_cache
+from db.connection import ConnectionManager, connect
+from db.details import details_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    # Both caches are process-wide; each test brings its own databases
+    catalog_cache.invalidate()
+    details_cache.invalidate()
+    yield
+    catalog_cache.invalidate()
+    details_cache.invalidate()
+
+
+@pytest.fixture
+def open_database(tmp_path):
+    """Return a function opening ``<name>.db`` as the app's writer would,
+    migrated to the latest schema."""
+    opened = []
+
+    def open_database(name="checks"):
+        conn = ConnectionManager(str(tmp_path / f"{name}.db")).open_writer()
+        opened.append(conn)
+        return conn
+    yield open_database
+    for conn in opened:
+        conn.close()
+
+
+@pytest.fixture
+def open_raw(tmp_path):
+    """Return a function opening ``<name>.db`` with the app PRAGMAs but no
+    migrations, for building databases in older schemas."""
+    opened = []
+
+    def open_raw(name="checks"):
+        conn = connect(str(tmp_path / f"{name}.db"))
+        opened.append(conn)
+        return conn
+    yield open_raw
+    for conn in opened:
+        conn.close()
+
+
+@pytest.fixture
+def conn(open_database):
+    return open_database()
+
+
+@pytest.fixture
+def box(conn):
+    """Name of a catalog box and its standard (item_name, quantity) contents."""
+    catalog = catalog_cache.get(conn)
+    name = catalog.box_names[0]
+    return name, catalog.standard_contents(name)
+
+
+def full_items(contents, **current):
+    """Check form items at standard, with ``current`` quantities by item name."""
+    return [
+        (item_name, standard_qty, current.get(item_name, standard_qty), "", "")
+        for item_name, standard_qty in contents
+    ]
+
+
+def stored(items):
+    """Form items as the ``stored_items`` of save_check."""
+    return {row[0]: tuple(row[1:]) for row in items}
@@ -0,0 +1,89 @@
+import pytest
+
+from db import analytics, dates, retention
+from db.repository import delete_check, get_check_with_items, save_check
+
+from conftest import full_items, stored
+
+
+@pytest.fixture
+def plasters(box):
+    """Box name, and the name and standard of an item it holds many of."""
+    box_name, contents = box
+    item_name, standard_qty = max(contents, key=lambda item: item[1])
+    return box_name, contents, item_name, standard_qty
+
+
+def save_count(conn, plasters, check_date, count):
+    box_name, contents, item_name, _ = plasters
+    return save_check(conn, (box_name, check_date, ""), full_items(contents, **{item_name: count}))
+
+
+def forecast_for(conn, plasters):
+    box_name, _, item_name, _ = plasters
+    (row,) = [row for row in analytics.forecast(conn) if row[:2] == (box_name, item_name)]
+    return row
+
+
+def test_drops_between_checks_give_the_rate(conn, plasters):
+    standard = plasters[3]
+    save_count(conn, plasters, "2024-05-01", standard)
+    save_count(conn, plasters, "2024-05-11", standard - 5)
+    # Restocked: the rise says nothing about use
+    save_count(conn, plasters, "2024-05-21", standard)
+    analytics.update(conn)
+
+    _, _, standard_qty, last_qty, last_day, rate, below_day = forecast_for(conn, plasters)
+
+    assert (standard_qty, last_qty, last_day) == (standard, standard, dates.to_day("2024-05-21"))
+    assert rate == 5 / 10 * analytics.RATE_PERIOD_DAYS
+    # One unit short of standard after two days at half a unit a day
+    assert below_day == last_day + 2
+
+
+def test_count_below_standard_is_due_now(conn, plasters):
+    save_count(conn, plasters, "2024-05-01", plasters[3] - 1)
+    analytics.update(conn)
+    row = forecast_for(conn, plasters)
+    assert row[6] == row[4] == dates.to_day("2024-05-01")
+    assert row[5] is None
+
+
+def test_update_matches_a_rebuild(conn, plasters):
+    box_name, contents, item_name, standard = plasters
+    save_count(conn, plasters, "2024-05-01", standard)
+    analytics.update(conn)
+    assert analytics.update(conn) == 0
+
+    save_count(conn, plasters, "2024-05-11", standard - 4)
+    analytics.update(conn)
+    # Back-dated, edited and deleted checks recompute the box
+    back_dated = save_count(conn, plasters, "2024-05-06", standard - 1)
+    last = save_count(conn, plasters, "2024-05-21", standard - 6)
+    analytics.update(conn)
+    check, items = get_check_with_items(conn, back_dated)
+    edited = full_items(contents, **{item_name: standard - 3})
+    save_check(conn, check, edited, back_dated, check, stored(items))
+    delete_check(conn, last)
+    analytics.update(conn)
+    incremental = analytics.forecast(conn)
+
+    analytics.rebuild_all(conn)
+
+    assert analytics.forecast(conn) == incremental
+    assert forecast_for(conn, plasters)[5] == 4 / 10 * analytics.RATE_PERIOD_DAYS
+
+
+def test_archived_checks_still_count(conn, plasters):
+    standard = plasters[3]
+    save_count(conn, plasters, "2020-01-01", standard)
+    save_count(conn, plasters, "2020-01-11", standard - 5)
+    save_count(conn, plasters, "2024-05-01", standard - 5)
+    analytics.update(conn)
+    before = analytics.forecast(conn)
+
+    assert retention.archive_step(conn, "2024-01-01") == 2
+    assert analytics.update(conn) == 2
+    assert analytics.forecast(conn) == before
+    analytics.rebuild_all(conn)
+    assert analytics.forecast(conn) == before
@@ -0,0 +1,68 @@
+from db.catalog import (
+    DEFAULT_BOX_TYPE, DEFAULT_BOXES, STANDARD_BOX_CONTENTS, add_box_type, add_boxes, catalog_cache,
+)
+from db.connection import connect
+from db.repository import transaction
+
+
+def add_sites(conn):
+    with transaction(conn):
+        add_box_type(conn, "Vehicle", [("Foil Blanket", 2), ("Burn Gel", 1)])
+        add_boxes(conn, ["Van 1", "Van 2"], "Vehicle", site="Depot")
+        add_boxes(conn, ["Workshop"], site="North Yard")
+
+
+def test_seeded_catalog(conn):
+    catalog = catalog_cache.get(conn)
+    assert catalog.box_names == DEFAULT_BOXES
+    assert catalog.standard_contents(DEFAULT_BOXES[0]) == list(STANDARD_BOX_CONTENTS.items())
+
+
+def test_boxes_of_other_types_get_their_contents(conn):
+    add_sites(conn)
+    catalog = catalog_cache.get(conn)
+    assert catalog.standard_quantities("Van 1") == {"Foil Blanket": 2, "Burn Gel": 1}
+    # Boxes outside the catalog fall back to the default type
+    assert catalog.standard_quantities("Unknown") == STANDARD_BOX_CONTENTS
+
+
+def names(catalog, matches):
+    return [catalog.boxes[index][0] for index in matches]
+
+
+def test_search_matches_name_or_site_in_any_case(conn):
+    add_sites(conn)
+    catalog = catalog_cache.get(conn)
+    assert names(catalog, catalog.search("VAN")) == ["Van 1", "Van 2"]
+    assert names(catalog, catalog.search(" depot ")) == ["Van 1", "Van 2"]
+    assert names(catalog, catalog.search("yard")) == ["Workshop"]
+    assert names(catalog, catalog.search("")) == catalog.box_names
+    assert catalog.search("no such box") == []
+
+
+def test_search_within_narrows_the_previous_matches(conn):
+    # As the box picker does while the search text grows
+    add_sites(conn)
+    catalog = catalog_cache.get(conn)
+    matches = catalog.search("v")
+    narrowed = catalog.search("van 2", matches)
+    assert names(catalog, narrowed) == ["Van 2"]
+    assert narrowed == catalog.search("van 2")
+    # Empty text keeps the candidates it was given
+    assert catalog.search("", matches) == matches
+
+
+def test_cache_reloads_after_a_change_from_another_connection(conn, tmp_path):
+    before = catalog_cache.get(conn)
+    assert catalog_cache.get(conn) is before
+
+    other = connect(str(tmp_path / "checks.db"))
+    try:
+        with transaction(other):
+            add_boxes(other, ["Reception"], DEFAULT_BOX_TYPE)
+    finally:
+        other.close()
+
+    after = catalog_cache.get(conn)
+    assert after is not before
+    assert "Reception" in after.box_names
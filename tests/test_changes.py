@@ -0,0 +1,55 @@
+from db import changes
+from db.repository import delete_check, save_check
+
+from conftest import full_items, stored
+
+
+def test_version_grows_with_every_change(conn, box):
+    box_name, contents = box
+    assert changes.current_version(conn) == 0
+    check_id = save_check(conn, (box_name, "2024-05-01", ""), full_items(contents))
+    after_insert = changes.current_version(conn)
+    assert after_insert > 0
+    delete_check(conn, check_id)
+    assert changes.current_version(conn) > after_insert
+
+
+def test_history_changes_since_a_version(conn, box):
+    box_name, contents = box
+    items = full_items(contents)
+    kept = save_check(conn, (box_name, "2024-05-01", ""), items)
+    deleted = save_check(conn, (box_name, "2024-05-02", ""), items)
+    since = changes.current_version(conn)
+    assert changes.history_changes(conn, since) == (since, [], [])
+
+    added = save_check(conn, (box_name, "2024-05-03", "New"), items)
+    save_check(conn, (box_name, "2024-05-01", "Edited"), items, kept, (box_name, "2024-05-01", ""), stored(items))
+    delete_check(conn, deleted)
+
+    version, rows, removed = changes.history_changes(conn, since)
+
+    assert version == changes.current_version(conn)
+    assert sorted(rows) == [
+        (kept, box_name, "2024-05-01", "Edited", 0),
+        (added, box_name, "2024-05-03", "New", 0),
+    ]
+    assert removed == [deleted]
+    assert changes.check_changed(conn, kept, since)
+    assert not changes.check_changed(conn, kept, version)
+
+
+def test_too_many_changes_mean_a_reload(conn, box):
+    box_name, contents = box
+    items = full_items(contents)
+    for day in range(1, 5):
+        save_check(conn, (box_name, f"2024-05-0{day}", ""), items)
+
+    assert len(changes.changed_checks(conn, 0, limit=4)) == 4
+    assert changes.changed_checks(conn, 0, limit=3) is None
+
+
+def test_versioned_reads_the_version_first(conn, box):
+    box_name, contents = box
+    version, check_id = changes.versioned(conn, save_check, (box_name, "2024-05-01", ""), full_items(contents))
+    # The save itself comes after the version it returns
+    assert changes.check_changed(conn, check_id, version)
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+
+import pytest
+
+import cli
+from db.migrations import SCHEMA_VERSION, migrate
+from db.repository import save_check
+
+from conftest import full_items
+
+REPORT_COMMANDS = [
+    ["summary"], ["overdue"], ["low-stock"], ["expiring"], ["fleet"], ["restock"], ["forecast"],
+]
+
+
+@pytest.fixture
+def db_path(conn, box, tmp_path):
+    """A current database with one short check."""
+    box_name, contents = box
+    save_check(conn, (box_name, "2024-05-01", ""), full_items(contents, **{contents[0][0]: 0}))
+    return str(tmp_path / "checks.db")
+
+
+@pytest.fixture
+def old_path(open_raw, tmp_path):
+    """A version 5 database in rollback journal mode."""
+    conn = open_raw("old")
+    migrate(conn, 5)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+    return str(tmp_path / "old.db")
+
+
+def file_state(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0], conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("command", REPORT_COMMANDS + [["integrity"]], ids=lambda command: command[0])
+def test_reports_run_on_a_current_database(db_path, command, capsys):
+    assert cli.main(["--db", db_path, *command]) == 0
+    assert capsys.readouterr().out
+
+
+def test_low_stock_lists_the_short_item(db_path, box, capsys):
+    box_name, contents = box
+    item_name, standard_qty = contents[0]
+
+    cli.main(["--db", db_path, "--csv", "low-stock"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "box,checked,item,standard,current,short"
+    assert lines[1:] == [f"{box_name},2024-05-01,{item_name},{standard_qty},0,{standard_qty}"]
+
+
+@pytest.mark.parametrize(
+    "command", REPORT_COMMANDS + [["archive"], ["sync-status"]], ids=lambda command: command[0]
+)
+def test_old_schemas_are_refused_and_left_alone(old_path, command, capsys):
+    assert cli.main(["--db", old_path, *command]) == 1
+
+    assert "migrate" in capsys.readouterr().err
+    assert file_state(old_path) == (5, "delete")
+
+
+@pytest.mark.parametrize("command", REPORT_COMMANDS + [["import", "csv", "in.csv"]], ids=lambda c: c[0])
+def test_missing_files_are_not_created(tmp_path, command, capsys):
+    path = str(tmp_path / "typo.db")
+
+    assert cli.main(["--db", path, *command]) == 1
+
+    assert "Cannot open database" in capsys.readouterr().err
+    assert not os.path.exists(path)
+
+
+def test_integrity_reports_an_old_schema(old_path, capsys):
+    assert cli.main(["--db", old_path, "integrity"]) == 1
+    assert f"schema version 5, expected {SCHEMA_VERSION}" in capsys.readouterr().out
+
+
+def test_migrate_upgrades(old_path, capsys):
+    assert cli.main(["--db", old_path, "migrate"]) == 0
+
+    assert f"Schema version 5 -> {SCHEMA_VERSION}" in capsys.readouterr().out
+    assert file_state(old_path) == (SCHEMA_VERSION, "wal")
+    assert cli.main(["--db", old_path, "expiring"]) == 0
+
+
+def test_export_then_import(db_path, open_database, tmp_path, capsys):
+    output = str(tmp_path / "history.csv")
+    open_database("target").close()
+    target = str(tmp_path / "target.db")
+
+    assert cli.main(["--db", db_path, "export", "csv", output]) == 0
+    assert cli.main(["--db", target, "import", "csv", output]) == 0
+
+    assert "Imported 1 checks" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("command", [["sync-serve"], ["sync-pull", "http://127.0.0.1:8765"]],
+                         ids=lambda command: command[0])
+def test_sync_commands_need_a_token(command):
+    with pytest.raises(SystemExit):
+        cli.build_parser().parse_args(command)
+
+
+def test_sync_server_listens_on_loopback_by_default():
+    args = cli.build_parser().parse_args(["sync-serve", "--token", "secret"])
+    assert args.host == "127.0.0.1"
@@ -0,0 +1,101 @@
+from db import dates, status
+from db.connection import connect
+from db.details import CheckDetails, DetailsCache
+from db.repository import save_check
+
+from conftest import full_items, stored
+
+
+def save(conn, box, day, notes=""):
+    box_name, contents = box
+    return save_check(conn, (box_name, f"2024-05-{day:02d}", notes), full_items(contents))
+
+
+def test_view_model_has_the_item_statuses(conn, box):
+    box_name, contents = box
+    short = contents[0][0]
+    items = full_items(contents, **{short: 0})
+    items[1] = items[1][:3] + ("2024-05-01",) + items[1][4:]
+    check_id = save_check(conn, (box_name, "2024-05-01", ""), items)
+
+    details = DetailsCache().get(conn, check_id)
+
+    by_name = {item[0]: item[5:] for item in details.items}
+    assert by_name[short][0] == status.LOW_STOCK
+    assert by_name[items[1][0]][1] == status.EXPIRED
+    assert details.check == (box_name, "2024-05-01", "")
+
+
+def test_second_get_is_a_hit(conn, box):
+    cache = DetailsCache()
+    check_id = save(conn, box, 1)
+    first = cache.get(conn, check_id)
+    assert cache.get(conn, check_id) is first
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_missing_check_is_none(conn):
+    assert DetailsCache().get(conn, 12345) is None
+
+
+def test_change_from_another_connection_is_reloaded(conn, box, tmp_path):
+    cache = DetailsCache()
+    check_id = save(conn, box, 1)
+    other_id = save(conn, box, 2)
+    cache.get(conn, check_id)
+    other = cache.get(conn, other_id)
+
+    writer = connect(str(tmp_path / "checks.db"))
+    try:
+        box_name, contents = box
+        items = full_items(contents)
+        save_check(writer, (box_name, "2024-05-01", "Edited elsewhere"), items,
+                   check_id, (box_name, "2024-05-01", ""), stored(items))
+    finally:
+        writer.close()
+
+    assert cache.get(conn, check_id).general_notes == "Edited elsewhere"
+    # Checks the change did not touch stay cached
+    assert cache.get(conn, other_id) is other
+
+
+def test_least_recently_used_entry_is_evicted(conn, box):
+    cache = DetailsCache(size=2)
+    first, second, third = (save(conn, box, day) for day in (1, 2, 3))
+    cache.get(conn, first)
+    cache.get(conn, second)
+    cache.get(conn, first)
+    cache.get(conn, third)
+
+    assert list(cache.entries) == [first, third]
+
+
+def test_prefetch_loads_only_what_is_missing(conn, box):
+    cache = DetailsCache()
+    check_ids = [save(conn, box, day) for day in (1, 2, 3)]
+    cache.get(conn, check_ids[0])
+
+    assert cache.prefetch(conn, check_ids + [12345]) == 2
+    assert cache.prefetch(conn, check_ids) == 0
+    cache.get(conn, check_ids[2])
+    assert cache.stats()["hits"] == 1
+
+
+def test_load_that_raced_an_invalidation_is_not_stored(conn, box):
+    cache = DetailsCache()
+    check_id = save(conn, box, 1)
+    epoch = cache.epoch
+    cache.invalidate(check_id)
+    cache.store({check_id: object()}, 0, epoch)
+    assert check_id not in cache.entries
+
+
+def test_for_day_rederives_expiry_statuses(conn, box):
+    box_name, contents = box
+    item = (contents[0][0], 1, 1, "2024-05-10", "")
+    today = dates.to_day("2024-05-01")
+    details = CheckDetails(1, (box_name, "2024-05-01", ""), [item], today)
+    assert details.items[0][6] == status.EXPIRING_SOON
+    assert details.for_day(today) is details
+    assert details.for_day(dates.to_day("2024-05-10")).items[0][6] == status.EXPIRED
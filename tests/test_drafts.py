@@ -0,0 +1,44 @@
+from db.drafts import clear_draft, get_draft, save_draft
+
+
+def test_no_draft_until_one_is_saved(conn):
+    assert get_draft(conn) is None
+
+
+def test_draft_text_comes_back_as_typed(conn):
+    header = (None, "Box A", "2024-05-0", "Half typed")
+    save_draft(conn, header, [("Bandage", "1x", "2024-13", ""), ("Gauze", "", "", "torn")])
+
+    saved_header, items, updated_at = get_draft(conn)
+
+    assert saved_header == header
+    assert items == {"Bandage": ("1x", "2024-13", ""), "Gauze": ("", "", "torn")}
+    assert updated_at
+
+
+def test_later_writes_only_touch_the_items_given(conn):
+    save_draft(conn, (None, "Box A", "", ""), [("Bandage", "1", "", ""), ("Gauze", "2", "", "")])
+    save_draft(conn, (7, "Box A", "2024-05-01", ""), [("Gauze", "3", "", "")])
+
+    header, items, _ = get_draft(conn)
+
+    assert header == (7, "Box A", "2024-05-01", "")
+    assert items == {"Bandage": ("1", "", ""), "Gauze": ("3", "", "")}
+
+
+def test_reset_drops_the_previous_items(conn):
+    save_draft(conn, (None, "Box A", "", ""), [("Bandage", "1", "", "")])
+    save_draft(conn, (None, "Box B", "", ""), [("Splint", "1", "", "")], reset=True)
+
+    header, items, _ = get_draft(conn)
+
+    assert header[1] == "Box B"
+    assert items == {"Splint": ("1", "", "")}
+
+
+def test_clear_draft(conn):
+    save_draft(conn, (None, "Box A", "", ""), [("Bandage", "1", "", "")])
+    clear_draft(conn)
+
+    assert get_draft(conn) is None
+    assert conn.execute("SELECT COUNT(*) FROM check_draft_items").fetchone()[0] == 0
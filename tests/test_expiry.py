@@ -0,0 +1,51 @@
+from db import dates, expiry, fleet, status
+from db.repository import save_check
+
+from conftest import full_items
+
+TODAY = dates.to_day("2024-06-01")
+
+
+def save_dated(conn, box, check_date, **expiry_dates):
+    box_name, contents = box
+    items = [
+        (name, standard, current, expiry_dates.get(name, ""), notes)
+        for name, standard, current, _, notes in full_items(contents)
+    ]
+    return save_check(conn, (box_name, check_date, ""), items)
+
+
+def test_expiring_items_of_latest_checks_soonest_first(conn, box):
+    box_name, contents = box
+    (a, a_qty), (b, b_qty), (c, _) = contents[:3]
+    # Superseded: its dates no longer count
+    save_dated(conn, box, "2024-04-01", **{a: "2024-06-02"})
+    save_dated(conn, box, "2024-05-01", **{a: "2024-06-11", b: "2024-05-31", c: "2025-01-01"})
+    fleet.update(conn)
+
+    rows = expiry.expiring(conn, days=30, today=TODAY)
+
+    assert rows == [
+        (dates.to_day("2024-05-31"), box_name, b, b_qty, status.EXPIRED, -1),
+        (dates.to_day("2024-06-11"), box_name, a, a_qty, status.EXPIRING_SOON, 10),
+    ]
+    assert [row[2] for row in expiry.expiring(conn, days=30, today=TODAY, include_expired=False)] == [a]
+
+
+def test_expiring_today_counts_as_expired(conn, box):
+    _, contents = box
+    item = contents[0][0]
+    save_dated(conn, box, "2024-05-01", **{item: "2024-06-01"})
+    fleet.update(conn)
+    assert expiry.expiring(conn, days=0, today=TODAY)[0][4] == status.EXPIRED
+    assert expiry.expiring(conn, days=0, today=TODAY, include_expired=False) == []
+
+
+def test_calendar_follows_new_checks(conn, box):
+    _, contents = box
+    item = contents[0][0]
+    save_dated(conn, box, "2024-05-01", **{item: "2024-06-10"})
+    fleet.update(conn)
+    save_dated(conn, box, "2024-05-15")
+    fleet.update(conn)
+    assert expiry.expiring(conn, days=30, today=TODAY) == []
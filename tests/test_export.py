@@ -0,0 +1,67 @@
+import csv
+import json
+
+import pytest
+
+from db import export, retention
+from db.repository import save_check
+
+from conftest import full_items
+
+
+@pytest.fixture
+def history(conn, box):
+    """An archived check and two live ones; returns their ids, oldest first."""
+    box_name, contents = box
+    check_ids = [
+        save_check(conn, (box_name, check_date, notes), full_items(contents))
+        for check_date, notes in (("2020-01-01", "Archived"), ("2024-05-01", ""), ("2024-06-01", "Latest"))
+    ]
+    assert retention.archive_step(conn, "2021-01-01") == 1
+    return check_ids
+
+
+def test_csv_export_streams_every_check_oldest_first(conn, box, history, tmp_path):
+    _, contents = box
+    path = tmp_path / "out" / "history.csv"
+    progress = []
+
+    rows_written = export.export_history(
+        conn, str(path), "csv", lambda rows, rate: progress.append(rows), chunk_size=len(contents),
+    )
+
+    with open(path, newline="", encoding="utf-8") as f:
+        header, *rows = list(csv.reader(f))
+    assert tuple(header) == export.EXPORT_COLUMNS
+    assert rows_written == len(rows) == 3 * len(contents)
+    assert [int(row[0]) for row in rows[::len(contents)]] == history
+    assert rows[0][3] == "Archived"
+    # One progress call per chunk
+    assert progress == [len(contents) * n for n in (1, 2, 3)]
+    assert not (tmp_path / "out" / "history.csv.part").exists()
+
+
+def test_jsonl_export(conn, box, history, tmp_path):
+    box_name, contents = box
+    path = tmp_path / "history.jsonl"
+    export.export_history(conn, str(path), "jsonl")
+
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 3 * len(contents)
+    item_name, standard_qty = contents[0]
+    assert {
+        (row["check_id"], row["box_name"], row["standard_quantity"])
+        for row in rows if row["item_name"] == item_name
+    } == {(check_id, box_name, standard_qty) for check_id in history}
+
+
+def test_failed_export_leaves_no_file(conn, history, tmp_path):
+    path = tmp_path / "out" / "history.csv"
+
+    def fail(rows, rate):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        export.export_history(conn, str(path), progress=fail)
+    assert list((tmp_path / "out").iterdir()) == []
@@ -0,0 +1,86 @@
+from db import dates, fleet
+from db.catalog import catalog_cache
+from db.repository import delete_check, save_check
+
+from conftest import full_items
+
+
+def save(conn, box_name, check_date, **current):
+    contents = catalog_cache.get(conn).standard_contents(box_name)
+    return save_check(conn, (box_name, check_date, ""), full_items(contents, **current))
+
+
+def status_of(conn, box_name, **kwargs):
+    (row,) = [row for row in fleet.fleet_status(conn, **kwargs) if row["box_name"] == box_name]
+    return row
+
+
+def table(conn):
+    return sorted(conn.execute("SELECT * FROM box_status"))
+
+
+def test_boxes_never_checked_are_listed_as_overdue(conn):
+    fleet.update(conn)
+    rows = fleet.fleet_status(conn)
+    assert [row["box_name"] for row in rows] == catalog_cache.get(conn).box_names
+    assert all(row["overdue"] and row["check_id"] is None for row in rows)
+
+
+def test_latest_check_of_each_box(conn, box):
+    box_name, contents = box
+    short = contents[0][0]
+    save(conn, box_name, "2024-04-01")
+    latest = save(conn, box_name, "2024-05-01", **{short: 0})
+    fleet.update(conn)
+
+    row = status_of(conn, box_name, today=dates.to_day("2024-05-11"))
+
+    assert (row["check_id"], row["check_date"], row["days_since"]) == (latest, "2024-05-01", 10)
+    assert (row["low_stock"], row["expired"], row["overdue"]) == (1, 0, False)
+
+
+def test_deleting_the_latest_check_falls_back_to_the_previous_one(conn, box):
+    box_name, _ = box
+    previous = save(conn, box_name, "2024-04-01")
+    latest = save(conn, box_name, "2024-05-01")
+    fleet.update(conn)
+    delete_check(conn, latest)
+
+    assert fleet.update(conn) == 1
+    assert status_of(conn, box_name)["check_id"] == previous
+    assert fleet.update(conn) == 0
+
+
+def test_update_matches_a_rebuild(conn):
+    first, second, third = catalog_cache.get(conn).box_names[:3]
+    fleet.update(conn)
+    save(conn, first, "2024-05-01")
+    check_id = save(conn, second, "2024-05-01")
+    fleet.update(conn)
+    save(conn, second, "2024-04-01")  # Back-dated: still not the latest
+    delete_check(conn, check_id)
+    save(conn, third, "2024-05-02")
+    fleet.update(conn)
+    incremental = table(conn)
+
+    fleet.rebuild(conn)
+
+    assert table(conn) == incremental
+
+
+def test_boxes_needing_attention_come_first(conn):
+    contents = catalog_cache.get(conn).standard_contents
+    first, second, third = catalog_cache.get(conn).box_names[:3]
+    today = dates.to_day("2024-05-10")
+    save(conn, first, "2024-05-01")
+    save(conn, second, "2024-05-01", **{contents(second)[0][0]: 0})
+    expiring = full_items(contents(third))
+    expiring[0] = expiring[0][:3] + ("2024-05-05",) + expiring[0][4:]
+    save_check(conn, (third, "2024-05-01", ""), expiring)
+    fleet.update(conn)
+
+    rows = fleet.fleet_status(conn, today=today)
+
+    assert [row["box_name"] for row in rows[:3]] == sorted([second, third], key=str.lower) + [first]
+    assert status_of(conn, third, today=today)["expired_since"]
+    assert not status_of(conn, third, today=dates.to_day("2024-05-04"))["expired_since"]
@@ -0,0 +1,128 @@
+import json
+
+from db import export, importer
+from db.repository import delete_check, get_check_with_items, save_check
+
+from conftest import full_items
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "import.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+HEADER = ",".join(export.EXPORT_COLUMNS) + "\n"
+
+
+def test_export_import_round_trip(conn, box, open_database, tmp_path):
+    box_name, contents = box
+    item_name, standard_qty = contents[0]
+    items = full_items(contents, **{item_name: standard_qty - 1})
+    # A standard recorded away from the catalog's
+    items[1] = (items[1][0], items[1][1] + 5, *items[1][2:])
+    items[2] = (*items[2][:3], "2025-06-30", "Box, \"top\" shelf")
+    first = save_check(conn, (box_name, "2024-05-01", "Line one\nline two"), items)
+    second = save_check(conn, ("Van", "2024-05-02", ""), [("Torch", 1, 1, "", "")])
+    path = str(tmp_path / "history.csv")
+    export.export_history(conn, path)
+
+    target = open_database("target")
+    result = importer.import_file(target, path)
+
+    assert result == {"checks": 2, "items": len(items) + 1, "rejected": []}
+    imported = {
+        check[0]: (check, items)
+        for check, items in (get_check_with_items(target, check_id) for check_id in (1, 2))
+    }
+    assert imported[box_name] == get_check_with_items(conn, first)
+    assert imported["Van"] == get_check_with_items(conn, second)
+    flags = "SELECT status_flags FROM first_aid_checks ORDER BY id"
+    assert target.execute(flags).fetchall() == conn.execute(flags).fetchall()
+    # A box first seen in the import joins the catalog
+    assert target.execute("SELECT 1 FROM boxes WHERE name = 'Van'").fetchone()
+
+
+def test_jsonl_round_trip(conn, box, open_database, tmp_path):
+    box_name, contents = box
+    check_id = save_check(conn, (box_name, "2024-05-01", "Notes"), full_items(contents))
+    path = str(tmp_path / "history.jsonl")
+    export.export_history(conn, path, "jsonl")
+
+    target = open_database("target")
+    result = importer.import_file(target, path, "jsonl")
+
+    assert result["rejected"] == []
+    assert get_check_with_items(target, 1) == get_check_with_items(conn, check_id)
+
+
+def test_rows_with_the_wrong_number_of_cells_are_rejected(conn, tmp_path):
+    path = write_csv(tmp_path, HEADER + (
+        ",Van,2024-05-02,,Torch,1,1,,\n"
+        ",Van,2024-05-02,,Gloves,1\n"
+        ",Van,2024-05-02,,Plasters,1,1,,,extra\n"
+        ",Van,2024-05-02,,Pins,2,2,,\n"
+    ))
+
+    result = importer.import_file(conn, path)
+
+    assert result["checks"] == 1 and result["items"] == 2
+    assert result["rejected"] == [
+        (3, "Expected 9 columns, found 6!"),
+        (4, "Expected 9 columns, found 10!"),
+    ]
+    assert conn.execute("SELECT COUNT(*) FROM check_items").fetchone() == (2,)
+
+
+def test_rejected_rows_are_numbered_by_file_line(conn, tmp_path):
+    path = write_csv(tmp_path, HEADER + (
+        ',Van,2024-05-02,"Two\nlines",Torch,1,1,,\n'
+        ",Van,02/05/2024,,Gloves,1,1,,\n"
+    ))
+
+    result = importer.import_file(conn, path)
+
+    assert result["rejected"] == [(4, "Check Date must be in YYYY-MM-DD format!")]
+
+
+def test_columns_are_matched_by_header_name(conn, tmp_path):
+    header = "item_name,box_name,check_date,current_quantity,standard_quantity\n"
+    path = write_csv(tmp_path, header + "Torch,Van,2024-05-02,1,2\n")
+
+    result = importer.import_file(conn, path)
+
+    assert result["rejected"] == []
+    assert get_check_with_items(conn, 1) == (("Van", "2024-05-02", ""), [("Torch", 2, 1, "", "")])
+
+
+def test_import_rejects_invalid_values(conn, tmp_path):
+    rows = [
+        {"box_name": "Van", "check_date": "2024-05-02", "item_name": "Torch",
+         "standard_quantity": 1, "current_quantity": 1},
+        {"box_name": "Van", "check_date": "2024-05-02", "item_name": "Torch",
+         "standard_quantity": 1, "current_quantity": 0},
+        {"box_name": "Van", "check_date": "2024-05-02", "item_name": "Plasters",
+         "standard_quantity": 1, "current_quantity": "lots"},
+        {"box_name": "", "check_date": "2024-05-02", "item_name": "Plasters",
+         "standard_quantity": 1, "current_quantity": 1},
+        {"box_name": "Van", "check_date": "2024-05-02", "item_name": "Mystery",
+         "current_quantity": 1},
+    ]
+    path = tmp_path / "import.json"
+    path.write_text(json.dumps(rows), encoding="utf-8")
+
+    result = importer.import_file(conn, str(path), "json")
+
+    assert result["checks"] == 1 and result["items"] == 1
+    assert [number for number, _ in result["rejected"]] == [2, 3, 4, 5]
+    assert result["rejected"][0][1] == "Duplicate item Torch for this check!"
+
+
+def test_import_never_reuses_deleted_ids(conn, tmp_path):
+    check_id = save_check(conn, ("Van", "2024-05-01", ""), [("Torch", 1, 1, "", "")])
+    delete_check(conn, check_id)
+
+    importer.import_file(conn, write_csv(tmp_path, HEADER + ",Van,2024-05-02,,Torch,1,1,,\n"))
+
+    assert conn.execute("SELECT id FROM first_aid_checks").fetchall() == [(check_id + 1,)]
+    assert get_check_with_items(conn, check_id) == (None, [])
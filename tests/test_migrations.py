@@ -0,0 +1,109 @@
+import pytest
+
+from db import reports, search
+from db.migrations import SCHEMA_VERSION, get_schema_version, migrate
+from db.repository import get_check_with_items
+from db.status import EXPIRED_FLAG, LOW_STOCK_FLAG
+
+
+@pytest.fixture
+def conn(open_raw):
+    """A database as the first release left it, with two checks."""
+    conn = open_raw()
+    migrate(conn, 1)
+    conn.executemany(
+        "INSERT INTO first_aid_checks (id, box_name, check_date, general_notes) VALUES (?, ?, ?, ?)",
+        [
+            (1, "Cafe", "2024-03-05", "Restocked after inspection"),
+            (2, "Garage", "2024-04-01", ""),
+            # strptime let unpadded dates through the form
+            (3, "Cafe", "2024-3-6", ""),
+        ],
+    )
+    conn.executemany("""
+        INSERT INTO check_items
+            (check_id, item_name, standard_quantity, current_quantity, expiry_date, item_notes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        (1, "Assorted Sterile Plasters", 20, 20, "2026-01-01", ""),
+        (1, "Safety Pins", 6, 4, "", "Two used on a sling"),
+        (2, "Custom Thing", 3, 3, "2024-03-01", "Kept in the drawer"),
+    ])
+    conn.commit()
+    return conn
+
+
+def test_migrates_version_1_to_latest(conn):
+
+    applied = migrate(conn)
+
+    assert applied == list(range(2, SCHEMA_VERSION + 1))
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    assert reports.integrity_problems(conn) == []
+    assert conn.execute("PRAGMA foreign_keys").fetchone() == (1,)
+    # Already current: nothing left to apply
+    assert migrate(conn) == []
+
+
+def test_version_1_checks_survive_migration(conn):
+    migrate(conn)
+
+    check, items = get_check_with_items(conn, 1)
+    assert check == ("Cafe", "2024-03-05", "Restocked after inspection")
+    assert items == [
+        ("Assorted Sterile Plasters", 20, 20, "2026-01-01", ""),
+        ("Safety Pins", 6, 4, "", "Two used on a sling"),
+    ]
+    # A standard outside the catalog is kept with the item
+    check, items = get_check_with_items(conn, 2)
+    assert check == ("Garage", "2024-04-01", "")
+    assert items == [("Custom Thing", 3, 3, "2024-03-01", "Kept in the drawer")]
+
+
+def test_migration_flags_checks_from_their_items(conn):
+    migrate(conn)
+
+    flags = dict(conn.execute("SELECT id, status_flags FROM first_aid_checks"))
+    assert flags == {1: LOW_STOCK_FLAG, 2: EXPIRED_FLAG, 3: 0}
+
+
+def test_unpadded_dates_are_read(conn):
+    migrate(conn)
+
+    assert get_check_with_items(conn, 3) == (("Cafe", "2024-03-06", ""), [])
+
+
+def test_new_database_opens_at_latest(open_database):
+    conn = open_database("new")
+
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert reports.integrity_problems(conn) == []
+
+
+def test_migration_indexes_existing_notes(conn):
+    migrate(conn)
+
+    assert [row[0] for row in search.search_checks(conn, "sling")] == [1]
+    assert [row[0] for row in search.search_checks(conn, "inspection")] == [1]
+    assert [row[0] for row in search.search_checks(conn, "drawer")] == [2]
+
+
+def test_orphaned_items_are_dropped(conn):
+    # Version 1 never turned foreign keys on
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute("""
+        INSERT INTO check_items
+            (check_id, item_name, standard_quantity, current_quantity, expiry_date, item_notes)
+        VALUES (99, 'Safety Pins', 6, 6, '', 'Left behind')
+    """)
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys = ON")
+
+    migrate(conn)
+
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM check_items WHERE check_id = 99").fetchone() == (0,)
+    assert conn.execute("SELECT COUNT(*) FROM check_items").fetchone() == (3,)
+    assert search.search_checks(conn, "behind") == []
+    assert reports.integrity_problems(conn) == []
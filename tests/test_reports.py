@@ -0,0 +1,41 @@
+from db import dates, reports
+from db.catalog import catalog_cache
+from db.repository import save_check
+
+from conftest import full_items
+
+TODAY = dates.to_day("2024-06-01")
+
+
+def test_restock_list_covers_the_latest_check_of_every_box(conn):
+    catalog = catalog_cache.get(conn)
+    first, second = catalog.box_names[:2]
+    contents = catalog.standard_contents(first)
+    (short, short_standard), (dated, dated_standard) = contents[-1], contents[-2]
+
+    # Superseded by the next check of the box
+    save_check(conn, (first, "2024-04-01", ""), full_items(contents, **{dated: 0}))
+    save_check(conn, (first, "2024-05-01", ""), full_items(contents, **{short: short_standard - 2}))
+    items = [
+        (name, standard, current, "2024-06-20" if name == dated else "", notes)
+        for name, standard, current, _, notes in full_items(contents)
+        if name != short  # Not recorded: all of it is missing
+    ]
+    save_check(conn, (second, "2024-05-01", ""), items)
+
+    rows = reports.restock_list(conn, days=30, today=TODAY)
+
+    assert rows == sorted(rows, key=lambda row: (-row[1], row[0]))
+    by_name = {row[0]: (*row[1:4], set(row[4].split(", "))) for row in rows}
+    assert by_name == {
+        short: (short_standard + 2, short_standard + 2, 0, {first, second}),
+        dated: (dated_standard, 0, dated_standard, {second}),
+    }
+    # The dated item only needs replacing within the horizon
+    assert dated not in {row[0] for row in reports.restock_list(conn, days=10, today=TODAY)}
+
+
+def test_nothing_to_order_at_standard(conn, box):
+    box_name, contents = box
+    save_check(conn, (box_name, "2024-05-01", ""), full_items(contents))
+    assert reports.restock_list(conn, today=TODAY) == []
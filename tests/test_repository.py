@@ -0,0 +1,194 @@
+import pytest
+
+from db import fleet, retention
+from db.catalog import catalog_cache, set_box_type_contents
+from db.repository import (
+    delete_check, get_check_with_items, get_history_page, save_check, transaction,
+)
+from db.status import EXPIRED_FLAG, LOW_STOCK_FLAG
+
+from conftest import full_items, stored
+
+
+def change_ops(conn, check_id):
+    return [row[0] for row in conn.execute(
+        "SELECT op FROM change_log WHERE check_id = ? ORDER BY seq", (check_id,)
+    )]
+
+
+def status_flags(conn, check_id):
+    return conn.execute(
+        "SELECT status_flags FROM first_aid_checks WHERE id = ?", (check_id,)
+    ).fetchone()[0]
+
+
+def test_save_new_check(conn, box):
+    box_name, contents = box
+    items = full_items(contents)
+
+    check_id = save_check(conn, (box_name, "2024-05-01", "All present"), items)
+
+    check, saved = get_check_with_items(conn, check_id)
+    assert check == (box_name, "2024-05-01", "All present")
+    assert saved == sorted(items)
+    assert status_flags(conn, check_id) == 0
+    assert change_ops(conn, check_id)[0] == "I"
+
+
+def test_edit_writes_changes_and_refreshes_flags(conn, box):
+    box_name, contents = box
+    check = (box_name, "2024-05-01", "")
+    items = full_items(contents)
+    check_id = save_check(conn, check, items)
+    stored_items = stored(items)
+
+    item_name, standard_qty = contents[0]
+    edited = full_items(contents, **{item_name: standard_qty - 1})
+    edited = [
+        row if row[0] != contents[1][0] else (*row[:3], "2024-04-30", "Out of date")
+        for row in edited
+    ]
+    save_check(conn, (box_name, "2024-05-01", "Short"), edited, check_id, check, stored_items)
+
+    check, saved = get_check_with_items(conn, check_id)
+    assert check == (box_name, "2024-05-01", "Short")
+    assert saved == sorted(edited)
+    assert status_flags(conn, check_id) == LOW_STOCK_FLAG | EXPIRED_FLAG
+    assert change_ops(conn, check_id)[0] == "I"
+    assert set(change_ops(conn, check_id)[1:]) == {"U"}
+
+
+def test_edit_removes_dropped_items(conn, box):
+    box_name, contents = box
+    check = (box_name, "2024-05-01", "")
+    items = full_items(contents)
+    check_id = save_check(conn, check, items)
+    stored_items = stored(items)
+
+    save_check(conn, check, items[1:], check_id, check, stored_items)
+
+    _, saved = get_check_with_items(conn, check_id)
+    assert saved == sorted(items[1:])
+
+
+def test_unchanged_edit_writes_nothing(conn, box):
+    box_name, contents = box
+    check = (box_name, "2024-05-01", "")
+    items = full_items(contents)
+    check_id = save_check(conn, check, items)
+    stored_items = stored(items)
+    logged = change_ops(conn, check_id)
+
+    save_check(conn, check, items, check_id, check, stored_items)
+
+    assert change_ops(conn, check_id) == logged
+
+
+def test_delete_check(conn, box):
+    box_name, contents = box
+    check_id = save_check(conn, (box_name, "2024-05-01", ""), full_items(contents))
+
+    delete_check(conn, check_id)
+
+    assert get_check_with_items(conn, check_id) == (None, [])
+    assert conn.execute(
+        "SELECT COUNT(*) FROM check_items WHERE check_id = ?", (check_id,)
+    ).fetchone()[0] == 0
+    assert change_ops(conn, check_id)[-1] == "D"
+
+
+@pytest.fixture
+def history(conn):
+    """Three boxes checked on the first of each month of 2024; every
+    fourth check is short of its first item."""
+    catalog = catalog_cache.get(conn)
+    ids = []
+    for month in range(1, 13):
+        for box_name in catalog.box_names:
+            contents = catalog.standard_contents(box_name)
+            current = {contents[0][0]: 0} if len(ids) % 4 == 0 else {}
+            check = (box_name, f"2024-{month:02d}-01", "")
+            ids.append(save_check(conn, check, full_items(contents, **current)))
+    return ids
+
+
+def all_pages(conn, limit, **filters):
+    rows = []
+    after = None
+    while True:
+        page = get_history_page(conn, after, limit, **filters)
+        assert len(page) <= limit
+        if not page:
+            return rows
+        rows += page
+        after = (page[-1][2], page[-1][0])
+
+
+def test_history_pages_cover_every_check_once(conn, history):
+    rows = all_pages(conn, limit=5)
+
+    assert sorted(row[0] for row in rows) == sorted(history)
+    keys = [(row[2], row[0]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_history_filters(conn, history):
+    box_name = catalog_cache.get(conn).box_names[0]
+
+    rows = all_pages(conn, limit=4, box_name=box_name)
+    assert len(rows) == 12 and {row[1] for row in rows} == {box_name}
+
+    rows = all_pages(conn, limit=4, date_from="2024-03-01", date_to="2024-04-01")
+    assert len(rows) == 6
+    assert {row[2] for row in rows} == {"2024-03-01", "2024-04-01"}
+
+    rows = all_pages(conn, limit=4, status_mask=LOW_STOCK_FLAG)
+    assert sorted(row[0] for row in rows) == history[::4]
+
+
+def test_history_includes_archived_checks(conn, history):
+    while retention.archive_step(conn, "2024-07-01"):
+        pass
+
+    rows = all_pages(conn, limit=7)
+
+    assert sorted(row[0] for row in rows) == sorted(history)
+    archived = [row for row in rows if row[4]]
+    assert archived and all(row[2] < "2024-07-01" and row[3] is None for row in archived)
+    keys = [(row[2], row[0]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+    assert sorted(row[0] for row in all_pages(conn, limit=7, status_mask=LOW_STOCK_FLAG)) == history[::4]
+
+
+def test_catalog_changes_leave_saved_checks_alone(conn, box):
+    box_name, contents = box
+    check_id = save_check(conn, (box_name, "2024-05-01", ""), full_items(contents))
+    saved = get_check_with_items(conn, check_id)
+
+    catalog = catalog_cache.get(conn)
+    with transaction(conn):
+        set_box_type_contents(
+            conn, catalog.box_type_by_name[box_name], [(name, qty * 2) for name, qty in contents]
+        )
+    catalog_cache.invalidate()
+
+    assert get_check_with_items(conn, check_id) == saved
+    assert status_flags(conn, check_id) == 0
+    (status,) = [row for row in fleet.update_and_status(conn) if row["box_name"] == box_name]
+    assert status["check_id"] == check_id and status["low_stock"] == 0
+    assert all_pages(conn, limit=10, status_mask=LOW_STOCK_FLAG) == []
+
+
+def test_edit_stores_the_current_standard(conn, box):
+    box_name, contents = box
+    check = (box_name, "2024-05-01", "")
+    items = full_items(contents)
+    check_id = save_check(conn, check, items)
+    item_name, standard_qty = contents[0]
+
+    # The form shows the catalog's standard, here raised since the check
+    edited = [(item_name, standard_qty + 1, *items[0][2:])] + items[1:]
+    save_check(conn, check, edited, check_id, check, stored(items))
+
+    assert get_check_with_items(conn, check_id)[1] == sorted(edited)
+    assert status_flags(conn, check_id) == LOW_STOCK_FLAG
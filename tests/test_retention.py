@@ -0,0 +1,54 @@
+from datetime import date
+
+from db import retention
+from db.repository import get_check_with_items, get_history_page, save_check
+
+from conftest import full_items
+
+
+def test_summarize_counts_items_expiring_on_the_check_date():
+    checks = [
+        (1, "2024-05-01", "", [
+            ("Plasters", 20, 20, "2024-05-01", ""),
+            ("Safety Pins", 6, 5, "2024-05-02", ""),
+            ("Eye Wash", 2, 2, "", ""),
+        ]),
+        (2, "2024-05-09", "", [("Plasters", 20, 20, "2025-01-01", "")]),
+    ]
+
+    assert retention.summarize(checks) == (2, 4, 1, 1, "2024-05-01", "2024-05-09")
+
+
+def test_cutoff_date_clamps_to_shorter_months():
+    assert retention.cutoff_date(1, date(2024, 3, 31)) == "2024-02-29"
+    assert retention.cutoff_date(12, date(2024, 5, 15)) == "2023-05-15"
+
+
+def test_archive_keeps_the_latest_check_of_each_box(conn, box):
+    box_name, contents = box
+    items = full_items(contents)
+    items[0] = (*items[0][:3], "2023-01-01", "Expired on the day")
+    old = save_check(conn, (box_name, "2023-01-01", "Old notes"), items)
+    older = save_check(conn, (box_name, "2022-12-01", ""), full_items(contents))
+    latest = save_check(conn, (box_name, "2023-02-01", ""), full_items(contents))
+
+    while retention.archive_step(conn, "2024-01-01"):
+        pass
+
+    assert get_check_with_items(conn, old) == (None, [])
+    check, archived_items = retention.get_check_details(conn, old)
+    assert check == (box_name, "2023-01-01", "Old notes")
+    assert sorted(archived_items) == sorted(items)
+    assert get_check_with_items(conn, latest)[0] is not None
+    assert conn.execute("""
+        SELECT month, check_count, item_count, short_items, expired_items, first_check_date, last_check_date
+        FROM check_archive ORDER BY month
+    """).fetchall() == [
+        ("2022-12", 1, len(contents), 0, 0, "2022-12-01", "2022-12-01"),
+        ("2023-01", 1, len(contents), 0, 1, "2023-01-01", "2023-01-01"),
+    ]
+    assert [row[0] for row in get_history_page(conn)] == [latest, old, older]
+    # Archive moves are local: nothing for sync to send as a delete
+    assert conn.execute(
+        "SELECT op FROM change_log WHERE check_id = ? ORDER BY seq DESC LIMIT 1", (old,)
+    ).fetchone() == ("A",)
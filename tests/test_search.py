@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from db import search
+from db.repository import delete_check, save_check, transaction
+
+from conftest import full_items, stored
+
+
+def test_build_match_query():
+    assert search.build_match_query("  ") is None
+    assert search.build_match_query("eye wash") == '"eye" "wash"*'
+    assert search.build_match_query('"pins"!') == '"pins"*'
+
+
+def test_finds_general_and_item_notes(conn, box):
+    box_name, contents = box
+    items = full_items(contents)
+    items[0] = (*items[0][:4], "Torn packaging")
+    first = save_check(conn, (box_name, "2024-05-01", "Restocked after the audit"), items)
+    second = save_check(conn, (box_name, "2024-06-01", "Audit follow-up"), full_items(contents))
+
+    assert {row[0] for row in search.search_checks(conn, "audit")} == {first, second}
+    ((check_id, found_box, check_date, snippet),) = search.search_checks(conn, "torn pack")
+    assert (check_id, found_box, check_date) == (first, box_name, "2024-05-01")
+    assert snippet.startswith(f"{contents[0][0]}: ")
+    assert search.search_checks(conn, "nothing like this") == []
+
+
+def test_index_follows_edits_and_deletes(conn, box):
+    box_name, contents = box
+    check = (box_name, "2024-05-01", "")
+    items = full_items(contents)
+    items[0] = (*items[0][:4], "Torn packaging")
+    check_id = save_check(conn, check, items)
+
+    edited = [(*items[0][:4], "Replaced")] + items[1:]
+    save_check(conn, check, edited, check_id, check, stored(items))
+    assert search.search_checks(conn, "torn") == []
+    assert [row[0] for row in search.search_checks(conn, "replaced")] == [check_id]
+
+    delete_check(conn, check_id)
+    assert search.search_checks(conn, "replaced") == []
+
+
+def test_item_ids_past_16_bits_keep_their_own_notes(conn, box):
+    box_name, _ = box
+    with transaction(conn):
+        conn.execute("INSERT INTO items (id, name) VALUES (65536, 'Spare Gloves')")
+    first = save_check(conn, (box_name, "2024-05-01", ""), [("Spare Gloves", 1, 1, "", "Latex free")])
+    second = save_check(conn, (box_name, "2024-05-02", ""), [(conn.execute(
+        "SELECT name FROM items WHERE id = 1"
+    ).fetchone()[0], 1, 1, "", "Water damaged")])
+
+    assert [row[0] for row in search.search_checks(conn, "latex")] == [first]
+    assert [row[0] for row in search.search_checks(conn, "water")] == [second]
+
+
+def test_ids_too_large_for_the_key_are_refused(conn, box):
+    box_name, _ = box
+    with transaction(conn):
+        conn.execute("INSERT INTO items (id, name) VALUES (?, 'Huge Id')", (1 << search.ITEM_NOTES_KEY_BITS,))
+    with pytest.raises(sqlite3.IntegrityError):
+        save_check(conn, (box_name, "2024-05-01", ""), [("Huge Id", 1, 1, "", "Noted")])
+    # Items without notes are not indexed, so any id is fine
+    save_check(conn, (box_name, "2024-05-01", ""), [("Huge Id", 1, 1, "", "")])
+
+
+def test_like_fallback_matches_fts_results(conn, box):
+    box_name, contents = box
+    items = full_items(contents)
+    items[0] = (*items[0][:4], "Torn packaging")
+    first = save_check(conn, (box_name, "2024-05-01", "Audit"), items)
+
+    assert [row[0] for row in search.search_checks_like(conn, "torn")] == [first]
+    assert [row[0] for row in search.search_checks_like(conn, "audit")] == [first]
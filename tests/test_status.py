@@ -0,0 +1,78 @@
+import itertools
+
+import pytest
+
+from db import dates, fleet, reports, status
+from db.repository import get_check_with_items, save_check
+
+from conftest import full_items
+
+QUANTITIES = range(4)
+# Around day 10: before, on and after it, and no date
+EXPIRY_DAYS = [None, 9, 10, 11]
+
+
+def sql_value(conn, expression, **values):
+    return conn.execute(f"SELECT {expression}", values).fetchone()[0]
+
+
+@pytest.mark.parametrize("current, standard", list(itertools.product(QUANTITIES, QUANTITIES)))
+def test_stock_sql_agrees_with_stock_status(conn, current, standard):
+    low_stock = status.stock_status(current, standard) == status.LOW_STOCK
+    values = {"current": current, "standard": standard}
+    assert bool(sql_value(conn, status.low_stock_sql(":current", ":standard"), **values)) == low_stock
+    shortfall = sql_value(conn, status.shortfall_sql(":current", ":standard"), **values)
+    assert (shortfall > 0) == low_stock
+    assert shortfall == max(standard - current, 0)
+
+
+@pytest.mark.parametrize("expiry_day", EXPIRY_DAYS)
+def test_expired_sql_agrees_with_expiry_statuses(conn, expiry_day):
+    expired = status.expiry_statuses([expiry_day], 10)[0] == status.EXPIRED
+    values = {"expiry_day": expiry_day, "day": 10}
+    assert bool(sql_value(conn, status.expired_sql(":expiry_day", ":day"), **values)) == expired
+
+
+@pytest.mark.parametrize("items", [
+    [],
+    [(2, 2, None)],
+    [(2, 1, None), (1, 1, 11)],
+    [(1, 1, 10)],
+    [(1, 0, 9), (3, 4, 12)],
+])
+def test_check_flags_sql_agrees_with_check_flags(conn, items):
+    conn.execute("CREATE TEMP TABLE rows (standard, current, expiry_day)")
+    conn.executemany("INSERT INTO rows VALUES (?, ?, ?)", items)
+    flags = sql_value(conn, f"""(
+        SELECT {status.check_flags_sql("current", "standard", "expiry_day", ":day")} FROM rows
+    )""", day=10)
+    assert flags == status.check_flags(items, 10)
+
+
+def test_every_screen_classifies_a_check_alike(conn, box):
+    box_name, contents = box
+    (short, _), (expired, _), *_ = contents
+    items = [
+        (item_name, standard_qty, standard_qty - (item_name == short),
+         "2024-05-01" if item_name == expired else "", "")
+        for item_name, standard_qty in contents
+    ]
+    check_id = save_check(conn, (box_name, "2024-05-01", ""), items)
+    fleet.rebuild(conn)
+
+    _, saved = get_check_with_items(conn, check_id)
+    stock = status.stock_statuses([item[2] for item in saved], [item[1] for item in saved])
+    expiry = status.expiry_statuses([dates.to_day(item[3]) for item in saved], dates.to_day("2024-05-01"))
+    # The details screen
+    assert [item[0] for item, name in zip(saved, stock) if name == status.LOW_STOCK] == [short]
+    assert [item[0] for item, name in zip(saved, expiry) if name == status.EXPIRED] == [expired]
+    # The history filter
+    flags = conn.execute("SELECT status_flags FROM first_aid_checks WHERE id = ?", (check_id,)).fetchone()[0]
+    assert flags == status.LOW_STOCK_FLAG | status.EXPIRED_FLAG
+    # The dashboard
+    (row,) = [row for row in fleet.fleet_status(conn) if row["box_name"] == box_name]
+    assert (row["low_stock"], row["expired"]) == (1, 1)
+    # The restock list, as of the check date
+    restock = {row[0]: row[2:4] for row in reports.restock_list(conn, 0, dates.to_day("2024-05-01"))}
+    assert restock[short][0] == 1
+    assert restock[expired][1] > 0
@@ -0,0 +1,224 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from db import importer, sync
+from db.catalog import catalog_cache
+from db.connection import connect
+from db.repository import delete_check, get_check_with_items, save_check
+from db.status import LOW_STOCK_FLAG
+
+from conftest import full_items, stored
+
+
+@pytest.fixture
+def devices(open_database):
+    return open_database("a"), open_database("b")
+
+
+def exchange(a, b):
+    """One sync session: each side applies what the other has for it."""
+    for source, target in ((a, b), (b, a)):
+        sync.apply_bundle(target, sync.build_bundle(source, sync.device_id(target)))
+
+
+def checks_by_uid(conn):
+    """{uid: (check, items)} of every live check, as any device names it."""
+    own = sync.device_id(conn)
+    uids = dict(conn.execute("SELECT check_id, uid FROM sync_ids"))
+    return {
+        uids.get(check_id, f"{own}:{check_id}"): get_check_with_items(conn, check_id)
+        for check_id, in conn.execute("SELECT id FROM first_aid_checks")
+    }
+
+
+def shared_check(a, b, box):
+    """A check saved on ``a`` and synced to ``b``; returns both local ids."""
+    box_name, contents = box
+    check = (box_name, "2024-05-01", "")
+    a_id = save_check(a, check, full_items(contents))
+    exchange(a, b)
+    (b_id,) = [row[0] for row in b.execute("SELECT id FROM first_aid_checks")]
+    return a_id, b_id
+
+
+@pytest.fixture
+def box(devices):
+    catalog = catalog_cache.get(devices[0])
+    name = catalog.box_names[0]
+    return name, catalog.standard_contents(name)
+
+
+def test_new_checks_reach_both_devices(devices, box):
+    a, b = devices
+    box_name, contents = box
+    save_check(a, (box_name, "2024-05-01", "From a"), full_items(contents))
+    save_check(b, (box_name, "2024-05-02", "From b"), full_items(contents))
+
+    exchange(a, b)
+
+    assert len(checks_by_uid(a)) == 2
+    assert checks_by_uid(a) == checks_by_uid(b)
+    # Nothing new to send once both are current
+    assert sync.build_bundle(a, sync.device_id(b))["checks"] == []
+
+
+def test_standards_travel_with_the_items(devices, box):
+    a, b = devices
+    box_name, contents = box
+    item_name, standard_qty = contents[0]
+    # Checked against a bigger standard than the catalog's, with an item
+    # the catalog does not have
+    importer.import_checks(a, [
+        (2, ("", box_name, "2024-05-01", "", item_name, str(standard_qty + 4), str(standard_qty + 2), "", "")),
+        (3, ("", box_name, "2024-05-01", "", "Torch", "2", "2", "", "")),
+    ])
+
+    exchange(a, b)
+
+    (b_id,) = [row[0] for row in b.execute("SELECT id FROM first_aid_checks")]
+    assert get_check_with_items(b, b_id) == get_check_with_items(a, 1)
+    assert get_check_with_items(b, b_id)[1] == [
+        (item_name, standard_qty + 4, standard_qty + 2, "", ""),
+        ("Torch", 2, 2, "", ""),
+    ]
+    flags = "SELECT status_flags FROM first_aid_checks"
+    assert a.execute(flags).fetchall() == [(LOW_STOCK_FLAG,)]
+    assert b.execute(flags).fetchall() == [(LOW_STOCK_FLAG,)]
+
+
+def test_concurrent_edits_keep_the_later_one(devices, box):
+    a, b = devices
+    box_name, contents = box
+    a_id, b_id = shared_check(a, b, box)
+    check = (box_name, "2024-05-01", "")
+    items = full_items(contents)
+
+    save_check(a, (box_name, "2024-05-01", "Edited on a"), items, a_id, check, stored(items))
+    time.sleep(0.01)
+    later = full_items(contents, **{contents[0][0]: 0})
+    save_check(b, (box_name, "2024-05-01", "Edited on b"), later, b_id, check, stored(items))
+
+    exchange(a, b)
+
+    assert get_check_with_items(a, a_id) == get_check_with_items(b, b_id)
+    assert get_check_with_items(a, a_id)[0][2] == "Edited on b"
+    assert checks_by_uid(a) == checks_by_uid(b)
+    assert a.execute("SELECT status_flags FROM first_aid_checks WHERE id = ?", (a_id,)).fetchone() \
+        == b.execute("SELECT status_flags FROM first_aid_checks WHERE id = ?", (b_id,)).fetchone()
+
+
+def test_later_delete_wins_over_edit(devices, box):
+    a, b = devices
+    box_name, contents = box
+    a_id, b_id = shared_check(a, b, box)
+    check = (box_name, "2024-05-01", "")
+    items = full_items(contents)
+
+    save_check(a, (box_name, "2024-05-01", "Edited on a"), items, a_id, check, stored(items))
+    time.sleep(0.01)
+    delete_check(b, b_id)
+
+    exchange(a, b)
+
+    assert checks_by_uid(a) == checks_by_uid(b) == {}
+
+
+def test_later_edit_wins_over_delete(devices, box):
+    a, b = devices
+    box_name, contents = box
+    a_id, b_id = shared_check(a, b, box)
+    check = (box_name, "2024-05-01", "")
+    items = full_items(contents)
+
+    delete_check(b, b_id)
+    time.sleep(0.01)
+    save_check(a, (box_name, "2024-05-01", "Edited on a"), items, a_id, check, stored(items))
+
+    exchange(a, b)
+
+    # The check comes back on b under its old local id
+    assert get_check_with_items(b, b_id) == get_check_with_items(a, a_id)
+    assert get_check_with_items(b, b_id)[0][2] == "Edited on a"
+    assert checks_by_uid(a) == checks_by_uid(b)
+
+
+def test_bundle_from_the_same_device_is_refused(devices):
+    a, _ = devices
+    with pytest.raises(ValueError):
+        sync.apply_bundle(a, sync.build_bundle(a))
+
+
+@pytest.fixture
+def server(open_database, tmp_path):
+    """A sync server on a free loopback port, serving ``server.db`` from a
+    thread with a connection of its own; returns (url, conn on server.db)."""
+    conn = open_database("server")
+    server = sync.make_server(None, "secret", port=0)
+
+    def serve():
+        server.conn = connect(str(tmp_path / "server.db"))
+        try:
+            server.serve_forever()
+        finally:
+            server.conn.close()
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", conn
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_server_listens_on_loopback_only_by_default(conn):
+    server = sync.make_server(conn, "secret", port=0)
+    try:
+        assert server.server_address[0] == "127.0.0.1"
+    finally:
+        server.server_close()
+
+
+def test_server_needs_a_token(conn):
+    with pytest.raises(ValueError):
+        sync.make_server(conn, "", port=0)
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}, {"Authorization": "secret"}])
+def test_server_refuses_requests_without_its_token(server, headers):
+    url, _ = server
+    for request in (
+        urllib.request.Request(url + "/device", headers=headers),
+        urllib.request.Request(url + "/sync", data=b"", method="POST", headers=headers),
+    ):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request, timeout=5)
+        assert error.value.code == 401
+
+
+def test_pull_with_a_wrong_token_changes_nothing(server, open_database, box):
+    url, server_conn = server
+    client = open_database("client")
+    box_name, contents = box
+    save_check(client, (box_name, "2024-05-01", ""), full_items(contents))
+
+    with pytest.raises(urllib.error.HTTPError):
+        sync.sync_with_server(client, url, "wrong", timeout=5)
+
+    assert checks_by_uid(server_conn) == {}
+
+
+def test_sync_with_server_exchanges_checks(server, open_database, box):
+    url, server_conn = server
+    client = open_database("client")
+    box_name, contents = box
+    save_check(client, (box_name, "2024-05-01", "From the client"), full_items(contents))
+    save_check(server_conn, (box_name, "2024-05-02", "From the server"), full_items(contents))
+
+    result = sync.sync_with_server(client, url, "secret", timeout=5)
+
+    assert (result["applied"], result["sent"]) == (1, 1)
+    assert len(checks_by_uid(client)) == 2
+    assert checks_by_uid(client) == checks_by_uid(server_conn)
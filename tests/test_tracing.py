@@ -0,0 +1,82 @@
+import json
+import threading
+
+from db import tracing
+from db.tracing import Tracer
+
+
+def test_statement_name_is_one_short_line():
+    assert tracing.statement_name("SELECT *\n    FROM  items") == "SELECT * FROM items"
+    name = tracing.statement_name("SELECT " + "x, " * 50, limit=20)
+    assert len(name) == 20 and name.endswith("...")
+
+
+def test_events_and_totals():
+    tracer = Tracer()
+    tracer.add("load", tracing.TASK, 0.0, 0.002)
+    tracer.add("load", tracing.TASK, 0.0, 0.004)
+    tracer.add("save", tracing.TASK, 0.0, 0.001)
+
+    assert tracer.slowest(tracing.TASK) == [("load", 2, 6.0, 4.0), ("save", 1, 1.0, 1.0)]
+    assert tracer.slowest(tracing.SQL) == []
+
+
+def test_buffer_keeps_the_latest_events():
+    tracer = Tracer(capacity=2)
+    for name in ("a", "b", "c"):
+        tracer.add(name, tracing.SQL, 0.0, 0.0)
+    assert [event[1] for event in tracer.events] == ["b", "c"]
+    # Totals still count everything
+    assert len(tracer.slowest(tracing.SQL)) == 3
+
+
+def test_span_timed_and_summary():
+    tracer = Tracer()
+
+    @tracer.timed(tracing.TASK)
+    def work():
+        return 42
+
+    with tracer.span("first frame", tracing.FRAME):
+        assert work() == 42
+
+    summary = tracer.summary()
+    assert summary[tracing.TASK]["count"] == 1
+    assert summary[tracing.TASK]["last"][0].endswith("work")
+    assert summary[tracing.FRAME]["last"][0] == "first frame"
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    tracer.enabled = False
+    with tracer.span("frame", tracing.FRAME):
+        pass
+    assert tracer.timed(tracing.TASK)(lambda: 1)() == 1
+    tracer.add("statement", tracing.SQL, 0.0, 0.0)
+    assert not tracer.events and not tracer.totals
+
+
+def test_export_chrome_trace(tmp_path):
+    tracer = Tracer()
+    thread = threading.Thread(target=lambda: tracer.add("write", tracing.TASK, tracer.origin, 0.5),
+                              name="db-writer")
+    thread.start()
+    thread.join()
+    path = tmp_path / "traces" / "trace.json"
+
+    assert tracer.export_chrome_trace(str(path)) == 1
+
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    (meta,) = [event for event in events if event["ph"] == "M"]
+    (event,) = [event for event in events if event["ph"] == "X"]
+    assert meta["args"]["name"] == "db-writer"
+    assert (event["name"], event["cat"], event["ts"], event["dur"]) == ("write", tracing.TASK, 0.0, 500000.0)
+    assert event["tid"] == meta["tid"]
+
+
+def test_connection_times_statements(conn, monkeypatch):
+    # The CLI tests leave the shared tracer as --trace set it
+    monkeypatch.setattr(tracing.tracer, "enabled", True)
+    tracing.tracer.clear()
+    conn.execute("SELECT 1").fetchone()
+    assert ("SELECT 1", 1) in [row[:2] for row in tracing.tracer.slowest(tracing.SQL)]